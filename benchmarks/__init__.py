@@ -0,0 +1,4 @@
+"""Performance benchmarks for the store, services and HTTP layer.
+
+Run with ``python -m benchmarks``; see ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,58 @@
+"""Command-line entry point: ``python -m benchmarks``."""
+
+import argparse
+import platform
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+from benchmarks.datasets import SCALES
+from benchmarks.harness import compare, format_results, load, save
+from benchmarks.suites import SUITES, Context
+from task_manager.storage.factory import BACKENDS
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure throughput and p50/p99 latency of the Task Manager.",
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="json")
+    parser.add_argument("--suite", action="append", choices=list(SUITES),
+                        help="Suite to run; repeat for several (default: all)")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="Calls per point operation; full scans run 1/20 as many")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="Save results as JSON to this file")
+    parser.add_argument("--baseline", "-b", help="Compare against results saved earlier")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed p50 slowdown vs the baseline (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    ctx = Context(backend=args.backend, scale=SCALES[args.scale],
+                  iterations=args.iterations, seed=args.seed)
+    results = []
+    for name in args.suite or list(SUITES):
+        print(f"Running {name} suite ({args.backend}, {args.scale})...", file=sys.stderr)
+        results.extend(SUITES[name](ctx))
+
+    comparisons = compare(results, load(args.baseline), args.threshold) if args.baseline else None
+    print(format_results(results, comparisons))
+
+    if args.output:
+        save(args.output, results, {
+            "scale": args.scale,
+            "backend": args.backend,
+            "iterations": args.iterations,
+            "python": platform.python_version(),
+            "timestamp": datetime.now().isoformat(),
+        })
+    if comparisons and any(c.regressed for c in comparisons):
+        print(f"Regressions beyond {args.threshold:.0%} found.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Synthetic datasets at realistic scale."""
+
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List
+
+from task_manager.models.department import Department
+from task_manager.models.meeting import Meeting
+from task_manager.models.mom import AgendaItem, MinutesOfMeeting, MOMStatus
+from task_manager.models.task import Task, TaskPriority, TaskStatus
+from task_manager.services.department_service import DepartmentService
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+
+
+@dataclass(frozen=True)
+class Scale:
+    departments: int
+    meetings: int
+    agenda_items: int
+    tasks: int
+    people: int = 50
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(departments=5, meetings=50, agenda_items=3, tasks=1_000),
+    "medium": Scale(departments=20, meetings=500, agenda_items=5, tasks=10_000),
+    "large": Scale(departments=50, meetings=2_000, agenda_items=5, tasks=100_000, people=500),
+}
+
+
+@dataclass
+class Dataset:
+    """Ids of the generated records, for benchmarks that need real keys."""
+
+    department_ids: List[str]
+    meeting_ids: List[str]
+    mom_ids: List[str]
+    task_ids: List[str]
+    people: List[str]
+
+
+def generate(store: JsonStore, scale: Scale, seed: int = 0) -> Dataset:
+    """Fill ``store`` with departments, meetings with MOMs, and tasks.
+
+    Every meeting gets a MOM with ``scale.agenda_items`` agenda items; half of
+    the tasks are linked to a MOM. Records are written with one batch insert
+    per collection so generating large datasets stays fast.
+    """
+    rng = random.Random(seed)
+    people = [f"person-{i}" for i in range(scale.people)]
+    start = date(2025, 1, 1)
+
+    departments = [Department(name=f"Department {i}") for i in range(scale.departments)]
+    store.insert_many(DepartmentService.COLLECTION, {d.id: d.to_dict() for d in departments})
+
+    meetings = [
+        Meeting(
+            title=f"Meeting {i}",
+            department_id=rng.choice(departments).id,
+            date=(start + timedelta(days=rng.randrange(365))).isoformat(),
+            attendees=rng.sample(people, min(5, len(people))),
+        )
+        for i in range(scale.meetings)
+    ]
+    store.insert_many(MOMService.MEETINGS_COLLECTION, {m.id: m.to_dict() for m in meetings})
+
+    moms = [
+        MinutesOfMeeting(
+            meeting_id=m.id,
+            prepared_by=rng.choice(people),
+            summary=f"Summary of {m.title}",
+            agenda_items=[
+                AgendaItem(title=f"Item {k}", discussion="Discussed.", decisions="Agreed.")
+                for k in range(scale.agenda_items)
+            ],
+            status=rng.choice(list(MOMStatus)),
+        )
+        for m in meetings
+    ]
+    store.insert_many(MOMService.MOM_COLLECTION, {m.id: m.to_dict() for m in moms})
+
+    tasks = [
+        Task(
+            title=f"Task {i}",
+            department_id=rng.choice(departments).id,
+            assigned_to=rng.choice(people),
+            mom_id=rng.choice(moms).id if moms and i % 2 == 0 else None,
+            due_date=(start + timedelta(days=rng.randrange(365))).isoformat(),
+            status=rng.choice(list(TaskStatus)),
+            priority=rng.choice(list(TaskPriority)),
+        )
+        for i in range(scale.tasks)
+    ]
+    store.insert_many(TaskService.TASKS_COLLECTION, {t.id: t.to_dict() for t in tasks})
+
+    return Dataset(
+        department_ids=[d.id for d in departments],
+        meeting_ids=[m.id for m in meetings],
+        mom_ids=[m.id for m in moms],
+        task_ids=[t.id for t in tasks],
+        people=people,
+    )
@@ -0,0 +1,123 @@
+"""Timing, reporting and baseline comparison for benchmark runs."""
+
+import json
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Result:
+    """Latency distribution of one benchmarked operation."""
+
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+
+    @classmethod
+    def from_samples(cls, name: str, samples: List[float]) -> "Result":
+        """Summarize per-call durations given in seconds."""
+        ordered = sorted(samples)
+        total = sum(ordered)
+        return cls(
+            name=name,
+            iterations=len(ordered),
+            ops_per_sec=len(ordered) / total if total else math.inf,
+            p50_ms=percentile(ordered, 50) * 1000,
+            p99_ms=percentile(ordered, 99) * 1000,
+            mean_ms=total / len(ordered) * 1000,
+        )
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(
+    name: str,
+    fn: Callable[[int], Any],
+    iterations: int,
+    warmup: int = 0,
+) -> Result:
+    """Call ``fn(i)`` ``iterations`` times and time each call separately."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return Result.from_samples(name, samples)
+
+
+def save(path: str, results: List[Result], meta: Dict[str, Any]) -> None:
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": [asdict(r) for r in results]}, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Result]:
+    with open(path) as f:
+        data = json.load(f)
+    return {r["name"]: Result(**r) for r in data["results"]}
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline_p50_ms: float
+    current_p50_ms: float
+    regressed: bool
+
+    @property
+    def change(self) -> float:
+        """Relative change in p50 latency; positive means slower."""
+        if not self.baseline_p50_ms:
+            return 0.0
+        return self.current_p50_ms / self.baseline_p50_ms - 1
+
+
+def compare(
+    current: List[Result], baseline: Dict[str, Result], threshold: float
+) -> List[Comparison]:
+    """Compare p50 latencies against a baseline run.
+
+    An operation regresses when its p50 grew by more than ``threshold``
+    (``0.2`` = 20%). Operations missing from the baseline are skipped.
+    """
+    comparisons = []
+    for result in current:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        comparisons.append(Comparison(
+            name=result.name,
+            baseline_p50_ms=base.p50_ms,
+            current_p50_ms=result.p50_ms,
+            regressed=result.p50_ms > base.p50_ms * (1 + threshold),
+        ))
+    return comparisons
+
+
+def format_results(results: List[Result], comparisons: Optional[List[Comparison]] = None) -> str:
+    by_name = {c.name: c for c in comparisons or []}
+    width = max([len(r.name) for r in results] + [9])
+    lines = [
+        f"{'operation':<{width}}  {'iters':>7}  {'ops/s':>10}  {'p50 ms':>9}  {'p99 ms':>9}"
+        + ("  vs baseline" if comparisons is not None else "")
+    ]
+    for r in results:
+        line = (
+            f"{r.name:<{width}}  {r.iterations:>7}  {r.ops_per_sec:>10.1f}  "
+            f"{r.p50_ms:>9.3f}  {r.p99_ms:>9.3f}"
+        )
+        comparison = by_name.get(r.name)
+        if comparison is not None:
+            line += f"  {comparison.change:+.1%}" + ("  REGRESSION" if comparison.regressed else "")
+        lines.append(line)
+    return "\n".join(lines)
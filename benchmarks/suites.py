@@ -0,0 +1,296 @@
+"""Benchmark suites for each layer: store, services, HTTP and CLI.
+
+Each suite takes a :class:`Context`, works on its own freshly generated
+dataset and returns one :class:`Result` per operation.
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from benchmarks.datasets import Dataset, Scale, generate
+from benchmarks.harness import Result, measure
+from task_manager.models.task import Task, TaskStatus
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.factory import create_store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Context:
+    backend: str
+    scale: Scale
+    iterations: int
+    seed: int = 0
+
+    @property
+    def heavy_iterations(self) -> int:
+        """Iterations for operations that touch a whole collection."""
+        return max(3, self.iterations // 20)
+
+    @contextmanager
+    def dataset(self) -> Iterator[Tuple[str, Dataset]]:
+        """Yield a temp data dir holding a freshly generated dataset."""
+        data_dir = tempfile.mkdtemp(prefix="task_manager_bench_")
+        try:
+            store = create_store(self.backend, data_dir=data_dir)
+            # Services declare their indexes; create them before loading data.
+            TaskService(store)
+            MOMService(store)
+            dataset = generate(store, self.scale, seed=self.seed)
+            store.close()
+            yield data_dir, dataset
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def store_suite(ctx: Context) -> List[Result]:
+    with ctx.dataset() as (data_dir, dataset):
+        store = create_store(ctx.backend, data_dir=data_dir)
+        TaskService(store)
+        rng = random.Random(ctx.seed)
+        collection = TaskService.TASKS_COLLECTION
+        sample = dataset.task_ids[0]
+
+        def insert(i: int) -> None:
+            task = Task(title=f"Bench {i}", department_id=dataset.department_ids[0],
+                        assigned_to=dataset.people[0])
+            store.insert(collection, task.id, task.to_dict())
+
+        def update(_i: int) -> None:
+            id = rng.choice(dataset.task_ids)
+            record = dict(store.get(collection, id))
+            record["status"] = rng.choice(list(TaskStatus)).value
+            store.update(collection, id, record)
+
+        results = [
+            measure("store.insert", insert, ctx.iterations),
+            measure("store.update", update, ctx.iterations),
+            measure("store.get", lambda _i: store.get(collection, sample), ctx.iterations),
+            measure("store.find[indexed]",
+                    lambda _i: store.find(collection, assigned_to=rng.choice(dataset.people)),
+                    ctx.iterations),
+            measure("store.find[unindexed]",
+                    lambda _i: store.find(collection, priority="high"), ctx.heavy_iterations),
+        ]
+        store.close()
+        return results
+
+
+def models_suite(ctx: Context) -> List[Result]:
+    with ctx.dataset() as (data_dir, _dataset):
+        store = create_store(ctx.backend, data_dir=data_dir)
+        records = store.get_all(TaskService.TASKS_COLLECTION)
+        store.close()
+    tasks = Task.from_dicts(records)
+    return [
+        measure("models.Task.from_dicts[all]", lambda _i: Task.from_dicts(records),
+                ctx.heavy_iterations, warmup=1),
+        measure("models.Task.to_dict[all]", lambda _i: [t.to_dict() for t in tasks],
+                ctx.heavy_iterations, warmup=1),
+    ]
+
+
+def analytics_suite(ctx: Context) -> List[Result]:
+    from task_manager.services.analytics import HAVE_NUMPY, TaskAnalytics
+
+    if not HAVE_NUMPY:
+        print("  skipped: task analytics needs numpy installed", file=sys.stderr)
+        return []
+    with ctx.dataset() as (data_dir, _dataset):
+        store = create_store(ctx.backend, data_dir=data_dir)
+        analytics = TaskAnalytics(store)
+        results = [
+            measure("analytics.count[dept x status]",
+                    lambda _i: analytics.count(["department_id", "status"]), ctx.iterations),
+            measure("analytics.count[assignee, active]",
+                    lambda _i: analytics.count(["assigned_to"],
+                                               {"status": ["open", "in_progress"]}),
+                    ctx.iterations),
+            measure("analytics.count[overdue by priority]",
+                    lambda _i: analytics.count(["priority"], overdue=True), ctx.iterations),
+        ]
+        store.close()
+        return results
+
+
+def services_suite(ctx: Context) -> List[Result]:
+    with ctx.dataset() as (data_dir, dataset):
+        store = create_store(ctx.backend, data_dir=data_dir)
+        tasks = TaskService(store)
+        moms = MOMService(store)
+        rng = random.Random(ctx.seed)
+
+        def mom_workflow(i: int) -> None:
+            meeting = moms.create_meeting(f"Bench {i}", dataset.department_ids[0], "2025-06-01")
+            mom = moms.create_mom(meeting.id, dataset.people[0])
+            moms.add_agenda_item(mom.id, "Item", discussion="Discussed.")
+            moms.submit_for_review(mom.id)
+            moms.validate_mom(mom.id, dataset.people[1])
+
+        results = [
+            measure("tasks.list_tasks[all]", lambda _i: tasks.list_tasks(), ctx.heavy_iterations),
+            measure("tasks.list_tasks[status]",
+                    lambda _i: tasks.list_tasks(status=TaskStatus.OPEN), ctx.heavy_iterations),
+            measure("tasks.list_tasks[dept+assignee]",
+                    lambda _i: tasks.list_tasks(department_id=rng.choice(dataset.department_ids),
+                                                assigned_to=rng.choice(dataset.people)),
+                    ctx.iterations),
+            measure("tasks.list_tasks_page[-priority]",
+                    lambda _i: tasks.list_tasks_page(50, sort="-priority"), ctx.heavy_iterations),
+            measure("moms.workflow", mom_workflow, ctx.iterations),
+        ]
+        store.close()
+        return results
+
+
+HTTP_ENDPOINTS: List[Tuple[str, bool]] = [
+    ("/api/dashboard", False),
+    ("/api/tasks?limit=50&sort=-priority", False),
+    ("/api/tasks?status=open", True),
+    ("/api/tasks", True),
+    ("/api/meetings", True),
+    ("/api/moms", True),
+]
+
+
+def http_suite(ctx: Context) -> List[Result]:
+    try:
+        from fastapi.testclient import TestClient
+    except (ImportError, RuntimeError):
+        print("  skipped: fastapi.testclient needs httpx installed", file=sys.stderr)
+        return []
+    from task_manager.api.main import app
+
+    with ctx.dataset() as (data_dir, _dataset), _environ(
+        TASK_MANAGER_STORE=ctx.backend, TASK_MANAGER_DATA_DIR=data_dir
+    ):
+        results = []
+        with TestClient(app) as client:
+            for path, heavy in HTTP_ENDPOINTS:
+                def get(_i: int, path: str = path) -> None:
+                    response = client.get(path)
+                    response.raise_for_status()
+
+                iterations = ctx.heavy_iterations if heavy else ctx.iterations
+                results.append(measure(f"http GET {path}", get, iterations, warmup=1))
+        return results
+
+
+LOAD_CLIENTS = 32
+
+
+def load_suite(ctx: Context) -> List[Result]:
+    """Concurrent clients reading tasks while one client keeps updating them.
+
+    Runs the app in-process over ASGI, so it measures the server's scheduling
+    (event loop and storage threads) rather than the network. Throughput is
+    the aggregate over all clients.
+    """
+    try:
+        import httpx
+    except ImportError:
+        print("  skipped: the load suite needs httpx installed", file=sys.stderr)
+        return []
+    from task_manager.api.main import app
+
+    with ctx.dataset() as (data_dir, dataset), _environ(
+        TASK_MANAGER_STORE=ctx.backend, TASK_MANAGER_DATA_DIR=data_dir
+    ):
+        return asyncio.run(_load(httpx, app, dataset, ctx))
+
+
+async def _load(httpx, app, dataset: Dataset, ctx: Context) -> List[Result]:
+    rng = random.Random(ctx.seed)
+    reads: List[float] = []
+    writes: List[float] = []
+    done = asyncio.Event()
+
+    async def reader(client) -> None:
+        for _ in range(ctx.iterations):
+            start = time.perf_counter()
+            response = await client.get(f"/api/tasks/{rng.choice(dataset.task_ids)}")
+            response.raise_for_status()
+            reads.append(time.perf_counter() - start)
+
+    async def writer(client) -> None:
+        # Only open tasks can be edited.
+        response = await client.get("/api/tasks", params={"status": "open"})
+        editable = [t["id"] for t in response.json()]
+        i = 0
+        while editable and not done.is_set():
+            start = time.perf_counter()
+            response = await client.patch(
+                f"/api/tasks/{rng.choice(editable)}", json={"title": f"Load {i}"}
+            )
+            response.raise_for_status()
+            writes.append(time.perf_counter() - start)
+            i += 1
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            write_loop = asyncio.ensure_future(writer(client))
+            start = time.perf_counter()
+            await asyncio.gather(*(reader(client) for _ in range(LOAD_CLIENTS)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            await write_loop
+
+    results = []
+    for name, samples in (("reads", reads), ("writes", writes)):
+        if not samples:
+            continue
+        result = Result.from_samples(f"load {name} ({LOAD_CLIENTS} clients)", samples)
+        result.ops_per_sec = len(samples) / elapsed
+        results.append(result)
+    return results
+
+
+def cli_suite(ctx: Context) -> List[Result]:
+    with ctx.dataset() as (data_dir, _dataset):
+        env = dict(os.environ, TASK_MANAGER_STORE=ctx.backend, TASK_MANAGER_DATA_DIR=data_dir,
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+
+        def run(_i: int) -> None:
+            subprocess.run(
+                [sys.executable, "-m", "task_manager.app", "list-depts"],
+                env=env, check=True, stdout=subprocess.DEVNULL,
+            )
+
+        return [measure("cli cold start (list-depts)", run, max(3, ctx.iterations // 40))]
+
+
+@contextmanager
+def _environ(**values: str) -> Iterator[None]:
+    saved = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+SUITES: Dict[str, Callable[[Context], List[Result]]] = {
+    "store": store_suite,
+    "models": models_suite,
+    "services": services_suite,
+    "analytics": analytics_suite,
+    "http": http_suite,
+    "load": load_suite,
+    "cli": cli_suite,
+}
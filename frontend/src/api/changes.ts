@@ -0,0 +1,43 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+
+// Queries to refetch when a collection changes on the server.
+const affectedQueries: Record<string, string[][]> = {
+  departments: [["departments"], ["dashboard"]],
+  meetings: [["meetings"], ["dashboard"]],
+  mom: [["moms"], ["dashboard"]],
+  tasks: [["tasks"], ["dashboard"]],
+};
+
+// Subscribes to /api/events and refetches the affected queries, so pages
+// stay current without polling. Bursts of changes are coalesced.
+export function useLiveUpdates() {
+  const qc = useQueryClient();
+
+  useEffect(() => {
+    const source = new EventSource("/api/events");
+    const changed = new Set<string>();
+    let timer: ReturnType<typeof setTimeout> | undefined;
+
+    const flush = () => {
+      timer = undefined;
+      for (const collection of changed) {
+        for (const queryKey of affectedQueries[collection] ?? []) {
+          qc.invalidateQueries({ queryKey });
+        }
+      }
+      changed.clear();
+    };
+
+    source.addEventListener("change", (e) => {
+      changed.add(JSON.parse((e as MessageEvent).data).collection);
+      timer ??= setTimeout(flush, 200);
+    });
+    source.addEventListener("reset", () => qc.invalidateQueries());
+
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
+  }, [qc]);
+}
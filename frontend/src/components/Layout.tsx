@@ -1,7 +1,10 @@
 import { Outlet } from "react-router-dom";
 import Sidebar from "./Sidebar";
+import { useLiveUpdates } from "../api/changes";
 
 export default function Layout() {
+  useLiveUpdates();
+
   return (
     <div className="flex min-h-screen bg-slate-50">
       <Sidebar />
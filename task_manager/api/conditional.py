@@ -0,0 +1,106 @@
+"""Helpers for conditional requests: ETag, Last-Modified, If-None-Match, If-Match."""
+
+from email.utils import formatdate
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from task_manager.storage.async_store import AsyncStore
+from task_manager.storage.versions import CollectionVersion
+
+EXPOSED_HEADERS = ["ETag", "Last-Modified"]
+
+
+def collection_etag(version: CollectionVersion) -> str:
+    # Weak: the body also depends on the query string, which the client's
+    # cache already keys on.
+    return f'W/"{version.tag}"'
+
+
+def record_etag(rev: int) -> str:
+    return f'"{rev}"'
+
+
+def _entity_tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """Whether the request's ``If-None-Match`` matches ``etag`` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = _entity_tags(header)
+    return "*" in tags or _opaque(etag) in map(_opaque, tags)
+
+
+def not_modified(etag: str, modified: Optional[float] = None) -> Response:
+    headers = {"ETag": etag}
+    if modified:
+        headers["Last-Modified"] = formatdate(modified, usegmt=True)
+    return Response(status_code=304, headers=headers)
+
+
+def check_collection(
+    request: Request, response: Response, version: CollectionVersion
+) -> Optional[Response]:
+    """Answer a list request from the collection version alone.
+
+    Returns a 304 response when the client's copy is current; otherwise sets
+    ``ETag``/``Last-Modified`` on ``response`` and returns None. Read the
+    version *before* the records, so the ETag is never newer than the body.
+    """
+    etag = collection_etag(version)
+    if if_none_match(request, etag):
+        return not_modified(etag, version.modified)
+    response.headers["ETag"] = etag
+    if version.modified:
+        response.headers["Last-Modified"] = formatdate(version.modified, usegmt=True)
+    return None
+
+
+async def combined_version(store: AsyncStore, collections: List[str]) -> CollectionVersion:
+    """The version of a response built from several collections.
+
+    For a single collection this is just its version.
+    """
+    return CollectionVersion.combine([await store.version(c) for c in collections])
+
+
+def check_record(
+    request: Request, response: Response, rev: Optional[int], not_found: str
+) -> Optional[Response]:
+    """Like :func:`check_collection` for a single record at revision ``rev``.
+
+    Raises 404 with ``not_found`` if the record doesn't exist (``rev`` None).
+    """
+    if rev is None:
+        raise HTTPException(404, not_found)
+    etag = record_etag(rev)
+    if if_none_match(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return None
+
+
+def if_match(request: Request) -> Optional[int]:
+    """Return the revision an ``If-Match`` header requires, if any.
+
+    ``*`` requires nothing beyond the record existing. Raises 412 for a tag
+    that can't match any revision: weak tags never match (RFC 9110), and
+    only a single tag is supported.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    tags = _entity_tags(header)
+    if len(tags) == 1 and tags[0].startswith('"') and tags[0].endswith('"'):
+        try:
+            return int(tags[0][1:-1])
+        except ValueError:
+            pass
+    raise HTTPException(412, "If-Match does not match the current revision")
@@ -1,19 +1,49 @@
 """Dependency injection for FastAPI routers."""
 
+from typing import Optional
+
 from fastapi import Request
 
-from task_manager.services.department_service import DepartmentService
-from task_manager.services.mom_service import MOMService
-from task_manager.services.task_service import TaskService
+from task_manager.services.analytics import TaskAnalytics
+from task_manager.services.cache import ModelCache
+from task_manager.services.changefeed import ChangeFeed
+from task_manager.services.counters import Counters
+from task_manager.services.search import SearchIndex
+from task_manager.services.aio import AsyncDepartmentService, AsyncMOMService, AsyncTaskService
+from task_manager.storage.async_store import AsyncStore
+
 
+async def get_store(request: Request) -> AsyncStore:
+    return request.app.state.store
 
-def get_dept_service(request: Request) -> DepartmentService:
+
+async def get_dept_service(request: Request) -> AsyncDepartmentService:
     return request.app.state.dept_service
 
 
-def get_mom_service(request: Request) -> MOMService:
+async def get_mom_service(request: Request) -> AsyncMOMService:
     return request.app.state.mom_service
 
 
-def get_task_service(request: Request) -> TaskService:
+async def get_task_service(request: Request) -> AsyncTaskService:
     return request.app.state.task_service
+
+
+async def get_counters(request: Request) -> Counters:
+    return request.app.state.counters
+
+
+async def get_task_analytics(request: Request) -> Optional[TaskAnalytics]:
+    return request.app.state.task_analytics
+
+
+async def get_change_feed(request: Request) -> ChangeFeed:
+    return request.app.state.change_feed
+
+
+async def get_model_cache(request: Request) -> ModelCache:
+    return request.app.state.model_cache
+
+
+async def get_search_index(request: Request) -> SearchIndex:
+    return request.app.state.search_index
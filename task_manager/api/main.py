@@ -1,43 +1,107 @@
 """FastAPI application entry point."""
 
 from contextlib import asynccontextmanager
+from typing import Optional, Sequence
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from task_manager.storage.json_store import JsonStore
+from task_manager.storage.async_store import AsyncStore
+from task_manager.storage.factory import create_store
+from task_manager.services.aio import AsyncDepartmentService, AsyncMOMService, AsyncTaskService
+from task_manager.services.analytics import HAVE_NUMPY, TaskAnalytics
+from task_manager.services.cache import ModelCache
+from task_manager.services.changefeed import ChangeFeed
+from task_manager.services.counters import Counters
 from task_manager.services.department_service import DepartmentService
+from task_manager.services.events import EventBus
 from task_manager.services.mom_service import MOMService
+from task_manager.services.search import SearchIndex
 from task_manager.services.task_service import TaskService
 
-from task_manager.api.routers import departments, meetings, moms, tasks
+from task_manager.api.conditional import EXPOSED_HEADERS
+from task_manager.api.metrics import MetricsMiddleware
+from task_manager.api.pagination import NEXT_CURSOR_HEADER
+from task_manager.api.responses import CodecResponse
+from task_manager.api.routers import (
+    analytics,
+    cache,
+    changes,
+    departments,
+    export,
+    meetings,
+    metrics,
+    moms,
+    search,
+    tasks,
+)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    store = JsonStore(data_dir="data")
-    app.state.store = store
-    app.state.dept_service = DepartmentService(store)
-    app.state.mom_service = MOMService(store)
-    app.state.task_service = TaskService(store)
-    yield
+def create_app(
+    data_dir: Optional[str] = None,
+    allow_origins: Sequence[str] = ("http://localhost:5173",),
+) -> FastAPI:
+    """Build the API app; the store opens on startup and is flushed and closed on shutdown.
 
+    ``data_dir`` defaults to the configured one (see :func:`create_store`).
+    """
 
-app = FastAPI(
-    title="Task Manager API",
-    version="1.0.0",
-    lifespan=lifespan,
-)
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        store = create_store(data_dir=data_dir)
+        events = EventBus()
+        app.state.store = AsyncStore(store)
+        app.state.counters = Counters(store)
+        events.subscribe(app.state.counters.apply)
+        app.state.task_analytics = TaskAnalytics(store) if HAVE_NUMPY else None
+        if app.state.task_analytics is not None:
+            events.subscribe(app.state.task_analytics.apply)
+        app.state.change_feed = ChangeFeed()
+        events.subscribe(app.state.change_feed.apply)
+        app.state.model_cache = ModelCache(store)
+        events.subscribe(app.state.model_cache.apply)
+        app.state.search_index = SearchIndex(store)
+        events.subscribe(app.state.search_index.apply)
+        app.state.dept_service = AsyncDepartmentService(
+            DepartmentService(store, events), app.state.store
+        )
+        app.state.mom_service = AsyncMOMService(
+            MOMService(store, events, app.state.model_cache), app.state.store
+        )
+        app.state.task_service = AsyncTaskService(
+            TaskService(store, events, app.state.model_cache), app.state.store
+        )
+        yield
+        app.state.store.close()
+
+    app = FastAPI(
+        title="Task Manager API",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=CodecResponse,
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(allow_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, *EXPOSED_HEADERS],
+    )
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(departments.router)
+    app.include_router(meetings.router)
+    app.include_router(moms.router)
+    app.include_router(tasks.router)
+    app.include_router(export.router)
+    app.include_router(analytics.router)
+    app.include_router(changes.router)
+    app.include_router(cache.router)
+    app.include_router(search.router)
+    app.include_router(metrics.router)
+    return app
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.include_router(departments.router)
-app.include_router(meetings.router)
-app.include_router(moms.router)
-app.include_router(tasks.router)
+app = create_app()
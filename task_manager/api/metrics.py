@@ -0,0 +1,46 @@
+"""ASGI middleware recording per-route request metrics."""
+
+import time
+from typing import Any, Callable
+
+from task_manager.metrics import METRICS, SIZE_BUCKETS
+
+
+class MetricsMiddleware:
+    """Record each HTTP request's latency, status and response size.
+
+    Requests are labelled with their route template (``/api/tasks/{task_id}``),
+    not the raw path, so ids don't create new series; requests no route
+    matched share ``unmatched``. A plain ASGI middleware, so streamed
+    responses (exports, server-sent events) pass through untouched and are
+    measured when they finish. Does nothing while :data:`METRICS` is off.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not METRICS.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def measured_send(message: Any) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = {"method": scope["method"], "route": route}
+            METRICS.inc("http_requests_total", status=status, **labels)
+            METRICS.observe("http_request_duration_seconds", elapsed, **labels)
+            METRICS.observe("http_response_size_bytes", size, SIZE_BUCKETS, **labels)
@@ -0,0 +1,20 @@
+"""Helpers for paginated list endpoints."""
+
+from fastapi import Response
+
+from task_manager.storage.pagination import Page
+from task_manager.api.responses import CodecResponse, json_response
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_response(page: Page, response: Response) -> CodecResponse:
+    """Serialize a page, passing its next cursor in the ``X-Next-Cursor`` header.
+
+    Items are models, or dicts that are already serialized.
+    """
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    items = [item if isinstance(item, dict) else item.to_dict() for item in page.items]
+    return json_response(items, response)
@@ -0,0 +1,34 @@
+"""JSON responses rendered with the storage codec."""
+
+import os
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from task_manager.metrics import METRICS
+from task_manager.storage.codec import get_codec
+
+CODEC = get_codec(os.environ.get("TASK_MANAGER_CODEC", "auto"))
+
+
+class CodecResponse(JSONResponse):
+    """A ``JSONResponse`` encoded with :data:`CODEC` (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        with METRICS.timer("response_encode_seconds"):
+            return CODEC.encode(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> CodecResponse:
+    """Serialize ``content`` now, skipping FastAPI's ``jsonable_encoder`` pass.
+
+    ``content`` must already be plain JSON data, such as ``to_dict()``
+    output. Headers set on the handler's injected ``response`` are copied
+    over, since FastAPI ignores that object once a handler returns a
+    response of its own.
+    """
+    rendered = CodecResponse(content)
+    if response is not None:
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
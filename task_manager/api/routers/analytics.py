@@ -0,0 +1,56 @@
+"""Task analytics endpoints backed by the columnar task table."""
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from task_manager.services.analytics import TaskAnalytics
+from task_manager.storage.async_store import AsyncStore
+from task_manager.api.dependencies import get_store, get_task_analytics
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+
+@router.get("/tasks")
+async def task_analytics(
+    group_by: List[str] = Query([]),
+    status: List[str] = Query([]),
+    priority: List[str] = Query([]),
+    department_id: List[str] = Query([]),
+    assigned_to: List[str] = Query([]),
+    overdue: bool = Query(False),
+    due_before: Optional[date] = Query(None),
+    due_after: Optional[date] = Query(None),
+    as_of: Optional[date] = Query(None),
+    analytics: Optional[TaskAnalytics] = Depends(get_task_analytics),
+    store: AsyncStore = Depends(get_store),
+):
+    """Count tasks matching the filters, grouped by up to four fields.
+
+    Each filter may be repeated to match any of several values.
+    """
+    if analytics is None:
+        raise HTTPException(503, "Task analytics requires numpy to be installed")
+    filters = {
+        field: values
+        for field, values in (
+            ("status", status),
+            ("priority", priority),
+            ("department_id", department_id),
+            ("assigned_to", assigned_to),
+        )
+        if values
+    }
+    try:
+        return await store.read(
+            analytics.count,
+            group_by,
+            filters,
+            overdue=overdue,
+            due_before=due_before,
+            due_after=due_after,
+            as_of=as_of,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
@@ -0,0 +1,14 @@
+"""Model cache statistics."""
+
+from fastapi import APIRouter, Depends
+
+from task_manager.services.cache import ModelCache
+from task_manager.api.dependencies import get_model_cache
+
+router = APIRouter(prefix="/api/cache", tags=["cache"])
+
+
+@router.get("/stats")
+async def cache_stats(cache: ModelCache = Depends(get_model_cache)):
+    """Hit, miss and eviction counts of the decoded-model cache."""
+    return cache.stats()
@@ -0,0 +1,102 @@
+"""Change feed endpoints: long-polling and server-sent events."""
+
+import asyncio
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from task_manager.services.changefeed import ChangeBatch, ChangeFeed
+from task_manager.api.dependencies import get_change_feed
+from task_manager.api.pagination import MAX_PAGE_SIZE
+from task_manager.api.responses import CODEC
+
+router = APIRouter(prefix="/api", tags=["changes"])
+
+MAX_POLL_SECONDS = 60.0
+KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/changes")
+async def list_changes(
+    since: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = Query(None),
+    collection: List[str] = Query([]),
+    timeout: float = Query(25.0, ge=0, le=MAX_POLL_SECONDS),
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    feed: ChangeFeed = Depends(get_change_feed),
+):
+    """Long-poll for changes after ``since``.
+
+    Without ``since`` this returns immediately with the current position.
+    Otherwise it waits up to ``timeout`` seconds for a change to one of the
+    ``collection``s (all by default). Pass the returned ``last_seq`` and
+    ``epoch`` to the next call; ``reset: true`` means changes were missed and
+    the client should reload.
+    """
+    if since is None:
+        return ChangeBatch(feed.epoch, [], feed.last_seq).to_dict()
+    batch = feed.since(since, epoch, collection, limit)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not batch.changes and not batch.reset:
+        remaining = deadline - loop.time()
+        if remaining <= 0 or not await feed.wait(batch.last_seq, remaining):
+            break
+        batch = feed.since(batch.last_seq, feed.epoch, collection, limit)
+    return batch.to_dict()
+
+
+def _resume_point(request: Request, since: Optional[int], feed: ChangeFeed) -> Tuple[int, str]:
+    """Where a stream starts: ``Last-Event-ID`` on reconnect, else ``since``, else now."""
+    last_event_id = request.headers.get("last-event-id", "")
+    epoch, _, seq = last_event_id.rpartition(":")
+    if epoch and seq.isdigit():
+        return int(seq), epoch
+    if since is not None:
+        return since, feed.epoch
+    return feed.last_seq, feed.epoch
+
+
+def _sse(event: str, data: dict, id: Optional[str] = None) -> str:
+    lines = [f"id: {id}"] if id else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {CODEC.encode(data).decode()}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    collection: List[str] = Query([]),
+    feed: ChangeFeed = Depends(get_change_feed),
+):
+    """Server-sent events: one ``change`` event per change, as it happens.
+
+    Event ids are ``<epoch>:<seq>``, so a reconnecting ``EventSource``
+    resumes where it left off. A ``reset`` event means changes were missed
+    and the client should reload; comments are sent every
+    ``KEEPALIVE_SECONDS`` to keep proxies from closing an idle stream.
+    """
+    seq, epoch = _resume_point(request, since, feed)
+
+    async def stream():
+        nonlocal seq, epoch
+        while not await request.is_disconnected():
+            batch = feed.since(seq, epoch, collection, MAX_PAGE_SIZE)
+            epoch = batch.epoch
+            if batch.reset:
+                yield _sse("reset", {"last_seq": batch.last_seq}, f"{epoch}:{batch.last_seq}")
+            for change in batch.changes:
+                yield _sse("change", change.to_dict(), f"{epoch}:{change.seq}")
+            seq = batch.last_seq
+            if not batch.changes and not batch.reset:
+                if not await feed.wait(seq, KEEPALIVE_SECONDS):
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,17 @@
 """Department API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
+from task_manager.services.aio import AsyncDepartmentService
 from task_manager.services.department_service import DepartmentService
-from task_manager.api.dependencies import get_dept_service
+from task_manager.storage.async_store import AsyncStore
+from task_manager.api.conditional import check_collection, check_record
+from task_manager.api.dependencies import get_dept_service, get_store
+from task_manager.api.pagination import MAX_PAGE_SIZE, page_response
+from task_manager.api.responses import json_response
 
 router = APIRouter(prefix="/api/departments", tags=["departments"])
 
@@ -15,35 +22,61 @@ class CreateDepartmentRequest(BaseModel):
 
 
 @router.post("")
-def create_department(
+async def create_department(
     body: CreateDepartmentRequest,
-    svc: DepartmentService = Depends(get_dept_service),
+    svc: AsyncDepartmentService = Depends(get_dept_service),
 ):
-    dept = svc.create_department(body.name, body.description)
+    dept = await svc.create_department(body.name, body.description)
     return dept.to_dict()
 
 
 @router.get("")
-def list_departments(svc: DepartmentService = Depends(get_dept_service)):
-    return [d.to_dict() for d in svc.list_departments()]
+async def list_departments(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    svc: AsyncDepartmentService = Depends(get_dept_service),
+    store: AsyncStore = Depends(get_store),
+):
+    version = await store.version(DepartmentService.COLLECTION)
+    cached = check_collection(request, response, version)
+    if cached is not None:
+        return cached
+    if limit is None and cursor is None and sort is None:
+        departments = await svc.list_departments()
+        return json_response([d.to_dict() for d in departments], response)
+    try:
+        page = await svc.list_departments_page(limit, cursor=cursor, sort=sort)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return page_response(page, response)
 
 
 @router.get("/{department_id}")
-def get_department(
+async def get_department(
     department_id: str,
-    svc: DepartmentService = Depends(get_dept_service),
+    request: Request,
+    response: Response,
+    svc: AsyncDepartmentService = Depends(get_dept_service),
+    store: AsyncStore = Depends(get_store),
 ):
-    dept = svc.get_department(department_id)
+    rev = await store.revision(DepartmentService.COLLECTION, department_id)
+    cached = check_record(request, response, rev, "Department not found")
+    if cached is not None:
+        return cached
+    dept = await svc.get_department(department_id)
     if not dept:
         raise HTTPException(404, "Department not found")
     return dept.to_dict()
 
 
 @router.delete("/{department_id}")
-def delete_department(
+async def delete_department(
     department_id: str,
-    svc: DepartmentService = Depends(get_dept_service),
+    svc: AsyncDepartmentService = Depends(get_dept_service),
 ):
-    if not svc.delete_department(department_id):
+    if not await svc.delete_department(department_id):
         raise HTTPException(404, "Department not found")
     return {"ok": True}
@@ -0,0 +1,33 @@
+"""Streaming NDJSON export endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from task_manager.services.export import export_ndjson
+from task_manager.storage.async_store import AsyncStore
+from task_manager.api.dependencies import get_store
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+
+@router.get("/{name}.ndjson")
+async def export_collection(
+    name: str,
+    request: Request,
+    store: AsyncStore = Depends(get_store),
+):
+    """Stream a collection as NDJSON; query parameters filter by field equality."""
+    try:
+        chunks = export_ndjson(store.store, name, dict(request.query_params))
+        # Validate the name and filters before the response starts.
+        first = await store.read(next, chunks, "")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    async def body():
+        chunk = first
+        while chunk:
+            yield chunk
+            chunk = await store.read(next, chunks, "")
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
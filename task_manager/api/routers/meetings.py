@@ -2,11 +2,16 @@
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
+from task_manager.services.aio import AsyncMOMService
 from task_manager.services.mom_service import MOMService
-from task_manager.api.dependencies import get_mom_service
+from task_manager.storage.async_store import AsyncStore
+from task_manager.api.conditional import check_collection, check_record
+from task_manager.api.dependencies import get_mom_service, get_store
+from task_manager.api.pagination import MAX_PAGE_SIZE, page_response
+from task_manager.api.responses import json_response
 
 router = APIRouter(prefix="/api/meetings", tags=["meetings"])
 
@@ -20,11 +25,11 @@ class CreateMeetingRequest(BaseModel):
 
 
 @router.post("")
-def create_meeting(
+async def create_meeting(
     body: CreateMeetingRequest,
-    svc: MOMService = Depends(get_mom_service),
+    svc: AsyncMOMService = Depends(get_mom_service),
 ):
-    meeting = svc.create_meeting(
+    meeting = await svc.create_meeting(
         title=body.title,
         department_id=body.department_id,
         date=body.date,
@@ -35,19 +40,45 @@ def create_meeting(
 
 
 @router.get("")
-def list_meetings(
+async def list_meetings(
+    request: Request,
+    response: Response,
     department_id: Optional[str] = Query(None),
-    svc: MOMService = Depends(get_mom_service),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    svc: AsyncMOMService = Depends(get_mom_service),
+    store: AsyncStore = Depends(get_store),
 ):
-    return [m.to_dict() for m in svc.list_meetings(department_id=department_id)]
+    version = await store.version(MOMService.MEETINGS_COLLECTION)
+    cached = check_collection(request, response, version)
+    if cached is not None:
+        return cached
+    if limit is None and cursor is None and sort is None:
+        meetings = await svc.list_meetings(department_id=department_id)
+        return json_response([m.to_dict() for m in meetings], response)
+    try:
+        page = await svc.list_meetings_page(
+            limit, cursor=cursor, sort=sort, department_id=department_id
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return page_response(page, response)
 
 
 @router.get("/{meeting_id}")
-def get_meeting(
+async def get_meeting(
     meeting_id: str,
-    svc: MOMService = Depends(get_mom_service),
+    request: Request,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
+    store: AsyncStore = Depends(get_store),
 ):
-    meeting = svc.get_meeting(meeting_id)
+    rev = await store.revision(MOMService.MEETINGS_COLLECTION, meeting_id)
+    cached = check_record(request, response, rev, "Meeting not found")
+    if cached is not None:
+        return cached
+    meeting = await svc.get_meeting(meeting_id)
     if not meeting:
         raise HTTPException(404, "Meeting not found")
     return meeting.to_dict()
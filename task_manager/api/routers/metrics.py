@@ -0,0 +1,16 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from task_manager.metrics import METRICS
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request, storage, model and service metrics in the Prometheus text format."""
+    if not METRICS.enabled:
+        raise HTTPException(503, "Metrics are disabled; set TASK_MANAGER_METRICS=1")
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
@@ -1,12 +1,32 @@
 """Minutes of Meeting (MOM) API endpoints."""
 
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
+from task_manager.services.aio import AsyncMOMService
+from task_manager.services.expand import (
+    MOM_EXPANSIONS,
+    expand_moms,
+    expanded_collections,
+    parse_expand,
+    with_expand_keys,
+)
+from task_manager.services.fields import select_fields
 from task_manager.services.mom_service import MOMService
-from task_manager.api.dependencies import get_mom_service
+from task_manager.storage.async_store import AsyncStore
+from task_manager.storage.versions import VersionConflictError
+from task_manager.api.conditional import (
+    check_collection,
+    check_record,
+    combined_version,
+    if_match,
+    record_etag,
+)
+from task_manager.api.dependencies import get_mom_service, get_store
+from task_manager.api.pagination import MAX_PAGE_SIZE, page_response
+from task_manager.api.responses import json_response
 
 router = APIRouter(prefix="/api/moms", tags=["moms"])
 
@@ -32,86 +52,201 @@ class RejectMOMRequest(BaseModel):
     reason: str
 
 
+def _expand(values: List[str]) -> List[str]:
+    try:
+        return parse_expand(values, MOM_EXPANSIONS)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
 @router.post("")
-def create_mom(body: CreateMOMRequest, svc: MOMService = Depends(get_mom_service)):
+async def create_mom(
+    body: CreateMOMRequest,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
+):
     try:
-        mom = svc.create_mom(body.meeting_id, body.prepared_by, body.summary)
-        return mom.to_dict()
+        mom = await svc.create_mom(body.meeting_id, body.prepared_by, body.summary)
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(mom.rev)
+    return mom.to_dict()
 
 
 @router.get("")
-def list_moms(
+async def list_moms(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None),
-    svc: MOMService = Depends(get_mom_service),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    expand: List[str] = Query([]),
+    fields: List[str] = Query([]),
+    view: Optional[str] = Query(None),
+    svc: AsyncMOMService = Depends(get_mom_service),
+    store: AsyncStore = Depends(get_store),
 ):
+    """List MOMs; ``expand`` adds each one's ``meeting``, ``department`` and/or ``tasks``.
+
+    ``fields`` and/or ``view=summary`` (everything but the agenda items)
+    return only some fields of each MOM.
+    """
     from task_manager.models.mom import MOMStatus
 
+    expansions = _expand(expand)
+    try:
+        selected = select_fields(fields, view, MOMService.MOM_FIELDS, MOMService.MOM_VIEWS)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    selected = with_expand_keys("mom", selected, expansions)
+    version = await combined_version(
+        store, [MOMService.MOM_COLLECTION, *expanded_collections("mom", expansions)]
+    )
+    cached = check_collection(request, response, version)
+    if cached is not None:
+        return cached
     mom_status = MOMStatus(status) if status else None
-    return [m.to_dict() for m in svc.list_moms(status=mom_status)]
+    if limit is None and cursor is None and sort is None:
+        moms = await svc.list_moms(status=mom_status, fields=selected or ())
+        items = moms if selected else [m.to_dict() for m in moms]
+        await store.read(expand_moms, store.store, items, expansions)
+        return json_response(items, response)
+    try:
+        page = await svc.list_moms_page(
+            limit, cursor=cursor, sort=sort, status=mom_status, fields=selected or ()
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if expansions:
+        if not selected:
+            page = page.map(lambda m: m.to_dict())
+        await store.read(expand_moms, store.store, page.items, expansions)
+    return page_response(page, response)
 
 
 @router.get("/{mom_id}")
-def get_mom(mom_id: str, svc: MOMService = Depends(get_mom_service)):
-    mom = svc.get_mom(mom_id)
+async def get_mom(
+    mom_id: str,
+    request: Request,
+    response: Response,
+    expand: List[str] = Query([]),
+    svc: AsyncMOMService = Depends(get_mom_service),
+    store: AsyncStore = Depends(get_store),
+):
+    """Get a MOM; ``expand`` adds its ``meeting``, ``department`` and/or ``tasks``.
+
+    An expanded MOM carries a weak ETag covering the related collections.
+    """
+    fields = _expand(expand)
+    rev = await store.revision(MOMService.MOM_COLLECTION, mom_id)
+    if fields:
+        if rev is None:
+            raise HTTPException(404, "MOM not found")
+        version = await combined_version(
+            store, [MOMService.MOM_COLLECTION, *expanded_collections("mom", fields)]
+        )
+        cached = check_collection(request, response, version)
+    else:
+        cached = check_record(request, response, rev, "MOM not found")
+    if cached is not None:
+        return cached
+    mom = await svc.get_mom(mom_id)
     if not mom:
         raise HTTPException(404, "MOM not found")
+    if fields:
+        return (await store.read(expand_moms, store.store, [mom.to_dict()], fields))[0]
     return mom.to_dict()
 
 
 @router.post("/{mom_id}/agenda-items")
-def add_agenda_item(
+async def add_agenda_item(
     mom_id: str,
     body: AddAgendaItemRequest,
-    svc: MOMService = Depends(get_mom_service),
+    request: Request,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
 ):
     try:
-        mom = svc.add_agenda_item(mom_id, body.title, body.discussion, body.decisions)
-        return mom.to_dict()
+        mom = await svc.add_agenda_item(
+            mom_id, body.title, body.discussion, body.decisions,
+            expected_rev=if_match(request),
+        )
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(mom.rev)
+    return mom.to_dict()
 
 
 @router.post("/{mom_id}/submit")
-def submit_mom(mom_id: str, svc: MOMService = Depends(get_mom_service)):
+async def submit_mom(
+    mom_id: str,
+    request: Request,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
+):
     try:
-        mom = svc.submit_for_review(mom_id)
-        return mom.to_dict()
+        mom = await svc.submit_for_review(mom_id, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(mom.rev)
+    return mom.to_dict()
 
 
 @router.post("/{mom_id}/validate")
-def validate_mom(
+async def validate_mom(
     mom_id: str,
     body: ValidateMOMRequest,
-    svc: MOMService = Depends(get_mom_service),
+    request: Request,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
 ):
     try:
-        mom = svc.validate_mom(mom_id, body.validated_by)
-        return mom.to_dict()
+        mom = await svc.validate_mom(mom_id, body.validated_by, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(mom.rev)
+    return mom.to_dict()
 
 
 @router.post("/{mom_id}/reject")
-def reject_mom(
+async def reject_mom(
     mom_id: str,
     body: RejectMOMRequest,
-    svc: MOMService = Depends(get_mom_service),
+    request: Request,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
 ):
     try:
-        mom = svc.reject_mom(mom_id, body.rejected_by, body.reason)
-        return mom.to_dict()
+        mom = await svc.reject_mom(
+            mom_id, body.rejected_by, body.reason, expected_rev=if_match(request)
+        )
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(mom.rev)
+    return mom.to_dict()
 
 
 @router.post("/{mom_id}/revise")
-def revise_mom(mom_id: str, svc: MOMService = Depends(get_mom_service)):
+async def revise_mom(
+    mom_id: str,
+    request: Request,
+    response: Response,
+    svc: AsyncMOMService = Depends(get_mom_service),
+):
     try:
-        mom = svc.revise_mom(mom_id)
-        return mom.to_dict()
+        mom = await svc.revise_mom(mom_id, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(mom.rev)
+    return mom.to_dict()
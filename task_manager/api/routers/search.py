@@ -0,0 +1,30 @@
+"""Full-text search over meeting minutes and tasks."""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from task_manager.services.search import SearchIndex
+from task_manager.storage.async_store import AsyncStore
+from task_manager.api.dependencies import get_search_index, get_store
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("")
+async def search(
+    q: str = Query(..., min_length=1),
+    type: List[str] = Query([]),
+    limit: int = Query(20, ge=1, le=200),
+    index: SearchIndex = Depends(get_search_index),
+    store: AsyncStore = Depends(get_store),
+):
+    """Rank MOM summaries, agenda items and tasks against ``q`` (BM25).
+
+    ``type`` may be repeated to restrict hits to ``mom``, ``agenda_item``
+    and/or ``task``.
+    """
+    try:
+        return await store.read(index.search, q, type, limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
@@ -1,15 +1,36 @@
 """Task API endpoints + dashboard stats."""
 
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
 from task_manager.models.task import TaskPriority, TaskStatus
+from task_manager.services.aio import AsyncTaskService
+from task_manager.services.counters import Counters
 from task_manager.services.department_service import DepartmentService
+from task_manager.services.expand import (
+    TASK_EXPANSIONS,
+    expand_tasks,
+    expanded_collections,
+    parse_expand,
+    with_expand_keys,
+)
+from task_manager.services.fields import select_fields
 from task_manager.services.mom_service import MOMService
-from task_manager.services.task_service import TaskService
-from task_manager.api.dependencies import get_task_service, get_dept_service, get_mom_service
+from task_manager.services.task_service import TaskQuery, TaskService
+from task_manager.storage.async_store import AsyncStore
+from task_manager.storage.versions import VersionConflictError
+from task_manager.api.conditional import (
+    check_collection,
+    check_record,
+    combined_version,
+    if_match,
+    record_etag,
+)
+from task_manager.api.dependencies import get_counters, get_store, get_task_service
+from task_manager.api.pagination import MAX_PAGE_SIZE, page_response
+from task_manager.api.responses import json_response
 
 router = APIRouter(tags=["tasks"])
 
@@ -32,13 +53,26 @@ class UpdateTaskRequest(BaseModel):
     priority: Optional[str] = None
 
 
+class BatchCreateTasksRequest(BaseModel):
+    tasks: List[CreateTaskRequest]
+
+
+class BatchTransitionRequest(BaseModel):
+    task_ids: List[str]
+    action: str
+
+
 # -- Task endpoints --
 
 @router.post("/api/tasks")
-def create_task(body: CreateTaskRequest, svc: TaskService = Depends(get_task_service)):
+async def create_task(
+    body: CreateTaskRequest,
+    response: Response,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
     try:
         priority = TaskPriority(body.priority)
-        task = svc.create_task(
+        task = await svc.create_task(
             title=body.title,
             department_id=body.department_id,
             assigned_to=body.assigned_to,
@@ -47,115 +81,283 @@ def create_task(body: CreateTaskRequest, svc: TaskService = Depends(get_task_ser
             due_date=body.due_date,
             priority=priority,
         )
-        return task.to_dict()
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(task.rev)
+    return task.to_dict()
+
+
+@router.post("/api/tasks/batch")
+async def create_tasks_batch(
+    body: BatchCreateTasksRequest,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
+    result = await svc.create_tasks([dict(t) for t in body.tasks])
+    return result.to_dict()
+
+
+@router.post("/api/tasks/batch/transition")
+async def transition_tasks_batch(
+    body: BatchTransitionRequest,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
+    try:
+        result = await svc.bulk_transition(body.task_ids, body.action)
+        return result.to_dict()
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
 @router.get("/api/tasks")
-def list_tasks(
+async def list_tasks(
+    request: Request,
+    response: Response,
     department_id: Optional[str] = Query(None),
     assigned_to: Optional[str] = Query(None),
-    status: Optional[str] = Query(None),
+    status: List[str] = Query([]),
+    priority: List[str] = Query([]),
     mom_id: Optional[str] = Query(None),
-    svc: TaskService = Depends(get_task_service),
+    due_before: Optional[str] = Query(None),
+    due_after: Optional[str] = Query(None),
+    created_before: Optional[str] = Query(None),
+    created_after: Optional[str] = Query(None),
+    updated_before: Optional[str] = Query(None),
+    updated_after: Optional[str] = Query(None),
+    title_prefix: Optional[str] = Query(None),
+    has_due_date: Optional[bool] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    expand: List[str] = Query([]),
+    fields: List[str] = Query([]),
+    view: Optional[str] = Query(None),
+    svc: AsyncTaskService = Depends(get_task_service),
+    store: AsyncStore = Depends(get_store),
+):
+    """List tasks; ``status`` and ``priority`` may be repeated to match any value.
+
+    ``expand`` adds each task's ``mom``, ``meeting`` and/or ``department``.
+    ``fields`` and/or ``view=summary`` return only some fields of each task.
+    Answers ``If-None-Match`` with 304 while the collections read are unchanged.
+    """
+    try:
+        expansions = parse_expand(expand, TASK_EXPANSIONS)
+        selected = select_fields(fields, view, TaskService.FIELDS, TaskService.VIEWS)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    selected = with_expand_keys("task", selected, expansions)
+    version = await combined_version(
+        store, [TaskService.TASKS_COLLECTION, *expanded_collections("task", expansions)]
+    )
+    cached = check_collection(request, response, version)
+    if cached is not None:
+        return cached
+    try:
+        query = TaskQuery(
+            department_id=department_id,
+            assigned_to=assigned_to,
+            mom_id=mom_id,
+            status=[TaskStatus(s) for s in status],
+            priority=[TaskPriority(p) for p in priority],
+            due_before=due_before,
+            due_after=due_after,
+            created_before=created_before,
+            created_after=created_after,
+            updated_before=updated_before,
+            updated_after=updated_after,
+            title_prefix=title_prefix,
+            has_due_date=has_due_date,
+        )
+        if limit is None and cursor is None:
+            tasks = await svc.list_tasks(query=query, sort=sort, fields=selected or ())
+            items = tasks if selected else [t.to_dict() for t in tasks]
+            await store.read(expand_tasks, store.store, items, expansions)
+            return json_response(items, response)
+        page = await svc.list_tasks_page(
+            limit, cursor=cursor, sort=sort, query=query, fields=selected or ()
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if expansions:
+        if not selected:
+            page = page.map(lambda t: t.to_dict())
+        await store.read(expand_tasks, store.store, page.items, expansions)
+    return page_response(page, response)
+
+
+@router.get("/api/tasks/overdue")
+async def overdue_tasks(
+    as_of: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    svc: AsyncTaskService = Depends(get_task_service),
+):
+    """Open and in-progress tasks due before ``as_of`` (default: today)."""
+    try:
+        tasks = await svc.overdue_tasks(as_of=as_of, limit=limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return json_response([t.to_dict() for t in tasks])
+
+
+@router.get("/api/tasks/upcoming")
+async def upcoming_tasks(
+    days: int = Query(7, ge=0),
+    as_of: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    svc: AsyncTaskService = Depends(get_task_service),
 ):
-    task_status = TaskStatus(status) if status else None
-    return [t.to_dict() for t in svc.list_tasks(
-        department_id=department_id,
-        assigned_to=assigned_to,
-        status=task_status,
-        mom_id=mom_id,
-    )]
+    """Open and in-progress tasks due within ``days`` days of ``as_of``."""
+    try:
+        tasks = await svc.upcoming_tasks(days=days, as_of=as_of, limit=limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return json_response([t.to_dict() for t in tasks])
+
+
+@router.get("/api/tasks/due")
+async def tasks_due_between(
+    start: str = Query(...),
+    end: str = Query(...),
+    status: List[str] = Query([]),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    svc: AsyncTaskService = Depends(get_task_service),
+):
+    """Tasks due from ``start`` to ``end`` inclusive; open and in-progress by default."""
+    try:
+        statuses = [TaskStatus(s) for s in status] or TaskService.ACTIVE_STATUSES
+        tasks = await svc.due_between(start, end, status=statuses, limit=limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return json_response([t.to_dict() for t in tasks])
 
 
 @router.get("/api/tasks/{task_id}")
-def get_task(task_id: str, svc: TaskService = Depends(get_task_service)):
-    task = svc.get_task(task_id)
+async def get_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    svc: AsyncTaskService = Depends(get_task_service),
+    store: AsyncStore = Depends(get_store),
+):
+    rev = await store.revision(TaskService.TASKS_COLLECTION, task_id)
+    cached = check_record(request, response, rev, "Task not found")
+    if cached is not None:
+        return cached
+    task = await svc.get_task(task_id)
     if not task:
         raise HTTPException(404, "Task not found")
     return task.to_dict()
 
 
 @router.patch("/api/tasks/{task_id}")
-def update_task(
+async def update_task(
     task_id: str,
     body: UpdateTaskRequest,
-    svc: TaskService = Depends(get_task_service),
+    request: Request,
+    response: Response,
+    svc: AsyncTaskService = Depends(get_task_service),
 ):
+    """Update a task; with ``If-Match``, only if it is still at that revision."""
     try:
         priority = TaskPriority(body.priority) if body.priority else None
-        task = svc.update_task(
+        task = await svc.update_task(
             task_id,
             title=body.title,
             description=body.description,
             assigned_to=body.assigned_to,
             due_date=body.due_date,
             priority=priority,
+            expected_rev=if_match(request),
         )
-        return task.to_dict()
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(task.rev)
+    return task.to_dict()
 
 
 @router.delete("/api/tasks/{task_id}")
-def delete_task(task_id: str, svc: TaskService = Depends(get_task_service)):
-    if not svc.delete_task(task_id):
+async def delete_task(
+    task_id: str,
+    request: Request,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
+    """Delete a task; with ``If-Match``, only if it is still at that revision."""
+    try:
+        deleted = await svc.delete_task(task_id, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
+    if not deleted:
         raise HTTPException(404, "Task not found")
     return {"ok": True}
 
 
 @router.post("/api/tasks/{task_id}/start")
-def start_task(task_id: str, svc: TaskService = Depends(get_task_service)):
+async def start_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
     try:
-        task = svc.start_task(task_id)
-        return task.to_dict()
+        task = await svc.start_task(task_id, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(task.rev)
+    return task.to_dict()
 
 
 @router.post("/api/tasks/{task_id}/complete")
-def complete_task(task_id: str, svc: TaskService = Depends(get_task_service)):
+async def complete_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
     try:
-        task = svc.complete_task(task_id)
-        return task.to_dict()
+        task = await svc.complete_task(task_id, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(task.rev)
+    return task.to_dict()
 
 
 @router.post("/api/tasks/{task_id}/cancel")
-def cancel_task(task_id: str, svc: TaskService = Depends(get_task_service)):
+async def cancel_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    svc: AsyncTaskService = Depends(get_task_service),
+):
     try:
-        task = svc.cancel_task(task_id)
-        return task.to_dict()
+        task = await svc.cancel_task(task_id, expected_rev=if_match(request))
+    except VersionConflictError as e:
+        raise HTTPException(412, str(e))
     except ValueError as e:
         raise HTTPException(400, str(e))
+    response.headers["ETag"] = record_etag(task.rev)
+    return task.to_dict()
 
 
 # -- Dashboard --
 
-@router.get("/api/dashboard")
-def dashboard(
-    dept_svc: DepartmentService = Depends(get_dept_service),
-    mom_svc: MOMService = Depends(get_mom_service),
-    task_svc: TaskService = Depends(get_task_service),
-):
-    departments = dept_svc.list_departments()
-    meetings = mom_svc.list_meetings()
-    moms = mom_svc.list_moms()
-    tasks = task_svc.list_tasks()
-
-    task_by_status = {}
-    for t in tasks:
-        task_by_status[t.status.value] = task_by_status.get(t.status.value, 0) + 1
-
-    mom_by_status = {}
-    for m in moms:
-        mom_by_status[m.status.value] = mom_by_status.get(m.status.value, 0) + 1
-
+def _dashboard(counters: Counters) -> dict:
     return {
-        "departments": len(departments),
-        "meetings": len(meetings),
-        "moms": {"total": len(moms), "by_status": mom_by_status},
-        "tasks": {"total": len(tasks), "by_status": task_by_status},
+        "departments": counters.get(DepartmentService.COLLECTION)["total"],
+        "meetings": counters.get(MOMService.MEETINGS_COLLECTION)["total"],
+        "moms": counters.get(MOMService.MOM_COLLECTION),
+        "tasks": counters.get(TaskService.TASKS_COLLECTION),
     }
+
+
+@router.get("/api/dashboard")
+async def dashboard(
+    counters: Counters = Depends(get_counters),
+    store: AsyncStore = Depends(get_store),
+):
+    return await store.read(_dashboard, counters)
@@ -1,25 +1,40 @@
 """Main application entry point providing a CLI for the Task Manager."""
 
 import argparse
+import json
+import os
 import sys
-from typing import Optional
+import urllib.request
+from typing import List, Optional
 
+from task_manager.metrics import METRICS, parse, summarize
 from task_manager.models.mom import MOMStatus
-from task_manager.models.task import TaskPriority, TaskStatus
+from task_manager.models.task import Task, TaskPriority, TaskStatus
+from task_manager.services.counters import Counters
 from task_manager.services.department_service import DepartmentService
+from task_manager.services.events import EventBus
+from task_manager.services.expand import expand_moms
+from task_manager.services.export import EXPORTS, export_ndjson
 from task_manager.services.mom_service import MOMService
+from task_manager.services.search import DOC_TYPES, SearchIndex
 from task_manager.services.task_service import TaskService
-from task_manager.storage.json_store import JsonStore
+from task_manager.storage.factory import create_store
+from task_manager.storage.slowlog import SLOW_LOG_FILE, read_entries, slow_report
 
 
 class TaskManagerApp:
     """Facade that wires up all services and provides the CLI."""
 
-    def __init__(self, data_dir: str = "data"):
-        self.store = JsonStore(data_dir=data_dir)
-        self.dept_service = DepartmentService(self.store)
-        self.mom_service = MOMService(self.store)
-        self.task_service = TaskService(self.store)
+    def __init__(self, data_dir: Optional[str] = None, backend: Optional[str] = None):
+        self.store = create_store(backend=backend, data_dir=data_dir)
+        self.events = EventBus()
+        self.counters = Counters(self.store)
+        self.events.subscribe(self.counters.apply)
+        self.search_index = SearchIndex(self.store)
+        self.events.subscribe(self.search_index.apply)
+        self.dept_service = DepartmentService(self.store, self.events)
+        self.mom_service = MOMService(self.store, self.events)
+        self.task_service = TaskService(self.store, self.events)
 
     # -- Department commands --
 
@@ -97,10 +112,14 @@ class TaskManagerApp:
         if not mom:
             print(f"MOM '{args.mom_id}' not found.")
             return
-        meeting = self.mom_service.get_meeting(mom.meeting_id)
-        meeting_title = meeting.title if meeting else "Unknown"
+        # Linked tasks are left to mom-tasks: finding them reads the whole
+        # tasks collection, while these are point lookups.
+        related = expand_moms(self.store, [mom.to_dict()], ["meeting", "department"])[0]
+        meeting, department = related["meeting"], related["department"]
         print(f"MOM: {mom.id}")
-        print(f"  Meeting: {meeting_title}")
+        print(f"  Meeting: {meeting['title'] if meeting else 'Unknown'}")
+        if department:
+            print(f"  Department: {department['name']}")
         print(f"  Prepared by: {mom.prepared_by}")
         print(f"  Status: {mom.status.value}")
         print(f"  Summary: {mom.summary or '(none)'}")
@@ -158,6 +177,27 @@ class TaskManagerApp:
             print(f"  [{t.id[:8]}] [{t.priority.value.upper()}] {t.title} "
                   f"-> {t.assigned_to} ({t.status.value}){mom_info}")
 
+    def _print_due(self, tasks: List[Task], empty: str) -> None:
+        if not tasks:
+            print(empty)
+            return
+        for t in tasks:
+            print(f"  {t.due_date} [{t.id[:8]}] [{t.priority.value.upper()}] {t.title} "
+                  f"-> {t.assigned_to} ({t.status.value})")
+
+    def cmd_overdue(self, args: argparse.Namespace) -> None:
+        tasks = self.task_service.overdue_tasks(as_of=args.as_of, limit=args.limit)
+        self._print_due(tasks, "No overdue tasks.")
+
+    def cmd_upcoming(self, args: argparse.Namespace) -> None:
+        tasks = self.task_service.upcoming_tasks(days=args.days, as_of=args.as_of, limit=args.limit)
+        self._print_due(tasks, f"No tasks due in the next {args.days} day(s).")
+
+    def cmd_due_between(self, args: argparse.Namespace) -> None:
+        status = [TaskStatus(s) for s in args.status] or TaskService.ACTIVE_STATUSES
+        tasks = self.task_service.due_between(args.start, args.end, status=status, limit=args.limit)
+        self._print_due(tasks, f"No tasks due between {args.start} and {args.end}.")
+
     def cmd_start_task(self, args: argparse.Namespace) -> None:
         task = self.task_service.start_task(args.task_id)
         print(f"Task {task.id[:8]} is now in progress.")
@@ -170,6 +210,24 @@ class TaskManagerApp:
         task = self.task_service.cancel_task(args.task_id)
         print(f"Task {task.id[:8]} cancelled.")
 
+    def cmd_import_tasks(self, args: argparse.Namespace) -> None:
+        """Create tasks from a JSON file holding a list of task specs."""
+        if args.file == "-":
+            specs = json.load(sys.stdin)
+        else:
+            with open(args.file) as f:
+                specs = json.load(f)
+        result = self.task_service.create_tasks(specs)
+        print(f"Created {len(result.succeeded)} task(s).")
+        for error in result.errors:
+            print(f"  Item {error['index']}: {error['error']}")
+
+    def cmd_bulk_transition(self, args: argparse.Namespace) -> None:
+        result = self.task_service.bulk_transition(args.task_ids, args.action)
+        print(f"Applied '{args.action}' to {len(result.succeeded)} task(s).")
+        for error in result.errors:
+            print(f"  [{error['id'][:8]}] {error['error']}")
+
     def cmd_show_task(self, args: argparse.Namespace) -> None:
         task = self.task_service.get_task(args.task_id)
         if not task:
@@ -186,6 +244,106 @@ class TaskManagerApp:
         if task.mom_id:
             print(f"  Linked MOM: {task.mom_id[:8]}")
 
+    # -- Maintenance --
+
+    def cmd_rebuild_counters(self, _args: argparse.Namespace) -> None:
+        """Recount every collection, e.g. after editing the data files by hand."""
+        for collection, counts in self.counters.rebuild().items():
+            print(f"  {collection}: {counts['total']}")
+        print("Counters rebuilt.")
+
+    def cmd_rebuild_search(self, _args: argparse.Namespace) -> None:
+        """Reindex every MOM and task, e.g. after editing the data files by hand."""
+        print(f"Search index rebuilt: {self.search_index.rebuild()} documents.")
+
+    # -- Search --
+
+    def cmd_search(self, args: argparse.Namespace) -> None:
+        """Rank MOM summaries, agenda items and tasks against a query."""
+        hits = self.search_index.search(args.query, args.type, args.limit)
+        if not hits:
+            print("No matches.")
+            return
+        for hit in hits:
+            if hit["type"] == "agenda_item":
+                where = f"MOM {hit['id'][:8]} item {hit['item'] + 1}"
+            else:
+                where = f"{hit['type'].upper()} {hit['id'][:8]}"
+            print(f"  {hit['score']:7.3f}  [{where}] {hit['title']}")
+
+    # -- Metrics --
+
+    def cmd_stats(self, args: argparse.Namespace) -> None:
+        """Summarize the metrics of a running API server, or of one CLI command.
+
+        With a command, runs it with metrics on and reports what it did;
+        otherwise reads ``/metrics`` from ``--url``.
+        """
+        if args.run:
+            METRICS.reset()
+            METRICS.enable()
+            nested = build_parser(self).parse_args(args.run)
+            if not nested.command:
+                raise ValueError("Expected a command to measure")
+            nested.func(nested)
+            samples = METRICS.samples()
+            print()
+        else:
+            with urllib.request.urlopen(args.url.rstrip("/") + "/metrics", timeout=10) as response:
+                samples = parse(response.read().decode())
+        lines = list(summarize(samples, args.top))
+        print("Metrics:" if lines else "No metrics recorded.")
+        for line in lines:
+            print(line)
+
+    def cmd_slow_ops(self, args: argparse.Namespace) -> None:
+        """Rank the slow-operation log's query shapes and suggest indexes."""
+        entries = read_entries(os.path.join(self.store.data_dir, SLOW_LOG_FILE))
+        indexed = self.store.indexes() if hasattr(self.store, "indexes") else {}
+        report = slow_report(entries, indexed, args.top)
+        if not report["shapes"] and not report["writes"]:
+            print("No slow operations logged. Set TASK_MANAGER_SLOW_MS to record them.")
+            return
+        if report["shapes"]:
+            print("Slow reads:")
+        for row in report["shapes"]:
+            shape = ", ".join(row["filters"]) or "-"
+            sort = f" sort={row['sort']}" if row["sort"] else ""
+            print(f"  {row['collection']}.{row['op']}({shape}){sort}  n={row['count']}"
+                  f"  total={row['total_ms']:.0f}ms  p95={row['p95_ms']:.0f}ms"
+                  f"  {row['access']} {row['mean_scanned']}->{row['mean_returned']}")
+        if report["writes"]:
+            print("Slow loads and saves:")
+        for row in report["writes"]:
+            size = f"  ~{row['mean_bytes']}B" if row["mean_bytes"] is not None else ""
+            print(f"  {row['collection']}.{row['op']}  n={row['count']}"
+                  f"  total={row['total_ms']:.0f}ms  p95={row['p95_ms']:.0f}ms{size}")
+        if any(row["op"] == "save" for row in report["writes"]):
+            print("  Snapshot saves rewrite the whole collection;"
+                  " TASK_MANAGER_STORE_MODE=log appends changes instead.")
+        if report["indexes"]:
+            print("Suggested indexes:")
+        for row in report["indexes"]:
+            print(f"  store.ensure_index({row['collection']!r}, {row['field']!r},"
+                  f" kind={row['kind']!r})  # {row['total_ms']:.0f}ms of slow reads")
+
+    # -- Export --
+
+    def cmd_export(self, args: argparse.Namespace) -> None:
+        """Stream a collection as NDJSON to a file or stdout."""
+        filters = {}
+        for item in args.filter:
+            key, sep, value = item.partition("=")
+            if not sep:
+                raise ValueError(f"Invalid filter '{item}', expected key=value")
+            filters[key] = value
+        chunks = export_ndjson(self.store, args.collection, filters)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
+
     def cmd_mom_tasks(self, args: argparse.Namespace) -> None:
         """List all tasks linked to a specific MOM."""
         tasks = self.task_service.get_tasks_for_mom(args.mom_id)
@@ -286,6 +444,26 @@ def build_parser(app: TaskManagerApp) -> argparse.ArgumentParser:
     p.add_argument("--mom-id", default=None)
     p.set_defaults(func=app.cmd_list_tasks)
 
+    p = subparsers.add_parser("overdue", help="List open tasks past their due date")
+    p.add_argument("--as-of", default=None, help="Reference date (default: today)")
+    p.add_argument("--limit", type=int, default=None)
+    p.set_defaults(func=app.cmd_overdue)
+
+    p = subparsers.add_parser("upcoming", help="List open tasks due in the next few days")
+    p.add_argument("--days", type=int, default=7)
+    p.add_argument("--as-of", default=None, help="Reference date (default: today)")
+    p.add_argument("--limit", type=int, default=None)
+    p.set_defaults(func=app.cmd_upcoming)
+
+    p = subparsers.add_parser("due-between", help="List tasks due in a date range (inclusive)")
+    p.add_argument("start")
+    p.add_argument("end")
+    p.add_argument("--status", action="append", default=[],
+                   choices=["open", "in_progress", "completed", "cancelled"],
+                   help="Repeatable; default: open and in_progress")
+    p.add_argument("--limit", type=int, default=None)
+    p.set_defaults(func=app.cmd_due_between)
+
     p = subparsers.add_parser("start-task", help="Start a task")
     p.add_argument("task_id")
     p.set_defaults(func=app.cmd_start_task)
@@ -298,6 +476,15 @@ def build_parser(app: TaskManagerApp) -> argparse.ArgumentParser:
     p.add_argument("task_id")
     p.set_defaults(func=app.cmd_cancel_task)
 
+    p = subparsers.add_parser("import-tasks", help="Create tasks in bulk from a JSON file")
+    p.add_argument("file", help="JSON list of task objects, or '-' for stdin")
+    p.set_defaults(func=app.cmd_import_tasks)
+
+    p = subparsers.add_parser("bulk-transition", help="Start/complete/cancel many tasks")
+    p.add_argument("action", choices=["start", "complete", "cancel"])
+    p.add_argument("task_ids", nargs="+")
+    p.set_defaults(func=app.cmd_bulk_transition)
+
     p = subparsers.add_parser("show-task", help="Show task details")
     p.add_argument("task_id")
     p.set_defaults(func=app.cmd_show_task)
@@ -306,6 +493,39 @@ def build_parser(app: TaskManagerApp) -> argparse.ArgumentParser:
     p.add_argument("mom_id")
     p.set_defaults(func=app.cmd_mom_tasks)
 
+    # -- Maintenance --
+    p = subparsers.add_parser("rebuild-counters", help="Recount records for the dashboard")
+    p.set_defaults(func=app.cmd_rebuild_counters)
+
+    p = subparsers.add_parser("rebuild-search", help="Reindex MOMs and tasks for search")
+    p.set_defaults(func=app.cmd_rebuild_search)
+
+    # -- Search --
+    p = subparsers.add_parser("search", help="Full-text search over MOMs and tasks")
+    p.add_argument("query")
+    p.add_argument("--type", "-t", action="append", default=[], choices=DOC_TYPES)
+    p.add_argument("--limit", "-n", type=int, default=20)
+    p.set_defaults(func=app.cmd_search)
+
+    # -- Metrics --
+    p = subparsers.add_parser("stats", help="Show API metrics, or measure one command")
+    p.add_argument("--url", default="http://127.0.0.1:8000", help="API server to read")
+    p.add_argument("--top", "-n", type=int, default=20, help="Series to show per kind")
+    p.add_argument("run", nargs=argparse.REMAINDER, metavar="COMMAND",
+                   help="CLI command to run and measure instead")
+    p.set_defaults(func=app.cmd_stats)
+
+    p = subparsers.add_parser("slow-ops", help="Report slow store operations and suggest indexes")
+    p.add_argument("--top", "-n", type=int, default=20, help="Rows to show per section")
+    p.set_defaults(func=app.cmd_slow_ops)
+
+    # -- Export --
+    p = subparsers.add_parser("export", help="Export a collection as NDJSON")
+    p.add_argument("collection", choices=sorted(EXPORTS))
+    p.add_argument("--output", "-o", help="Output file (default: stdout)")
+    p.add_argument("--filter", "-f", action="append", default=[], metavar="KEY=VALUE")
+    p.set_defaults(func=app.cmd_export)
+
     return parser
 
 
@@ -321,6 +541,9 @@ def main(argv: Optional[list] = None) -> None:
     except (ValueError, Exception) as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        # Flush group-commit batches before the process exits.
+        app.store.close()
 
 
 if __name__ == "__main__":
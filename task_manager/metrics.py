@@ -0,0 +1,301 @@
+"""In-process metrics: counters and histograms, exported as Prometheus text.
+
+The API middleware, the stores, the services and the model decoders record
+into :data:`METRICS`. Recording is off unless ``TASK_MANAGER_METRICS`` is
+set to ``1``, or :meth:`Metrics.enable` is called; while off, every
+recording call returns after checking one attribute.
+
+Series are keyed by name and labels; :data:`HELP` lists every name in use.
+Histograms have cumulative ``le`` buckets, like Prometheus client
+libraries produce, so :func:`parse` and :func:`summarize` work the same on
+this registry and on the text scraped from a running server.
+"""
+
+import bisect
+import functools
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HELP = {
+    "http_requests_total": ("counter", "HTTP requests by route template and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route template."),
+    "http_response_size_bytes": ("histogram", "HTTP response body size by route template."),
+    "response_encode_seconds": ("histogram", "Time spent encoding JSON response bodies."),
+    "store_load_seconds": ("histogram", "Collection (re)loads from disk and their duration."),
+    "store_save_seconds": ("histogram", "Snapshot writes and their duration."),
+    "store_bytes_written_total": ("counter", "Bytes written to snapshots and logs."),
+    "store_lookups_total": ("counter", "Filtered reads by access path (all, hash, sorted, scan)."),
+    "store_records_examined_total": ("counter", "Records checked against filter predicates."),
+    "store_query_seconds": ("histogram", "Time spent answering page() and query() calls."),
+    "model_decode_seconds": ("histogram", "Batch decodes of stored records into models."),
+    "models_decoded_total": ("counter", "Stored records decoded into models in batches."),
+    "service_call_seconds": ("histogram", "Service method calls and their duration."),
+}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    """Context manager observing its duration into a histogram."""
+
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """A thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def enable(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Labels]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(
+        self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: Any
+    ) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels: Any) -> Any:
+        """``with metrics.timer("store_load_seconds", collection=c): ...``"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name: str, **labels: Any) -> Callable[[Callable], Callable]:
+        """Decorator form of :meth:`timer`."""
+        def decorate(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def samples(self) -> List[Sample]:
+        """Every series as ``(name, labels, value)``, histograms expanded."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (h.buckets, list(h.counts), h.sum, h.count))
+                for key, h in self._histograms.items()
+            )
+        samples: List[Sample] = [(name, dict(labels), value) for (name, labels), value in counters]
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            cumulative = 0
+            for bound, n in zip(buckets + (math.inf,), counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else _number(bound)
+                samples.append((f"{name}_bucket", {**dict(labels), "le": le}, cumulative))
+            samples.append((f"{name}_sum", dict(labels), total))
+            samples.append((f"{name}_count", dict(labels), count))
+        return samples
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        lines: List[str] = []
+        described = set()
+        for name, labels, value in self.samples():
+            family = _family(name)
+            if family not in described and family in HELP:
+                kind, text = HELP[family]
+                lines.append(f"# HELP {family} {text}")
+                lines.append(f"# TYPE {family} {kind}")
+                described.add(family)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _family(name: str) -> str:
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[:-len(suffix)] in HELP:
+            return name[:-len(suffix)]
+    return name
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def parse(text: str) -> List[Sample]:
+    """Read back the samples of a Prometheus text exposition."""
+    samples: List[Sample] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        name, _, rest = series.partition("{")
+        labels: Dict[str, str] = {}
+        rest = rest.rstrip("}")
+        while rest:
+            key, _, rest = rest.partition('="')
+            chars = []
+            i = 0
+            while rest[i] != '"':
+                if rest[i] == "\\":
+                    i += 1
+                    chars.append({"n": "\n"}.get(rest[i], rest[i]))
+                else:
+                    chars.append(rest[i])
+                i += 1
+            labels[key.lstrip(",")] = "".join(chars)
+            rest = rest[i + 1:]
+        samples.append((name, labels, float(value)))
+    return samples
+
+
+def _quantile(buckets: List[Tuple[float, float]], count: float, q: float) -> float:
+    """Upper bound of the bucket holding quantile ``q``."""
+    rank = q * count
+    for bound, cumulative in buckets:
+        if cumulative >= rank:
+            return bound
+    return math.inf
+
+
+def summarize(samples: Iterable[Sample], top: Optional[int] = None) -> Iterator[str]:
+    """Readable lines for :func:`parse` or :meth:`Metrics.samples` output.
+
+    Histograms show their count, mean and the p50/p99 bucket bounds, timings
+    first and by total time; counters follow.
+    """
+    histograms: Dict[Tuple[str, Labels], Dict[str, Any]] = {}
+    counters: List[Sample] = []
+    for name, labels, value in samples:
+        family = _family(name)
+        if family == name:
+            counters.append((name, labels, value))
+            continue
+        key = (family, tuple(sorted((k, v) for k, v in labels.items() if k != "le")))
+        series = histograms.setdefault(key, {"buckets": [], "sum": 0.0, "count": 0.0})
+        if name.endswith("_bucket"):
+            series["buckets"].append((float(labels["le"]), value))
+        else:
+            series[name.rsplit("_", 1)[1]] = value
+    # Timings first, then sizes, each by total.
+    rows = sorted(
+        histograms.items(),
+        key=lambda item: (not item[0][0].endswith("_seconds"), -item[1]["sum"]),
+    )
+    for (family, labels), series in rows[:top]:
+        if not series["count"]:
+            continue
+        seconds = family.endswith("_seconds")
+        unit = (lambda v: f"{v * 1000:.2f}ms") if seconds else (lambda v: f"{v:.0f}B")
+        buckets = sorted(series["buckets"])
+        mean = series["sum"] / series["count"]
+        p50 = _quantile(buckets, series["count"], 0.5)
+        p99 = _quantile(buckets, series["count"], 0.99)
+        where = ",".join(f"{k}={v}" for k, v in labels)
+        yield (
+            f"  {family}{{{where}}}  n={series['count']:.0f}  mean={unit(mean)}"
+            f"  p50<={'inf' if p50 == math.inf else unit(p50)}"
+            f"  p99<={'inf' if p99 == math.inf else unit(p99)}"
+        )
+    for name, labels, value in sorted(counters, key=lambda s: (s[0], -s[2]))[:top]:
+        where = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        yield f"  {name}{{{where}}}  {_number(value)}"
+
+
+METRICS = Metrics(enabled=os.environ.get("TASK_MANAGER_METRICS", "") in ("1", "true"))
+
+
+def instrument(cls: type) -> type:
+    """Time every public method of a service class into ``service_call_seconds``."""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not callable(value) or isinstance(value, type):
+            continue
+        if isinstance(value, (staticmethod, classmethod)):
+            continue
+        timed = METRICS.timed("service_call_seconds", method=f"{cls.__name__}.{attr}")
+        setattr(cls, attr, timed(value))
+    return cls
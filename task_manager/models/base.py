@@ -0,0 +1,22 @@
+"""Behaviour shared by the stored models."""
+
+from typing import Iterable, List, Type, TypeVar
+
+from task_manager.metrics import METRICS
+
+M = TypeVar("M", bound="StoredModel")
+
+
+class StoredModel:
+    """Mixin for models decoded from stored dicts by a ``from_dict`` classmethod."""
+
+    # Keeps the slots of the dataclasses using it.
+    __slots__ = ()
+
+    @classmethod
+    def from_dicts(cls: Type[M], records: Iterable[dict]) -> List[M]:
+        """Decode many stored records at once."""
+        with METRICS.timer("model_decode_seconds", model=cls.__name__):
+            models = list(map(cls.from_dict, records))  # type: ignore[attr-defined]
+        METRICS.inc("models_decoded_total", len(models), model=cls.__name__)
+        return models
@@ -4,9 +4,11 @@ import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from task_manager.models.base import StoredModel
 
-@dataclass
-class Department:
+
+@dataclass(slots=True)
+class Department(StoredModel):
     """Represents an organizational department that can create meetings and tasks."""
 
     name: str
@@ -24,9 +26,10 @@ class Department:
 
     @classmethod
     def from_dict(cls, data: dict) -> "Department":
+        created_at = data.get("created_at")
         return cls(
-            id=data["id"],
-            name=data["name"],
-            description=data.get("description", ""),
-            created_at=data.get("created_at", datetime.now().isoformat()),
+            data["name"],
+            data.get("description", ""),
+            data["id"],
+            created_at if created_at is not None else datetime.now().isoformat(),
         )
@@ -5,9 +5,11 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List
 
+from task_manager.models.base import StoredModel
 
-@dataclass
-class Meeting:
+
+@dataclass(slots=True)
+class Meeting(StoredModel):
     """Represents a meeting held by a department."""
 
     title: str
@@ -31,12 +33,14 @@ class Meeting:
 
     @classmethod
     def from_dict(cls, data: dict) -> "Meeting":
+        get = data.get
+        created_at = get("created_at")
         return cls(
-            id=data["id"],
-            title=data["title"],
-            department_id=data["department_id"],
-            date=data["date"],
-            attendees=data.get("attendees", []),
-            location=data.get("location", ""),
-            created_at=data.get("created_at", datetime.now().isoformat()),
+            data["title"],
+            data["department_id"],
+            data["date"],
+            get("attendees", []),
+            get("location", ""),
+            data["id"],
+            created_at if created_at is not None else datetime.now().isoformat(),
         )
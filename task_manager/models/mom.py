@@ -6,6 +6,8 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from task_manager.models.base import StoredModel
+
 
 class MOMStatus(str, Enum):
     """Status lifecycle for a Minutes of Meeting document."""
@@ -16,7 +18,11 @@ class MOMStatus(str, Enum):
     REJECTED = "rejected"
 
 
-@dataclass
+# Member lookup by value; much cheaper than calling the Enum per record.
+_STATUSES = {s.value: s for s in MOMStatus}
+
+
+@dataclass(slots=True)
 class AgendaItem:
     """A single agenda item discussed in a meeting."""
 
@@ -33,15 +39,12 @@ class AgendaItem:
 
     @classmethod
     def from_dict(cls, data: dict) -> "AgendaItem":
-        return cls(
-            title=data["title"],
-            discussion=data.get("discussion", ""),
-            decisions=data.get("decisions", ""),
-        )
+        get = data.get
+        return cls(data["title"], get("discussion", ""), get("decisions", ""))
 
 
-@dataclass
-class MinutesOfMeeting:
+@dataclass(slots=True)
+class MinutesOfMeeting(StoredModel):
     """Represents the minutes recorded for a specific meeting."""
 
     meeting_id: str
@@ -54,6 +57,8 @@ class MinutesOfMeeting:
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    # Storage revision; assigned by the store, so it isn't part of to_dict().
+    rev: int = 0
 
     def submit_for_review(self) -> None:
         """Move the MOM from draft to pending review."""
@@ -118,15 +123,25 @@ class MinutesOfMeeting:
 
     @classmethod
     def from_dict(cls, data: dict) -> "MinutesOfMeeting":
+        get = data.get
+        status = get("status", "draft")
+        created_at = get("created_at")
+        updated_at = get("updated_at")
+        if created_at is None or updated_at is None:
+            now = datetime.now().isoformat()
+            created_at = created_at or now
+            updated_at = updated_at or now
+        # Positional, in field order.
         return cls(
-            id=data["id"],
-            meeting_id=data["meeting_id"],
-            prepared_by=data["prepared_by"],
-            agenda_items=[AgendaItem.from_dict(a) for a in data.get("agenda_items", [])],
-            summary=data.get("summary", ""),
-            status=MOMStatus(data.get("status", "draft")),
-            validated_by=data.get("validated_by"),
-            rejection_reason=data.get("rejection_reason"),
-            created_at=data.get("created_at", datetime.now().isoformat()),
-            updated_at=data.get("updated_at", datetime.now().isoformat()),
+            data["meeting_id"],
+            data["prepared_by"],
+            list(map(AgendaItem.from_dict, get("agenda_items", ()))),
+            get("summary", ""),
+            _STATUSES.get(status) or MOMStatus(status),
+            get("validated_by"),
+            get("rejection_reason"),
+            data["id"],
+            created_at,
+            updated_at,
+            get("_rev", 0),
         )
@@ -2,10 +2,12 @@
 
 import uuid
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 
+from task_manager.models.base import StoredModel
+
 
 class TaskStatus(str, Enum):
     """Status lifecycle for a task."""
@@ -25,8 +27,32 @@ class TaskPriority(str, Enum):
     CRITICAL = "critical"
 
 
-@dataclass
-class Task:
+# Member lookups by value; much cheaper than calling the Enum per record.
+_STATUSES = {s.value: s for s in TaskStatus}
+_PRIORITIES = {p.value: p for p in TaskPriority}
+
+
+def normalize_due_date(value: Optional[str]) -> Optional[str]:
+    """Return ``value`` as a ``YYYY-MM-DD`` string, or None if it is empty.
+
+    Accepts ISO dates and datetimes (``2026-03-01T17:00``) and ``/`` as the
+    separator (``2026/3/1``). Stored due dates are always in this form, so
+    they sort and compare correctly as strings.
+    """
+    if value is None or value == "":
+        return None
+    text = str(value).strip().replace("/", "-")
+    try:
+        if len(text) > 10:
+            return datetime.fromisoformat(text).date().isoformat()
+        year, month, day = map(int, text.split("-"))
+        return date(year, month, day).isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid due date '{value}', expected YYYY-MM-DD") from None
+
+
+@dataclass(slots=True)
+class Task(StoredModel):
     """Represents an actionable task, optionally linked to a MOM."""
 
     title: str
@@ -40,6 +66,8 @@ class Task:
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    # Storage revision; assigned by the store, so it isn't part of to_dict().
+    rev: int = 0
 
     def start(self) -> None:
         """Mark the task as in progress."""
@@ -83,16 +111,29 @@ class Task:
 
     @classmethod
     def from_dict(cls, data: dict) -> "Task":
+        get = data.get
+        status = get("status", "open")
+        priority = get("priority", "medium")
+        created_at = get("created_at")
+        updated_at = get("updated_at")
+        if created_at is None or updated_at is None:
+            now = datetime.now().isoformat()
+            created_at = created_at or now
+            updated_at = updated_at or now
+        # Positional, in field order: title, department_id, assigned_to,
+        # description, mom_id, due_date, status, priority, id, created_at,
+        # updated_at, rev.
         return cls(
-            id=data["id"],
-            title=data["title"],
-            description=data.get("description", ""),
-            department_id=data["department_id"],
-            assigned_to=data["assigned_to"],
-            mom_id=data.get("mom_id"),
-            due_date=data.get("due_date"),
-            status=TaskStatus(data.get("status", "open")),
-            priority=TaskPriority(data.get("priority", "medium")),
-            created_at=data.get("created_at", datetime.now().isoformat()),
-            updated_at=data.get("updated_at", datetime.now().isoformat()),
+            data["title"],
+            data["department_id"],
+            data["assigned_to"],
+            get("description", ""),
+            get("mom_id"),
+            get("due_date"),
+            _STATUSES.get(status) or TaskStatus(status),
+            _PRIORITIES.get(priority) or TaskPriority(priority),
+            data["id"],
+            created_at,
+            updated_at,
+            get("_rev", 0),
         )
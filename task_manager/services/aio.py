@@ -0,0 +1,82 @@
+"""Coroutine variants of the services, for the async API handlers.
+
+Each method runs its synchronous counterpart on the :class:`AsyncStore`'s
+reader or writer threads, so the event loop never blocks on storage. The
+wrapped service stays available as ``.service`` (e.g. for its constants
+or its model cache).
+"""
+
+import functools
+from typing import Any, Callable
+
+from task_manager.services.department_service import DepartmentService
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.async_store import AsyncStore
+
+
+def _offload(method: Callable[..., Any], write: bool = False) -> Callable[..., Any]:
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def run(self: "_AsyncService", *args: Any, **kwargs: Any) -> Any:
+        offload = self.store.write if write else self.store.read
+        return await offload(getattr(self.service, name), *args, **kwargs)
+
+    return run
+
+
+class _AsyncService:
+    def __init__(self, service: Any, store: AsyncStore):
+        self.service = service
+        self.store = store
+
+
+class AsyncDepartmentService(_AsyncService):
+    service: DepartmentService
+
+    create_department = _offload(DepartmentService.create_department, write=True)
+    get_department = _offload(DepartmentService.get_department)
+    list_departments = _offload(DepartmentService.list_departments)
+    list_departments_page = _offload(DepartmentService.list_departments_page)
+    delete_department = _offload(DepartmentService.delete_department, write=True)
+
+
+class AsyncMOMService(_AsyncService):
+    service: MOMService
+
+    create_meeting = _offload(MOMService.create_meeting, write=True)
+    get_meeting = _offload(MOMService.get_meeting)
+    list_meetings = _offload(MOMService.list_meetings)
+    list_meetings_page = _offload(MOMService.list_meetings_page)
+    create_mom = _offload(MOMService.create_mom, write=True)
+    get_mom = _offload(MOMService.get_mom)
+    get_mom_by_meeting = _offload(MOMService.get_mom_by_meeting)
+    list_moms = _offload(MOMService.list_moms)
+    list_moms_page = _offload(MOMService.list_moms_page)
+    add_agenda_item = _offload(MOMService.add_agenda_item, write=True)
+    submit_for_review = _offload(MOMService.submit_for_review, write=True)
+    validate_mom = _offload(MOMService.validate_mom, write=True)
+    reject_mom = _offload(MOMService.reject_mom, write=True)
+    revise_mom = _offload(MOMService.revise_mom, write=True)
+    update_summary = _offload(MOMService.update_summary, write=True)
+
+
+class AsyncTaskService(_AsyncService):
+    service: TaskService
+
+    create_task = _offload(TaskService.create_task, write=True)
+    create_tasks = _offload(TaskService.create_tasks, write=True)
+    get_task = _offload(TaskService.get_task)
+    list_tasks = _offload(TaskService.list_tasks)
+    list_tasks_page = _offload(TaskService.list_tasks_page)
+    overdue_tasks = _offload(TaskService.overdue_tasks)
+    due_between = _offload(TaskService.due_between)
+    upcoming_tasks = _offload(TaskService.upcoming_tasks)
+    get_tasks_for_mom = _offload(TaskService.get_tasks_for_mom)
+    start_task = _offload(TaskService.start_task, write=True)
+    complete_task = _offload(TaskService.complete_task, write=True)
+    cancel_task = _offload(TaskService.cancel_task, write=True)
+    bulk_transition = _offload(TaskService.bulk_transition, write=True)
+    update_task = _offload(TaskService.update_task, write=True)
+    delete_task = _offload(TaskService.delete_task, write=True)
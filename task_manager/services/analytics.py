@@ -0,0 +1,224 @@
+"""Columnar in-memory view of the tasks collection for analytics queries.
+
+Needs numpy, which is optional: check :data:`HAVE_NUMPY` before creating a
+:class:`TaskAnalytics`.
+"""
+
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from task_manager.services.events import ChangeEvent
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+
+HAVE_NUMPY = np is not None
+
+CATEGORICAL_FIELDS = ("status", "priority", "department_id", "assigned_to")
+ACTIVE_STATUSES = ("open", "in_progress")
+
+
+class _Dictionary:
+    """Maps the distinct values of a categorical column to dense int codes."""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+
+    def encode(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _parse_date(value: Optional[str]) -> "np.datetime64":
+    if not value:
+        return np.datetime64("NaT", "D")
+    try:
+        return np.datetime64(value[:10], "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+class TaskAnalytics:
+    """Array-backed task table answering filtered group-by counts.
+
+    Each categorical field is stored as an int32 code array plus a value
+    dictionary, and ``due_date`` as a ``datetime64[D]`` array, so filters are
+    vectorized comparisons and group-by counts are a single ``np.unique`` over
+    combined codes. The table is loaded from the store once and then kept up
+    to date by subscribing :meth:`apply` to the services' event bus; deleted
+    rows are masked out and compacted away once they make up half the table.
+    Writes made by other processes are only picked up by :meth:`rebuild`.
+    """
+
+    COLLECTION = TaskService.TASKS_COLLECTION
+
+    def __init__(self, store: JsonStore):
+        if np is None:
+            raise ImportError("TaskAnalytics requires numpy")
+        self.store = store
+        self._lock = threading.Lock()
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Reload the whole table from the store."""
+        records = list(self.store.iterate(self.COLLECTION))
+        with self._lock:
+            self._dictionaries = {f: _Dictionary() for f in CATEGORICAL_FIELDS}
+            self._ids: List[Optional[str]] = [r["id"] for r in records]
+            self._rows = {id: row for row, id in enumerate(self._ids)}
+            self._size = len(records)
+            self._dead = 0
+            capacity = max(1024, self._size)
+            self._codes = {}
+            for field, dictionary in self._dictionaries.items():
+                column = np.zeros(capacity, dtype=np.int32)
+                column[:self._size] = [dictionary.encode(r.get(field)) for r in records]
+                self._codes[field] = column
+            self._due = np.full(capacity, np.datetime64("NaT", "D"))
+            self._due[:self._size] = [_parse_date(r.get("due_date")) for r in records]
+            self._live = np.zeros(capacity, dtype=bool)
+            self._live[:self._size] = True
+
+    def __len__(self) -> int:
+        return self._size - self._dead
+
+    def apply(self, events: List[ChangeEvent]) -> None:
+        """Fold task change events into the table."""
+        with self._lock:
+            for event in events:
+                if event.collection != self.COLLECTION:
+                    continue
+                if event.action == "delete":
+                    row = self._rows.pop(event.id, None)
+                    if row is not None:
+                        self._live[row] = False
+                        self._ids[row] = None
+                        self._dead += 1
+                    continue
+                row = self._rows.get(event.id)
+                if row is None:
+                    row = self._append(event.id)
+                self._set(row, event.after)
+            if self._dead > 1024 and self._dead * 2 > self._size:
+                self._compact()
+
+    def _append(self, id: str) -> int:
+        if self._size == len(self._live):
+            capacity = 2 * len(self._live)
+            for field, column in self._codes.items():
+                self._codes[field] = np.resize(column, capacity)
+            self._due = np.resize(self._due, capacity)
+            self._live = np.resize(self._live, capacity)
+        row = self._size
+        self._size += 1
+        self._ids.append(id)
+        self._rows[id] = row
+        self._live[row] = True
+        return row
+
+    def _set(self, row: int, record: dict) -> None:
+        for field, dictionary in self._dictionaries.items():
+            self._codes[field][row] = dictionary.encode(record.get(field))
+        self._due[row] = _parse_date(record.get("due_date"))
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._live[:self._size])
+        capacity = max(1024, 2 * len(keep))
+        for field, column in self._codes.items():
+            compacted = np.zeros(capacity, dtype=np.int32)
+            compacted[:len(keep)] = column[keep]
+            self._codes[field] = compacted
+        due = np.full(capacity, np.datetime64("NaT", "D"))
+        due[:len(keep)] = self._due[keep]
+        self._due = due
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[:len(keep)] = True
+        self._ids = [self._ids[row] for row in keep]
+        self._rows = {id: row for row, id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._dead = 0
+
+    def count(
+        self,
+        group_by: Sequence[str] = (),
+        filters: Optional[Dict[str, Any]] = None,
+        overdue: bool = False,
+        due_before: Optional[date] = None,
+        due_after: Optional[date] = None,
+        as_of: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """Count matching tasks, optionally grouped by categorical fields.
+
+        ``filters`` maps a categorical field to a value or a list of values.
+        ``overdue`` keeps open or in-progress tasks due before ``as_of``
+        (today by default); ``due_before``/``due_after`` are inclusive bounds.
+        Returns ``{"total": n, "groups": [{field: value, ..., "count": n}]}``
+        with groups ordered by descending count.
+        """
+        filters = filters or {}
+        for field in list(group_by) + list(filters):
+            if field not in CATEGORICAL_FIELDS:
+                raise ValueError(
+                    f"Cannot filter or group tasks by '{field}', "
+                    f"expected one of {list(CATEGORICAL_FIELDS)}"
+                )
+        with self._lock:
+            n = self._size
+            mask = self._live[:n].copy()
+            for field, value in filters.items():
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                mask &= self._match(field, values, n)
+            if overdue:
+                today = np.datetime64(as_of or date.today(), "D")
+                mask &= self._due[:n] < today
+                mask &= self._match("status", ACTIVE_STATUSES, n)
+            if due_before is not None:
+                mask &= self._due[:n] <= np.datetime64(due_before, "D")
+            if due_after is not None:
+                mask &= self._due[:n] >= np.datetime64(due_after, "D")
+            total = int(np.count_nonzero(mask))
+            groups = self._group(group_by, mask, n) if group_by else []
+        return {"total": total, "groups": groups}
+
+    def _match(self, field: str, values: Iterable[Any], n: int) -> "np.ndarray":
+        dictionary = self._dictionaries[field]
+        codes = [dictionary.codes[v] for v in values if v in dictionary.codes]
+        column = self._codes[field][:n]
+        if len(codes) == 1:
+            return column == codes[0]
+        # Lookup table indexed by code: one gather instead of a sort-based isin.
+        wanted = np.zeros(len(dictionary.values), dtype=bool)
+        wanted[codes] = True
+        return wanted[column]
+
+    def _group(self, group_by: Sequence[str], mask: "np.ndarray", n: int) -> List[Dict[str, Any]]:
+        sizes = [len(self._dictionaries[f].values) for f in group_by]
+        keys = np.zeros(int(np.count_nonzero(mask)), dtype=np.int64)
+        for field, size in zip(group_by, sizes):
+            keys = keys * size + self._codes[field][:n][mask]
+        space = int(np.prod(sizes))
+        if space <= max(len(keys), 1 << 16):
+            # Dense key space: counting into a bincount beats sorting.
+            counts = np.bincount(keys, minlength=space)
+            unique = np.flatnonzero(counts)
+            counts = counts[unique]
+        else:
+            unique, counts = np.unique(keys, return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        groups = []
+        for key, count in zip(unique[order].tolist(), counts[order].tolist()):
+            group: Dict[str, Any] = {}
+            for field, size in zip(reversed(group_by), reversed(sizes)):
+                key, code = divmod(key, size)
+                group[field] = self._dictionaries[field].values[code]
+            groups.append({**{f: group[f] for f in group_by}, "count": count})
+        return groups
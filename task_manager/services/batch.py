@@ -0,0 +1,22 @@
+"""Result type shared by the services' batch operations."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch: the items that went through and per-item errors.
+
+    Each error is a dict holding the failing item's ``index`` (for creations)
+    or ``id`` (for operations on existing records) and an ``error`` message.
+    """
+
+    succeeded: List[Any] = field(default_factory=list)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "succeeded": [item.to_dict() for item in self.succeeded],
+            "errors": self.errors,
+        }
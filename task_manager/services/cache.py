@@ -0,0 +1,131 @@
+"""Bounded cache of decoded model objects, validated against the store."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from task_manager.services.events import ChangeEvent
+from task_manager.storage.json_store import JsonStore
+from task_manager.storage.versions import revision
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Entry:
+    model: Any
+    rev: int
+    version: str
+    expires: float
+
+
+class ModelCache:
+    """LRU cache of models decoded from stored records, keyed by (collection, id).
+
+    An entry is served only while it is provably current. If the collection
+    version is the one the entry was cached at, nothing has changed. If the
+    collection has changed since, the record's revision is checked: the
+    entry is served when the record is still at the cached revision and
+    dropped otherwise. Writes made by other processes are caught the same
+    way. Subscribe :meth:`apply` to the services' :class:`EventBus` so their
+    own writes evict entries right away. ``ttl`` (seconds) additionally
+    bounds how long an entry lives.
+
+    Cached models are shared between callers, so treat them as read-only.
+    The services' write paths decode their own copy.
+    """
+
+    def __init__(
+        self,
+        store: JsonStore,
+        maxsize: int = 4096,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.store = store
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._revalidations = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, collection: str, id: str, decode: Callable[[dict], T]) -> Optional[T]:
+        """Return the model for a record, decoding it with ``decode`` on a miss."""
+        key = (collection, id)
+        now = self._clock()
+        # Read before the record, so an entry is never tagged newer than its data.
+        version = self.store.version(collection).tag
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry.expires:
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            elif entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry.model
+        if entry is not None and self.store.revision(collection, id) == entry.rev:
+            with self._lock:
+                entry.version = version
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self._hits += 1
+                self._revalidations += 1
+            return entry.model
+
+        record = self.store.get(collection, id)
+        with self._lock:
+            self._misses += 1
+        if record is None:
+            self.discard(collection, id)
+            return None
+        model = decode(record)
+        expires = now + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = _Entry(model, revision(record), version, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return model
+
+    def discard(self, collection: str, id: str) -> None:
+        with self._lock:
+            if self._entries.pop((collection, id), None) is not None:
+                self._invalidations += 1
+
+    def apply(self, events: List[ChangeEvent]) -> None:
+        """Drop the entries for records written through the services."""
+        for event in events:
+            self.discard(event.collection, event.id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters since creation, plus the current size and hit ratio."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "revalidations": self._revalidations,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,152 @@
+"""Sequenced, bounded buffer of recent change events for polling clients."""
+
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterable, List, Optional, Set, Tuple
+
+from task_manager.services.events import ChangeEvent
+
+
+@dataclass
+class Change:
+    """A :class:`ChangeEvent` as recorded by the feed, with its sequence number."""
+
+    seq: int
+    at: float
+    event: ChangeEvent
+
+    def to_dict(self) -> dict:
+        event = self.event
+        return {
+            "seq": self.seq,
+            "at": self.at,
+            "collection": event.collection,
+            "action": event.action,
+            "id": event.id,
+            "record": event.after,
+        }
+
+
+@dataclass
+class ChangeBatch:
+    """The changes after some sequence number.
+
+    ``reset`` is set when changes the client asked for have already been
+    dropped from the buffer or the feed has restarted (a different
+    ``epoch``): the client should reload everything and continue from
+    ``last_seq``.
+    """
+
+    epoch: str
+    changes: List[Change]
+    last_seq: int
+    reset: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "changes": [c.to_dict() for c in self.changes],
+            "last_seq": self.last_seq,
+            "reset": self.reset,
+        }
+
+
+class ChangeFeed:
+    """Ring buffer of the last ``capacity`` changes, numbered from 1.
+
+    Subscribe :meth:`apply` to the services' :class:`EventBus`. Clients poll
+    :meth:`since` with the last sequence number they saw, or await
+    :meth:`wait` to be woken as soon as something newer arrives. The feed
+    lives in memory, so it only sees writes made by its own process, and
+    ``epoch`` changes on restart so clients can tell their sequence numbers
+    no longer apply.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.epoch = uuid.uuid4().hex[:12]
+        self._changes: Deque[Change] = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def apply(self, events: List[ChangeEvent]) -> None:
+        """Record a batch of events and wake any waiting clients."""
+        if not events:
+            return
+        now = time.time()
+        with self._lock:
+            for event in events:
+                change = Change(next(self._seq), now, event)
+                self._changes.append(change)
+            self._last_seq = change.seq
+            waiters, self._waiters = self._waiters, set()
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass  # The waiter's loop has shut down.
+
+    def since(
+        self,
+        seq: int,
+        epoch: Optional[str] = None,
+        collections: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> ChangeBatch:
+        """Return the changes numbered above ``seq``, oldest first.
+
+        ``epoch`` is the one the client got ``seq`` from, if any.
+        ``collections`` keeps only changes to those collections; ``limit``
+        caps how many are returned, in which case ``last_seq`` is that of the
+        last one returned so the next call picks up from there.
+        """
+        wanted = set(collections) if collections else None
+        with self._lock:
+            last_seq = self._last_seq
+            oldest = self._changes[0].seq if self._changes else last_seq + 1
+            if epoch not in (None, self.epoch):
+                return ChangeBatch(self.epoch, [], last_seq, reset=True)
+            if seq > last_seq or seq < oldest - 1:
+                # From the future (a restarted feed) or already evicted.
+                return ChangeBatch(self.epoch, [], last_seq, reset=True)
+            # Sequence numbers are contiguous, so the position is arithmetic.
+            pending = list(itertools.islice(self._changes, seq - oldest + 1, None))
+        if wanted is not None:
+            pending = [c for c in pending if c.event.collection in wanted]
+        if limit is not None and len(pending) > limit:
+            pending = pending[:limit]
+            last_seq = pending[-1].seq
+        return ChangeBatch(self.epoch, pending, last_seq)
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a change numbered above ``seq``.
+
+        Returns whether one arrived. Safe to call from any event loop; the
+        writers publishing changes may run in other threads.
+        """
+        ready = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), ready)
+        with self._lock:
+            if self._last_seq != seq:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
@@ -0,0 +1,102 @@
+"""Incrementally maintained record counts for the dashboard."""
+
+import functools
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from task_manager.services.department_service import DepartmentService
+from task_manager.services.events import ChangeEvent
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+from task_manager.storage.versions import REV_FIELD
+
+
+class Counters:
+    """Totals and by-status histograms kept up to date from change events.
+
+    Subscribe :meth:`apply` to the services' :class:`EventBus`. Counts are
+    persisted as one record per counted collection in the ``counters``
+    collection, so reading them is O(1) however much data there is. They are
+    updated with :meth:`JsonStore.update_with`, so processes sharing the
+    store never lose each other's increments. They are rebuilt from a full
+    scan when missing, and :meth:`rebuild` can be run at any time to repair
+    drift, e.g. after data was edited outside the services.
+    """
+
+    COLLECTION = "counters"
+    COUNTED = (
+        DepartmentService.COLLECTION,
+        MOMService.MEETINGS_COLLECTION,
+        MOMService.MOM_COLLECTION,
+        TaskService.TASKS_COLLECTION,
+    )
+    BY_STATUS = (MOMService.MOM_COLLECTION, TaskService.TASKS_COLLECTION)
+
+    def __init__(self, store: JsonStore):
+        self.store = store
+        self._lock = threading.Lock()
+        if any(store.get(self.COLLECTION, c) is None for c in self.COUNTED):
+            self.rebuild()
+
+    def get(self, collection: str) -> Dict:
+        """Return ``{"total": n}``, plus ``"by_status"`` for status collections."""
+        counts = self.store.get(self.COLLECTION, collection)
+        if counts is None:
+            return self._empty(collection)
+        return {k: v for k, v in counts.items() if k != REV_FIELD}
+
+    def apply(self, events: List[ChangeEvent]) -> None:
+        """Fold a batch of change events into the persisted counts."""
+        deltas: Dict[str, List[Tuple[dict, int]]] = {}
+        for event in events:
+            if event.collection not in self.COUNTED:
+                continue
+            pending = deltas.setdefault(event.collection, [])
+            if event.before is not None:
+                pending.append((event.before, -1))
+            if event.after is not None:
+                pending.append((event.after, 1))
+        if deltas:
+            with self._lock:
+                self.store.update_with(self.COLLECTION, {
+                    collection: functools.partial(self._fold, collection, pending)
+                    for collection, pending in deltas.items()
+                })
+
+    def _fold(
+        self, collection: str, deltas: List[Tuple[dict, int]], counts: Optional[Dict]
+    ) -> Dict:
+        """The stored ``counts`` with ``deltas`` applied, for :meth:`JsonStore.update_with`."""
+        counts = self._empty(collection) if counts is None else counts
+        counts.pop(REV_FIELD, None)
+        for record, delta in deltas:
+            self._count(counts, collection, record, delta)
+        return counts
+
+    def rebuild(self) -> Dict[str, Dict]:
+        """Recount every collection from scratch and persist the result."""
+        with self._lock:
+            rebuilt = {}
+            for collection in self.COUNTED:
+                counts = self._empty(collection)
+                for record in self.store.iterate(collection):
+                    self._count(counts, collection, record, 1)
+                # The store stamps a revision on the dict it's given; keep ours clean.
+                self.store.update_with(self.COLLECTION, {collection: lambda _, c=counts: dict(c)})
+                rebuilt[collection] = counts
+            return rebuilt
+
+    def _empty(self, collection: str) -> Dict:
+        if collection in self.BY_STATUS:
+            return {"total": 0, "by_status": {}}
+        return {"total": 0}
+
+    def _count(self, counts: Dict, collection: str, record: dict, delta: int) -> None:
+        counts["total"] += delta
+        if collection in self.BY_STATUS:
+            by_status = counts["by_status"]
+            status = record.get("status")
+            by_status[status] = by_status.get(status, 0) + delta
+            if by_status[status] <= 0:
+                del by_status[status]
@@ -2,22 +2,30 @@
 
 from typing import List, Optional
 
+from task_manager.metrics import instrument
 from task_manager.models.department import Department
+from task_manager.services.events import ChangeEvent, EventBus
 from task_manager.storage.json_store import JsonStore
+from task_manager.storage.pagination import Page, parse_sort
 
 
+@instrument
 class DepartmentService:
     """Handles creation and retrieval of departments."""
 
     COLLECTION = "departments"
+    SORT_FIELDS = {"created_at": None, "name": None}
 
-    def __init__(self, store: JsonStore):
+    def __init__(self, store: JsonStore, events: Optional[EventBus] = None):
         self.store = store
+        self.events = events or EventBus()
 
     def create_department(self, name: str, description: str = "") -> Department:
         """Create and persist a new department."""
         dept = Department(name=name, description=description)
-        self.store.insert(self.COLLECTION, dept.id, dept.to_dict())
+        data = dept.to_dict()
+        self.store.insert(self.COLLECTION, dept.id, data)
+        self.events.publish([ChangeEvent(self.COLLECTION, "insert", dept.id, after=data)])
         return dept
 
     def get_department(self, department_id: str) -> Optional[Department]:
@@ -26,7 +34,23 @@ class DepartmentService:
 
     def list_departments(self) -> List[Department]:
         records = self.store.get_all(self.COLLECTION)
-        return [Department.from_dict(r) for r in records]
+        return Department.from_dicts(records)
+
+    def list_departments_page(
+        self,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+    ) -> Page[Department]:
+        """List one page of departments, sorted by a :attr:`SORT_FIELDS` field."""
+        page = self.store.page(
+            self.COLLECTION, limit, cursor=cursor, sort=parse_sort(sort, self.SORT_FIELDS)
+        )
+        return page.map(Department.from_dict)
 
     def delete_department(self, department_id: str) -> bool:
-        return self.store.delete(self.COLLECTION, department_id)
+        before = self.store.get(self.COLLECTION, department_id)
+        if before is None or not self.store.delete(self.COLLECTION, department_id):
+            return False
+        self.events.publish([ChangeEvent(self.COLLECTION, "delete", department_id, before=before)])
+        return True
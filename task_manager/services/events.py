@@ -0,0 +1,46 @@
+"""In-process change notifications published by the services."""
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+
+@dataclass
+class ChangeEvent:
+    """A record written through a service.
+
+    ``action`` is ``"insert"``, ``"update"`` or ``"delete"``; ``before`` and
+    ``after`` are the stored records on either side of the change (``None``
+    for an insert's ``before`` and a delete's ``after``).
+    """
+
+    collection: str
+    action: str
+    id: str
+    before: Optional[dict] = None
+    after: Optional[dict] = None
+
+
+Handler = Callable[[List[ChangeEvent]], None]
+
+
+class EventBus:
+    """Synchronous fan-out of change events to subscribed handlers.
+
+    Events are published after the store write succeeds, as one list per
+    service call, so batch operations reach handlers as a single batch.
+    """
+
+    def __init__(self):
+        self._handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    def unsubscribe(self, handler: Handler) -> None:
+        self._handlers.remove(handler)
+
+    def publish(self, events: List[ChangeEvent]) -> None:
+        if not events:
+            return
+        for handler in list(self._handlers):
+            handler(events)
@@ -0,0 +1,161 @@
+"""Batched resolution of the records related to MOMs and tasks.
+
+Detail and list views often need each MOM's meeting, department and linked
+tasks, or each task's MOM and department. :func:`expand_moms` and
+:func:`expand_tasks` resolve them for a whole list at once: the ids are
+collected into sets and each related collection is read once, through
+:meth:`get_many` or an indexed ``in`` query, instead of once per row.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from task_manager.services.department_service import DepartmentService
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+from task_manager.storage.query import in_
+from task_manager.storage.versions import REV_FIELD
+
+MOM_EXPANSIONS = ("meeting", "department", "tasks")
+TASK_EXPANSIONS = ("mom", "meeting", "department")
+
+# The collections each expansion reads, for cache validation.
+_SOURCES = {
+    "mom": {
+        "meeting": (MOMService.MEETINGS_COLLECTION,),
+        "department": (MOMService.MEETINGS_COLLECTION, DepartmentService.COLLECTION),
+        "tasks": (TaskService.TASKS_COLLECTION,),
+    },
+    "task": {
+        "mom": (MOMService.MOM_COLLECTION,),
+        "meeting": (MOMService.MOM_COLLECTION, MOMService.MEETINGS_COLLECTION),
+        "department": (DepartmentService.COLLECTION,),
+    },
+}
+
+# The fields of a MOM or task that each expansion looks up.
+_KEYS = {
+    "mom": {"meeting": "meeting_id", "department": "meeting_id", "tasks": "id"},
+    "task": {"mom": "mom_id", "meeting": "mom_id", "department": "department_id"},
+}
+
+
+def parse_expand(values: Iterable[str], allowed: Sequence[str]) -> List[str]:
+    """Parse ``expand`` values such as ``["meeting,tasks", "department"]``."""
+    fields: List[str] = []
+    for value in values:
+        for field in value.split(","):
+            field = field.strip()
+            if field and field not in fields:
+                fields.append(field)
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Cannot expand {unknown}, expected any of {list(allowed)}")
+    return fields
+
+
+def expanded_collections(kind: str, fields: Iterable[str]) -> List[str]:
+    """The collections read to expand ``fields`` of a ``"mom"`` or ``"task"``."""
+    collections: List[str] = []
+    for field in fields:
+        for collection in _SOURCES[kind][field]:
+            if collection not in collections:
+                collections.append(collection)
+    return collections
+
+
+def with_expand_keys(
+    kind: str, fields: Optional[List[str]], expand: Iterable[str]
+) -> Optional[List[str]]:
+    """Add to a field selection the fields that expanding ``expand`` reads."""
+    if fields is None:
+        return None
+    keys = [_KEYS[kind][e] for e in expand]
+    return fields + [k for k in dict.fromkeys(keys) if k not in fields]
+
+
+def _public(record: Optional[dict]) -> Optional[dict]:
+    """A stored record as the API shows it: without its revision field."""
+    if record is None:
+        return None
+    return {k: v for k, v in record.items() if k != REV_FIELD}
+
+
+def _get_many(store: JsonStore, collection: str, ids: Iterable[Optional[str]]) -> Dict[str, dict]:
+    ids = {id for id in ids if id}
+    return store.get_many(collection, ids) if ids else {}
+
+
+def _tasks_by_mom(store: JsonStore, mom_ids: List[str]) -> Dict[str, List[dict]]:
+    tasks: Dict[str, List[dict]] = {}
+    # Chunked, so SQLite gets a bounded number of parameters per statement.
+    for start in range(0, len(mom_ids), 500):
+        where = [in_("mom_id", mom_ids[start:start + 500])]
+        for record in store.query(TaskService.TASKS_COLLECTION, where):
+            tasks.setdefault(record["mom_id"], []).append(_public(record))
+    return tasks
+
+
+def expand_moms(store: JsonStore, moms: List[dict], fields: Iterable[str]) -> List[dict]:
+    """Add the requested related records to serialized MOMs, in place.
+
+    ``meeting`` and ``department`` (the meeting's) become a record or None,
+    ``tasks`` the list of tasks linked to the MOM. Returns ``moms``.
+    """
+    fields = set(fields)
+    if not fields or not moms:
+        return moms
+    meetings: Dict[str, dict] = {}
+    if fields & {"meeting", "department"}:
+        meetings = _get_many(store, MOMService.MEETINGS_COLLECTION, (m["meeting_id"] for m in moms))
+    departments: Dict[str, dict] = {}
+    if "department" in fields:
+        departments = _get_many(
+            store, DepartmentService.COLLECTION, (m.get("department_id") for m in meetings.values())
+        )
+    tasks: Dict[str, List[dict]] = {}
+    if "tasks" in fields:
+        tasks = _tasks_by_mom(store, list(dict.fromkeys(m["id"] for m in moms)))
+    for mom in moms:
+        meeting = meetings.get(mom["meeting_id"])
+        if "meeting" in fields:
+            mom["meeting"] = _public(meeting)
+        if "department" in fields:
+            department = departments.get(meeting.get("department_id")) if meeting else None
+            mom["department"] = _public(department)
+        if "tasks" in fields:
+            mom["tasks"] = tasks.get(mom["id"], [])
+    return moms
+
+
+def expand_tasks(store: JsonStore, tasks: List[dict], fields: Iterable[str]) -> List[dict]:
+    """Add the requested related records to serialized tasks, in place.
+
+    ``mom``, ``meeting`` (the MOM's) and ``department`` become a record or
+    None. Returns ``tasks``.
+    """
+    fields = set(fields)
+    if not fields or not tasks:
+        return tasks
+    moms: Dict[str, dict] = {}
+    if fields & {"mom", "meeting"}:
+        moms = _get_many(store, MOMService.MOM_COLLECTION, (t.get("mom_id") for t in tasks))
+    meetings: Dict[str, dict] = {}
+    if "meeting" in fields:
+        meetings = _get_many(
+            store, MOMService.MEETINGS_COLLECTION, (m["meeting_id"] for m in moms.values())
+        )
+    departments: Dict[str, dict] = {}
+    if "department" in fields:
+        departments = _get_many(
+            store, DepartmentService.COLLECTION, (t["department_id"] for t in tasks)
+        )
+    for task in tasks:
+        mom = moms.get(task.get("mom_id"))
+        if "mom" in fields:
+            task["mom"] = _public(mom)
+        if "meeting" in fields:
+            task["meeting"] = _public(meetings.get(mom["meeting_id"])) if mom else None
+        if "department" in fields:
+            task["department"] = _public(departments.get(task["department_id"]))
+    return tasks
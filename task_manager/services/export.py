@@ -0,0 +1,48 @@
+"""Streaming NDJSON export of stored collections."""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+from task_manager.services.department_service import DepartmentService
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+from task_manager.storage.versions import REV_FIELD
+
+# Export name -> (store collection, fields it may be filtered on).
+EXPORTS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "tasks": (TaskService.TASKS_COLLECTION, ("department_id", "assigned_to", "status", "mom_id")),
+    "moms": (MOMService.MOM_COLLECTION, ("meeting_id", "status")),
+    "meetings": (MOMService.MEETINGS_COLLECTION, ("department_id",)),
+    "departments": (DepartmentService.COLLECTION, ()),
+}
+
+
+def export_ndjson(
+    store: JsonStore,
+    name: str,
+    filters: Optional[Dict[str, str]] = None,
+    chunk_size: int = 500,
+) -> Iterator[str]:
+    """Yield a collection as NDJSON text, ``chunk_size`` records per chunk.
+
+    Records are streamed from the store as stored, minus their revision
+    field, without being decoded into models, so memory stays flat however
+    large the collection is.
+    """
+    if name not in EXPORTS:
+        raise ValueError(f"Unknown export '{name}', expected one of {sorted(EXPORTS)}")
+    collection, allowed = EXPORTS[name]
+    filters = filters or {}
+    unknown = sorted(set(filters) - set(allowed))
+    if unknown:
+        raise ValueError(f"Cannot filter '{name}' by {unknown}, expected any of {list(allowed)}")
+
+    encode = store.codec.encode
+    lines = []
+    for record in store.iterate(collection, filters):
+        lines.append(encode({k: v for k, v in record.items() if k != REV_FIELD}))
+        if len(lines) >= chunk_size:
+            yield (b"\n".join(lines) + b"\n").decode()
+            lines = []
+    if lines:
+        yield (b"\n".join(lines) + b"\n").decode()
@@ -0,0 +1,39 @@
+"""Sparse fieldsets for list views.
+
+List views return whole records by default. ``fields`` names the ones to
+return instead, and a *view* is a predefined set of them, such as a MOM
+``summary`` without its agenda items. The stores extract just those fields
+(see ``fields`` on :meth:`JsonStore.page`), so the heavy ones are neither
+built into models nor serialized.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+def select_fields(
+    values: Iterable[str],
+    view: Optional[str],
+    allowed: Sequence[str],
+    views: Dict[str, Sequence[str]],
+) -> Optional[List[str]]:
+    """Resolve ``fields`` values such as ``["id,title", "status"]`` and a view name.
+
+    Returns None, meaning whole records, when neither is given. A view and
+    fields combine. ``id`` always comes first.
+    """
+    fields: List[str] = []
+    for value in values:
+        for field in value.split(","):
+            field = field.strip()
+            if field and field not in fields:
+                fields.append(field)
+    if view is not None:
+        if view not in views:
+            raise ValueError(f"Unknown view '{view}', expected one of {sorted(views)}")
+        fields = [f for f in views[view] if f not in fields] + fields
+    elif not fields:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s) {unknown}, expected any of {list(allowed)}")
+    return ["id"] + [f for f in fields if f != "id"]
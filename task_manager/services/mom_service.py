@@ -1,20 +1,52 @@
 """Service layer for managing Minutes of Meeting (MOM) operations."""
 
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
 
+from task_manager.metrics import instrument
 from task_manager.models.meeting import Meeting
 from task_manager.models.mom import AgendaItem, MinutesOfMeeting, MOMStatus
+from task_manager.services.cache import ModelCache
+from task_manager.services.events import ChangeEvent, EventBus
+from task_manager.services.fields import select_fields
 from task_manager.storage.json_store import JsonStore
+from task_manager.storage.pagination import Page, parse_sort
+from task_manager.storage.versions import REV_FIELD, check_revision, revision
 
 
+@instrument
 class MOMService:
     """Handles creation, tracking, and validation of meeting minutes."""
 
     MEETINGS_COLLECTION = "meetings"
     MOM_COLLECTION = "mom"
+    MEETING_INDEXED_FIELDS = ("department_id",)
+    MOM_INDEXED_FIELDS = ("meeting_id", "status")
+    MEETING_SORT_FIELDS = {"created_at": None, "date": None}
+    MOM_SORT_FIELDS = {"created_at": None, "updated_at": None}
+    MOM_FIELDS = (
+        "id", "meeting_id", "prepared_by", "agenda_items", "summary", "status",
+        "validated_by", "rejection_reason", "created_at", "updated_at",
+    )
+    # Predefined field selections for list views; ``summary`` leaves out the
+    # agenda items, usually most of a MOM.
+    MOM_VIEWS = {"summary": tuple(f for f in MOM_FIELDS if f != "agenda_items")}
 
-    def __init__(self, store: JsonStore):
+    def __init__(
+        self,
+        store: JsonStore,
+        events: Optional[EventBus] = None,
+        cache: Optional[ModelCache] = None,
+    ):
         self.store = store
+        self.events = events or EventBus()
+        if cache is None:
+            cache = ModelCache(store)
+            self.events.subscribe(cache.apply)
+        self.cache = cache
+        for field in self.MEETING_INDEXED_FIELDS:
+            store.ensure_index(self.MEETINGS_COLLECTION, field)
+        for field in self.MOM_INDEXED_FIELDS:
+            store.ensure_index(self.MOM_COLLECTION, field)
 
     # -- Meeting operations --
 
@@ -34,19 +66,40 @@ class MOMService:
             attendees=attendees or [],
             location=location,
         )
-        self.store.insert(self.MEETINGS_COLLECTION, meeting.id, meeting.to_dict())
+        data = meeting.to_dict()
+        self.store.insert(self.MEETINGS_COLLECTION, meeting.id, data)
+        self.events.publish([
+            ChangeEvent(self.MEETINGS_COLLECTION, "insert", meeting.id, after=data)
+        ])
         return meeting
 
     def get_meeting(self, meeting_id: str) -> Optional[Meeting]:
-        data = self.store.get(self.MEETINGS_COLLECTION, meeting_id)
-        return Meeting.from_dict(data) if data else None
+        """Return a meeting, from the model cache when current. Don't modify it."""
+        return self.cache.get(self.MEETINGS_COLLECTION, meeting_id, Meeting.from_dict)
 
     def list_meetings(self, department_id: Optional[str] = None) -> List[Meeting]:
         if department_id:
             records = self.store.find(self.MEETINGS_COLLECTION, department_id=department_id)
         else:
             records = self.store.get_all(self.MEETINGS_COLLECTION)
-        return [Meeting.from_dict(r) for r in records]
+        return Meeting.from_dicts(records)
+
+    def list_meetings_page(
+        self,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        department_id: Optional[str] = None,
+    ) -> Page[Meeting]:
+        """List one page of meetings, sorted by a :attr:`MEETING_SORT_FIELDS` field."""
+        page = self.store.page(
+            self.MEETINGS_COLLECTION,
+            limit,
+            cursor=cursor,
+            sort=parse_sort(sort, self.MEETING_SORT_FIELDS),
+            filters={"department_id": department_id} if department_id else None,
+        )
+        return page.map(Meeting.from_dict)
 
     # -- MOM operations --
 
@@ -65,12 +118,39 @@ class MOMService:
             prepared_by=prepared_by,
             summary=summary,
         )
-        self.store.insert(self.MOM_COLLECTION, mom.id, mom.to_dict())
+        data = mom.to_dict()
+        self.store.insert(self.MOM_COLLECTION, mom.id, data)
+        mom.rev = data[REV_FIELD]
+        self.events.publish([ChangeEvent(self.MOM_COLLECTION, "insert", mom.id, after=data)])
         return mom
 
     def get_mom(self, mom_id: str) -> Optional[MinutesOfMeeting]:
+        """Return an MOM, from the model cache when current. Don't modify it."""
+        return self.cache.get(self.MOM_COLLECTION, mom_id, MinutesOfMeeting.from_dict)
+
+    def _require_mom(
+        self, mom_id: str, expected_rev: Optional[int] = None
+    ) -> Tuple[MinutesOfMeeting, dict]:
+        """Return the MOM and its stored record, or raise if it doesn't exist.
+
+        With ``expected_rev``, also raise :class:`VersionConflictError` if the
+        MOM has been changed since the caller read that revision.
+        """
         data = self.store.get(self.MOM_COLLECTION, mom_id)
-        return MinutesOfMeeting.from_dict(data) if data else None
+        if not data:
+            raise ValueError(f"MOM '{mom_id}' not found")
+        check_revision(self.MOM_COLLECTION, mom_id, data, expected_rev)
+        return MinutesOfMeeting.from_dict(data), data
+
+    def _save_mom(self, mom: MinutesOfMeeting, before: dict) -> MinutesOfMeeting:
+        """Write back a MOM read by :meth:`_require_mom`, unless it changed meanwhile."""
+        data = mom.to_dict()
+        self.store.update(self.MOM_COLLECTION, mom.id, data, expected_rev=revision(before))
+        mom.rev = data[REV_FIELD]
+        self.events.publish([
+            ChangeEvent(self.MOM_COLLECTION, "update", mom.id, before=before, after=data)
+        ])
+        return mom
 
     def get_mom_by_meeting(self, meeting_id: str) -> Optional[MinutesOfMeeting]:
         """Retrieve the MOM for a specific meeting."""
@@ -78,13 +158,49 @@ class MOMService:
         return MinutesOfMeeting.from_dict(records[0]) if records else None
 
     def list_moms(
-        self, status: Optional[MOMStatus] = None
-    ) -> List[MinutesOfMeeting]:
+        self,
+        status: Optional[MOMStatus] = None,
+        fields: Sequence[str] = (),
+        view: Optional[str] = None,
+    ) -> Union[List[MinutesOfMeeting], List[dict]]:
+        """List MOMs, optionally in one status.
+
+        Given ``fields`` and/or a ``view`` from :attr:`MOM_VIEWS`, returns
+        dicts of just those fields instead of models.
+        """
+        fields = select_fields(fields, view, self.MOM_FIELDS, self.MOM_VIEWS)
+        if fields is not None:
+            filters = {"status": status.value} if status else None
+            return self.store.page(self.MOM_COLLECTION, None, filters=filters, fields=fields).items
         if status:
             records = self.store.find(self.MOM_COLLECTION, status=status.value)
         else:
             records = self.store.get_all(self.MOM_COLLECTION)
-        return [MinutesOfMeeting.from_dict(r) for r in records]
+        return MinutesOfMeeting.from_dicts(records)
+
+    def list_moms_page(
+        self,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        status: Optional[MOMStatus] = None,
+        fields: Sequence[str] = (),
+        view: Optional[str] = None,
+    ) -> Union[Page[MinutesOfMeeting], Page[dict]]:
+        """List one page of MOMs, sorted by a :attr:`MOM_SORT_FIELDS` field.
+
+        ``fields`` and ``view`` are as for :meth:`list_moms`.
+        """
+        fields = select_fields(fields, view, self.MOM_FIELDS, self.MOM_VIEWS)
+        page = self.store.page(
+            self.MOM_COLLECTION,
+            limit,
+            cursor=cursor,
+            sort=parse_sort(sort, self.MOM_SORT_FIELDS),
+            filters={"status": status.value} if status else None,
+            fields=fields,
+        )
+        return page if fields is not None else page.map(MinutesOfMeeting.from_dict)
 
     def add_agenda_item(
         self,
@@ -92,60 +208,49 @@ class MOMService:
         title: str,
         discussion: str = "",
         decisions: str = "",
+        expected_rev: Optional[int] = None,
     ) -> MinutesOfMeeting:
         """Add an agenda item to an existing MOM."""
-        mom = self.get_mom(mom_id)
-        if not mom:
-            raise ValueError(f"MOM '{mom_id}' not found")
+        mom, before = self._require_mom(mom_id, expected_rev)
         mom.add_agenda_item(title=title, discussion=discussion, decisions=decisions)
-        self.store.update(self.MOM_COLLECTION, mom.id, mom.to_dict())
-        return mom
+        return self._save_mom(mom, before)
 
-    def submit_for_review(self, mom_id: str) -> MinutesOfMeeting:
+    def submit_for_review(
+        self, mom_id: str, expected_rev: Optional[int] = None
+    ) -> MinutesOfMeeting:
         """Submit a draft MOM for review."""
-        mom = self.get_mom(mom_id)
-        if not mom:
-            raise ValueError(f"MOM '{mom_id}' not found")
+        mom, before = self._require_mom(mom_id, expected_rev)
         mom.submit_for_review()
-        self.store.update(self.MOM_COLLECTION, mom.id, mom.to_dict())
-        return mom
+        return self._save_mom(mom, before)
 
-    def validate_mom(self, mom_id: str, validated_by: str) -> MinutesOfMeeting:
+    def validate_mom(
+        self, mom_id: str, validated_by: str, expected_rev: Optional[int] = None
+    ) -> MinutesOfMeeting:
         """Validate/approve a MOM that is pending review."""
-        mom = self.get_mom(mom_id)
-        if not mom:
-            raise ValueError(f"MOM '{mom_id}' not found")
+        mom, before = self._require_mom(mom_id, expected_rev)
         mom.validate(validated_by)
-        self.store.update(self.MOM_COLLECTION, mom.id, mom.to_dict())
-        return mom
+        return self._save_mom(mom, before)
 
     def reject_mom(
-        self, mom_id: str, rejected_by: str, reason: str
+        self, mom_id: str, rejected_by: str, reason: str, expected_rev: Optional[int] = None
     ) -> MinutesOfMeeting:
         """Reject a MOM that is pending review."""
-        mom = self.get_mom(mom_id)
-        if not mom:
-            raise ValueError(f"MOM '{mom_id}' not found")
+        mom, before = self._require_mom(mom_id, expected_rev)
         mom.reject(rejected_by, reason)
-        self.store.update(self.MOM_COLLECTION, mom.id, mom.to_dict())
-        return mom
+        return self._save_mom(mom, before)
 
-    def revise_mom(self, mom_id: str) -> MinutesOfMeeting:
+    def revise_mom(self, mom_id: str, expected_rev: Optional[int] = None) -> MinutesOfMeeting:
         """Move a rejected MOM back to draft for revision."""
-        mom = self.get_mom(mom_id)
-        if not mom:
-            raise ValueError(f"MOM '{mom_id}' not found")
+        mom, before = self._require_mom(mom_id, expected_rev)
         mom.revise()
-        self.store.update(self.MOM_COLLECTION, mom.id, mom.to_dict())
-        return mom
+        return self._save_mom(mom, before)
 
-    def update_summary(self, mom_id: str, summary: str) -> MinutesOfMeeting:
+    def update_summary(
+        self, mom_id: str, summary: str, expected_rev: Optional[int] = None
+    ) -> MinutesOfMeeting:
         """Update the summary of a MOM (only allowed in draft status)."""
-        mom = self.get_mom(mom_id)
-        if not mom:
-            raise ValueError(f"MOM '{mom_id}' not found")
+        mom, before = self._require_mom(mom_id, expected_rev)
         if mom.status != MOMStatus.DRAFT:
             raise ValueError("Can only update summary while MOM is in draft status")
         mom.summary = summary
-        self.store.update(self.MOM_COLLECTION, mom.id, mom.to_dict())
-        return mom
+        return self._save_mom(mom, before)
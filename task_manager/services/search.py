@@ -0,0 +1,345 @@
+"""Full-text search over meeting minutes and tasks."""
+
+import functools
+import math
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from task_manager.services.events import ChangeEvent
+from task_manager.services.mom_service import MOMService
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+
+DOC_TYPES = ("mom", "agenda_item", "task")
+
+_WORD = re.compile(r"[^\W_]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was we were will with".split()
+)
+
+
+def stem(word: str) -> str:
+    """Strip common English inflections so that related forms share a term.
+
+    Deliberately simple: plurals first, then ``-ing``/``-ed``/``-ly``, then
+    a final ``e``. ``deciding``, ``decided`` and ``decides`` all become
+    ``decid``.
+    """
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("es") and word[-3] in "sxz" or word.endswith(("ches", "shes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ingly", "edly", "ing", "ed", "ly"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    if word.endswith("e") and len(word) >= 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ``text`` and return its stemmed words, stopwords removed."""
+    return [stem(w) for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _documents(collection: str, record: Optional[dict]) -> Dict[str, Tuple[dict, str]]:
+    """Split a stored record into searchable documents.
+
+    Returns ``{doc id: (hit, text)}``, doc ids being prefixed with the
+    type. A MOM yields its summary plus one document per agenda item, so a
+    search points at the item that matched.
+    """
+    if record is None:
+        return {}
+    id = record["id"]
+    if collection == TaskService.TASKS_COLLECTION:
+        text = f"{record.get('title', '')}\n{record.get('description', '')}"
+        return {f"task:{id}": ({"type": "task", "id": id, "title": record.get("title", "")}, text)}
+    docs = {}
+    summary = record.get("summary") or ""
+    if summary:
+        title = summary.splitlines()[0][:80]
+        docs[f"mom:{id}"] = ({"type": "mom", "id": id, "title": title}, summary)
+    for i, item in enumerate(record.get("agenda_items") or []):
+        text = f"{item.get('title', '')}\n{item.get('discussion', '')}\n{item.get('decisions', '')}"
+        hit = {"type": "agenda_item", "id": id, "item": i, "title": item.get("title", "")}
+        docs[f"agenda_item:{id}:{i}"] = (hit, text)
+    return docs
+
+
+class SearchIndex:
+    """Inverted index over MOM summaries, agenda items and task text.
+
+    Subscribe :meth:`apply` to the services' :class:`EventBus`. Like the
+    dashboard :class:`Counters`, the index is persisted in the store, so the
+    CLI can search without rebuilding it:
+
+    * ``search_terms`` holds one record per term, mapping each document that
+      contains it to ``[term frequency, document length]``;
+    * ``search_pending`` holds one record per document written since the
+      term records were last merged: its ``terms`` and ``length`` (none once
+      deleted) and the ``stale`` terms whose records may still list it;
+    * ``search_stats`` holds the document count and total length for BM25,
+      and the number of pending documents.
+
+    A write only touches its documents' pending records and the stats, with
+    :meth:`JsonStore.update_with` so concurrent writers never lose each
+    other's changes. Once :attr:`MERGE_AT` documents are pending, they are
+    folded into the term records in one batch, by one process at a time.
+    A query reads the records of its own terms and the pending documents,
+    which take precedence, then the MOMs and tasks behind the best hits.
+    The index is rebuilt from a full scan when missing, and :meth:`rebuild`
+    repairs drift, e.g. after data was edited outside the services.
+    """
+
+    TERMS_COLLECTION = "search_terms"
+    PENDING_COLLECTION = "search_pending"
+    STATS_COLLECTION = "search_stats"
+    INDEXED = (MOMService.MOM_COLLECTION, TaskService.TASKS_COLLECTION)
+    # Pending documents that trigger a merge into the term records.
+    MERGE_AT = 256
+    # Seconds after which a merge that never finished, e.g. because its
+    # process died, no longer keeps others from merging.
+    MERGE_TIMEOUT = 60.0
+
+    # Standard BM25 parameters.
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, store: JsonStore):
+        self.store = store
+        self._lock = threading.Lock()
+        if store.get(self.STATS_COLLECTION, "all") is None:
+            self.rebuild()
+
+    def search(self, query: str, types: Iterable[str] = (), limit: int = 20) -> List[dict]:
+        """Return up to ``limit`` hits for ``query``, best first.
+
+        A document matches if it contains any of the query's terms, and is
+        ranked by BM25. ``types`` restricts hits to some of
+        :data:`DOC_TYPES`. Each hit carries ``type``, ``id`` (of the MOM or
+        task), ``title`` and ``score``, plus the agenda ``item`` index for
+        agenda items.
+        """
+        types = set(types)
+        unknown = types - set(DOC_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown search type(s) {sorted(unknown)}, expected {DOC_TYPES}")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        terms = set(tokenize(query))
+        stats = self.store.get(self.STATS_COLLECTION, "all")
+        if not terms or not stats or not stats["docs"]:
+            return []
+        docs, avg_length = stats["docs"], stats["length"] / stats["docs"]
+        pending = {r["id"]: r for r in self.store.get_all(self.PENDING_COLLECTION)}
+        scores: Dict[str, float] = {}
+        for term in terms:
+            record = self.store.get(self.TERMS_COLLECTION, term)
+            postings = {
+                doc: posting for doc, posting in (record["postings"] if record else {}).items()
+                if doc not in pending
+            }
+            for doc, written in pending.items():
+                if term in written["terms"]:
+                    postings[doc] = [written["terms"][term], written["length"]]
+            if not postings:
+                continue
+            idf = math.log(1 + (docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, (tf, length) in postings.items():
+                if types and doc.split(":", 1)[0] not in types:
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * length / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        hits = []
+        for doc, score in ranked:
+            hit = self._hit(doc)
+            if hit is None:
+                continue
+            hit["score"] = round(score, 4)
+            hits.append(hit)
+            if len(hits) == limit:
+                break
+        return hits
+
+    def _hit(self, doc: str) -> Optional[dict]:
+        """Describe a document from the current MOM or task it came from."""
+        type, id = doc.split(":")[:2]
+        collection = TaskService.TASKS_COLLECTION if type == "task" else MOMService.MOM_COLLECTION
+        found = _documents(collection, self.store.get(collection, id)).get(doc)
+        return dict(found[0]) if found else None
+
+    def apply(self, events: List[ChangeEvent]) -> None:
+        """Fold a batch of MOM and task change events into the index."""
+        with self._lock:
+            removed: Dict[str, Tuple[dict, str]] = {}
+            added: Dict[str, Tuple[dict, str]] = {}
+            for event in events:
+                if event.collection not in self.INDEXED:
+                    continue
+                removed.update(_documents(event.collection, event.before))
+                added.update(_documents(event.collection, event.after))
+            if removed or added:
+                self._write(removed, added)
+
+    def rebuild(self) -> int:
+        """Reindex every MOM and task from scratch; returns the document count."""
+        with self._lock:
+            for collection in (self.TERMS_COLLECTION, self.PENDING_COLLECTION,
+                               self.STATS_COLLECTION):
+                self.store.delete_many(collection, [r["id"] for r in self.store.get_all(collection)])
+            postings: Dict[str, Dict[str, list]] = {}
+            docs = length = 0
+            for collection in self.INDEXED:
+                for record in self.store.iterate(collection):
+                    for doc, (_, text) in _documents(collection, record).items():
+                        terms = tokenize(text)
+                        for term, tf in Counter(terms).items():
+                            postings.setdefault(term, {})[doc] = [tf, len(terms)]
+                        docs += 1
+                        length += len(terms)
+            if postings:
+                self.store.insert_many(self.TERMS_COLLECTION, {
+                    term: {"id": term, "postings": p} for term, p in postings.items()
+                })
+            self.store.insert(self.STATS_COLLECTION, "all", {
+                "id": "all", "docs": docs, "length": length, "pending": 0,
+            })
+            return docs
+
+    def _write(self, removed: Dict[str, Tuple[dict, str]], added: Dict[str, Tuple[dict, str]]) -> None:
+        """Replace the ``removed`` documents by the ``added`` ones.
+
+        Only the documents' pending records and the stats are written; the
+        term records are left to :meth:`_merge`.
+        """
+        unchanged = {doc for doc in removed.keys() & added.keys() if removed[doc] == added[doc]}
+        before: Dict[str, List[str]] = {}
+        after: Dict[str, List[str]] = {}
+        for doc in removed.keys() - unchanged:
+            before[doc] = tokenize(removed[doc][1])
+        for doc in added.keys() - unchanged:
+            after[doc] = tokenize(added[doc][1])
+        if not before and not after:
+            return
+        created: List[str] = []
+        self.store.update_with(self.PENDING_COLLECTION, {
+            doc: functools.partial(_pend, doc, before.get(doc, ()), after.get(doc), created)
+            for doc in before.keys() | after.keys()
+        })
+        docs = len(after) - len(before)
+        length = sum(map(len, after.values())) - sum(map(len, before.values()))
+        stats = self.store.update_with(self.STATS_COLLECTION, {
+            "all": functools.partial(_add_stats, docs, length, len(created)),
+        })["all"]
+        if stats["pending"] >= self.MERGE_AT and not _merging(stats, self.MERGE_TIMEOUT):
+            self._merge()
+
+    def _merge(self) -> None:
+        """Fold the pending documents into the term records, unless another process is."""
+        token = uuid.uuid4().hex
+        claimed = self.store.update_with(self.STATS_COLLECTION, {
+            "all": functools.partial(_claim_merge, token, self.MERGE_TIMEOUT),
+        })["all"]
+        if claimed is None or claimed["merging"][0] != token:
+            return
+        merged = 0
+        try:
+            pending = {r["id"]: r for r in self.store.get_all(self.PENDING_COLLECTION)}
+            changes: Dict[str, Dict[str, Optional[list]]] = {}
+            for doc, written in pending.items():
+                for term in written["stale"]:
+                    changes.setdefault(term, {})[doc] = None
+                for term, tf in written["terms"].items():
+                    changes.setdefault(term, {})[doc] = [tf, written["length"]]
+            self.store.update_with(self.TERMS_COLLECTION, {
+                term: functools.partial(_fold, term, docs) for term, docs in changes.items()
+            })
+            # Documents written again meanwhile stay pending, and win over the
+            # term records until the next merge.
+            remaining = self.store.update_with(self.PENDING_COLLECTION, {
+                doc: functools.partial(_unless_changed, written)
+                for doc, written in pending.items()
+            })
+            merged = sum(1 for record in remaining.values() if record is None)
+        finally:
+            self.store.update_with(self.STATS_COLLECTION, {
+                "all": functools.partial(_finish_merge, token, merged),
+            })
+
+
+def _pend(
+    doc: str, before: Iterable[str], after: Optional[List[str]], created: List[str],
+    pending: Optional[dict],
+) -> dict:
+    """The pending record of ``doc`` once rewritten to ``after`` (None if deleted)."""
+    if pending is None:
+        created.append(doc)
+        # Every term it had may be in the term records.
+        stale: Set[str] = set(before)
+    else:
+        # Terms only written since the last merge are harmless to clear too.
+        stale = set(pending["stale"]) | set(before)
+    return {
+        "id": doc,
+        "terms": dict(Counter(after or ())),
+        "length": len(after or ()),
+        "stale": sorted(stale),
+    }
+
+
+def _add_stats(docs: int, length: int, pending: int, stats: Optional[dict]) -> dict:
+    stats = stats or {"id": "all", "docs": 0, "length": 0}
+    stats["docs"] += docs
+    stats["length"] += length
+    stats["pending"] = stats.get("pending", 0) + pending
+    return stats
+
+
+def _merging(stats: dict, timeout: float) -> bool:
+    """Whether a merge was claimed less than ``timeout`` seconds ago."""
+    merging = stats.get("merging")
+    return merging is not None and time.time() - merging[1] <= timeout
+
+
+def _claim_merge(token: str, timeout: float, stats: Optional[dict]) -> Optional[dict]:
+    if stats is not None and not _merging(stats, timeout):
+        stats["merging"] = [token, time.time()]
+    return stats
+
+
+def _finish_merge(token: str, merged: int, stats: Optional[dict]) -> Optional[dict]:
+    if stats is None:
+        return None
+    stats["pending"] = max(stats.get("pending", 0) - merged, 0)
+    if stats.get("merging", [None])[0] == token:
+        del stats["merging"]
+    return stats
+
+
+def _fold(term: str, docs: Dict[str, Optional[list]], record: Optional[dict]) -> Optional[dict]:
+    """The term record with ``docs`` set, or removed where None."""
+    postings = record["postings"] if record else {}
+    for doc, posting in docs.items():
+        if posting is None:
+            postings.pop(doc, None)
+        else:
+            postings[doc] = posting
+    return {"id": term, "postings": postings} if postings else None
+
+
+def _unless_changed(merged: dict, record: Optional[dict]) -> Optional[dict]:
+    return None if record == merged else record
@@ -1,18 +1,112 @@
 """Service layer for managing tasks, including those linked to MOMs."""
 
-from typing import List, Optional
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from task_manager.models.task import Task, TaskPriority, TaskStatus
+from task_manager.metrics import instrument
+from task_manager.models.task import Task, TaskPriority, TaskStatus, normalize_due_date
+from task_manager.services.batch import BatchResult
+from task_manager.services.cache import ModelCache
+from task_manager.services.events import ChangeEvent, EventBus
+from task_manager.services.fields import select_fields
 from task_manager.storage.json_store import JsonStore
+from task_manager.storage.pagination import Page, parse_sort
+from task_manager.storage.query import Predicate, eq, exists, gt, gte, in_, lt, lte, prefix
+from task_manager.storage.versions import REV_FIELD, check_revision, revision
 
+PRIORITY_RANKS = {p.value: rank for rank, p in enumerate(TaskPriority)}
 
+
+@dataclass
+class TaskQuery:
+    """Criteria for listing tasks, all of which must hold.
+
+    ``status`` and ``priority`` match any of the given values. The date
+    bounds are exclusive and compare ISO-8601 strings, so ``"2026-03-01"``
+    works for both ``due_date`` and the timestamps.
+    """
+
+    department_id: Optional[str] = None
+    assigned_to: Optional[str] = None
+    mom_id: Optional[str] = None
+    status: Sequence[TaskStatus] = ()
+    priority: Sequence[TaskPriority] = ()
+    due_before: Optional[str] = None
+    due_after: Optional[str] = None
+    created_before: Optional[str] = None
+    created_after: Optional[str] = None
+    updated_before: Optional[str] = None
+    updated_after: Optional[str] = None
+    title_prefix: Optional[str] = None
+    has_due_date: Optional[bool] = None
+
+    def predicates(self) -> List[Predicate]:
+        where = []
+        for field in ("department_id", "assigned_to", "mom_id"):
+            value = getattr(self, field)
+            if value:
+                where.append(eq(field, value))
+        if self.status:
+            where.append(_any_of("status", [s.value for s in self.status]))
+        if self.priority:
+            where.append(_any_of("priority", [p.value for p in self.priority]))
+        for field, before, after in (
+            ("due_date", self.due_before, self.due_after),
+            ("created_at", self.created_before, self.created_after),
+            ("updated_at", self.updated_before, self.updated_after),
+        ):
+            if before:
+                where.append(lt(field, before))
+            if after:
+                where.append(gt(field, after))
+        if self.title_prefix:
+            where.append(prefix("title", self.title_prefix))
+        if self.has_due_date is not None:
+            where.append(exists("due_date", self.has_due_date))
+        return where
+
+
+def _any_of(field: str, values: List[str]) -> Predicate:
+    return eq(field, values[0]) if len(values) == 1 else in_(field, values)
+
+
+@instrument
 class TaskService:
     """Handles creation, assignment, and tracking of tasks."""
 
     TASKS_COLLECTION = "tasks"
+    TRANSITIONS = ("start", "complete", "cancel")
+    INDEXED_FIELDS = ("mom_id", "department_id", "assigned_to", "status", "priority")
+    RANGE_INDEXED_FIELDS = ("created_at", "updated_at")
+    SORT_FIELDS = {"created_at": None, "due_date": None, "priority": PRIORITY_RANKS}
+    ACTIVE_STATUSES = (TaskStatus.OPEN, TaskStatus.IN_PROGRESS)
+    FIELDS = (
+        "id", "title", "description", "department_id", "assigned_to", "mom_id",
+        "due_date", "status", "priority", "created_at", "updated_at",
+    )
+    # Predefined field selections for list views.
+    VIEWS = {"summary": tuple(f for f in FIELDS if f != "description")}
 
-    def __init__(self, store: JsonStore):
+    def __init__(
+        self,
+        store: JsonStore,
+        events: Optional[EventBus] = None,
+        cache: Optional[ModelCache] = None,
+    ):
         self.store = store
+        self.events = events or EventBus()
+        if cache is None:
+            cache = ModelCache(store)
+            self.events.subscribe(cache.apply)
+        self.cache = cache
+        for field in self.INDEXED_FIELDS:
+            store.ensure_index(self.TASKS_COLLECTION, field)
+        for field in self.RANGE_INDEXED_FIELDS:
+            store.ensure_index(self.TASKS_COLLECTION, field, kind="sorted")
+        # Due dates are kept sorted per status, so the overdue and due-date
+        # queries below only visit the statuses they ask for.
+        store.ensure_index(self.TASKS_COLLECTION, "due_date", kind="sorted", partition_by="status")
 
     def create_task(
         self,
@@ -31,15 +125,53 @@ class TaskService:
             assigned_to=assigned_to,
             description=description,
             mom_id=mom_id,
-            due_date=due_date,
+            due_date=normalize_due_date(due_date),
             priority=priority,
         )
-        self.store.insert(self.TASKS_COLLECTION, task.id, task.to_dict())
+        data = task.to_dict()
+        self.store.insert(self.TASKS_COLLECTION, task.id, data)
+        task.rev = data[REV_FIELD]
+        self.events.publish([ChangeEvent(self.TASKS_COLLECTION, "insert", task.id, after=data)])
         return task
 
+    def create_tasks(self, specs: Iterable[Dict[str, Any]]) -> BatchResult:
+        """Create many tasks with a single store write.
+
+        Each spec takes the keyword arguments of :meth:`create_task`. Specs
+        that fail validation are reported by index and skipped; the others
+        are still created.
+        """
+        result = BatchResult()
+        for index, spec in enumerate(specs):
+            try:
+                priority = spec.get("priority") or TaskPriority.MEDIUM
+                result.succeeded.append(Task(
+                    title=spec["title"],
+                    department_id=spec["department_id"],
+                    assigned_to=spec["assigned_to"],
+                    description=spec.get("description") or "",
+                    mom_id=spec.get("mom_id"),
+                    due_date=normalize_due_date(spec.get("due_date")),
+                    priority=TaskPriority(priority),
+                ))
+            except KeyError as e:
+                result.errors.append({"index": index, "error": f"Missing field {e}"})
+            except ValueError as e:
+                result.errors.append({"index": index, "error": str(e)})
+        if result.succeeded:
+            records = {t.id: t.to_dict() for t in result.succeeded}
+            self.store.insert_many(self.TASKS_COLLECTION, records)
+            for task in result.succeeded:
+                task.rev = records[task.id][REV_FIELD]
+            self.events.publish([
+                ChangeEvent(self.TASKS_COLLECTION, "insert", id, after=data)
+                for id, data in records.items()
+            ])
+        return result
+
     def get_task(self, task_id: str) -> Optional[Task]:
-        data = self.store.get(self.TASKS_COLLECTION, task_id)
-        return Task.from_dict(data) if data else None
+        """Return a task, from the model cache when current. Don't modify it."""
+        return self.cache.get(self.TASKS_COLLECTION, task_id, Task.from_dict)
 
     def list_tasks(
         self,
@@ -47,55 +179,250 @@ class TaskService:
         assigned_to: Optional[str] = None,
         status: Optional[TaskStatus] = None,
         mom_id: Optional[str] = None,
+        query: Optional[TaskQuery] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Sequence[str] = (),
+        view: Optional[str] = None,
+    ) -> Union[List[Task], List[dict]]:
+        """List tasks with optional filters.
+
+        ``query`` adds range, prefix and multi-value criteria; the store plans
+        them against its hash and sorted indexes. ``sort`` is as for
+        :meth:`list_tasks_page`. Given ``fields`` and/or a ``view`` from
+        :attr:`VIEWS`, returns dicts of just those fields instead of models.
+        """
+        fields = select_fields(fields, view, self.FIELDS, self.VIEWS)
+        where = self._where(department_id, assigned_to, status, mom_id, query)
+        if fields is None and not where and sort is None and limit is None:
+            return Task.from_dicts(self.store.get_all(self.TASKS_COLLECTION))
+        records = self.store.query(
+            self.TASKS_COLLECTION,
+            where,
+            sort=parse_sort(sort, self.SORT_FIELDS),
+            limit=limit,
+            fields=fields,
+        )
+        return records if fields is not None else Task.from_dicts(records)
+
+    def list_tasks_page(
+        self,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        department_id: Optional[str] = None,
+        assigned_to: Optional[str] = None,
+        status: Optional[TaskStatus] = None,
+        mom_id: Optional[str] = None,
+        query: Optional[TaskQuery] = None,
+        fields: Sequence[str] = (),
+        view: Optional[str] = None,
+    ) -> Union[Page[Task], Page[dict]]:
+        """List one page of tasks; only that page is decoded into models.
+
+        ``sort`` is a field from :attr:`SORT_FIELDS`, prefixed with ``-`` for
+        descending order. Pass the returned ``next_cursor`` to get the next page.
+        ``fields`` and ``view`` are as for :meth:`list_tasks`.
+        """
+        fields = select_fields(fields, view, self.FIELDS, self.VIEWS)
+        page = self.store.page(
+            self.TASKS_COLLECTION,
+            limit,
+            cursor=cursor,
+            sort=parse_sort(sort, self.SORT_FIELDS),
+            where=self._where(department_id, assigned_to, status, mom_id, query),
+            fields=fields,
+        )
+        return page if fields is not None else page.map(Task.from_dict)
+
+    @staticmethod
+    def _where(
+        department_id: Optional[str],
+        assigned_to: Optional[str],
+        status: Optional[TaskStatus],
+        mom_id: Optional[str],
+        query: Optional[TaskQuery],
+    ) -> List[Predicate]:
+        where = TaskQuery(
+            department_id=department_id,
+            assigned_to=assigned_to,
+            mom_id=mom_id,
+            status=[status] if status else (),
+        ).predicates()
+        if query is not None:
+            where.extend(query.predicates())
+        return where
+
+    def overdue_tasks(
+        self,
+        as_of: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> List[Task]:
-        """List tasks with optional filters."""
-        filters = {}
-        if department_id:
-            filters["department_id"] = department_id
-        if assigned_to:
-            filters["assigned_to"] = assigned_to
+        """Open and in-progress tasks due before ``as_of`` (default: today).
+
+        Ordered by due date, oldest first.
+        """
+        as_of = normalize_due_date(as_of) or date.today().isoformat()
+        where = [_any_of("status", [s.value for s in self.ACTIVE_STATUSES]), lt("due_date", as_of)]
+        return self._by_due_date(where, limit)
+
+    def due_between(
+        self,
+        start: str,
+        end: str,
+        status: Sequence[TaskStatus] = ACTIVE_STATUSES,
+        limit: Optional[int] = None,
+    ) -> List[Task]:
+        """Tasks due from ``start`` to ``end`` inclusive, ordered by due date.
+
+        Only tasks in one of ``status`` are returned; pass an empty sequence
+        to include every status.
+        """
+        start, end = normalize_due_date(start), normalize_due_date(end)
+        if start is None or end is None:
+            raise ValueError("Both start and end dates are required")
+        if start > end:
+            raise ValueError(f"Start date {start} is after end date {end}")
+        where = [gte("due_date", start), lte("due_date", end)]
         if status:
-            filters["status"] = status.value
-        if mom_id:
-            filters["mom_id"] = mom_id
+            where.append(_any_of("status", [TaskStatus(s).value for s in status]))
+        return self._by_due_date(where, limit)
+
+    def upcoming_tasks(
+        self,
+        days: int = 7,
+        as_of: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Task]:
+        """Open and in-progress tasks due within ``days`` days of ``as_of``."""
+        if days < 0:
+            raise ValueError("days must not be negative")
+        start = date.fromisoformat(normalize_due_date(as_of) or date.today().isoformat())
+        end = start + timedelta(days=days)
+        return self.due_between(start.isoformat(), end.isoformat(), limit=limit)
 
-        if filters:
-            records = self.store.find(self.TASKS_COLLECTION, **filters)
-        else:
-            records = self.store.get_all(self.TASKS_COLLECTION)
-        return [Task.from_dict(r) for r in records]
+    def _by_due_date(self, where: List[Predicate], limit: Optional[int]) -> List[Task]:
+        records = self.store.query(
+            self.TASKS_COLLECTION,
+            where,
+            sort=parse_sort("due_date", self.SORT_FIELDS),
+            limit=limit,
+        )
+        return Task.from_dicts(records)
 
     def get_tasks_for_mom(self, mom_id: str) -> List[Task]:
         """Get all tasks linked to a specific MOM."""
         records = self.store.find(self.TASKS_COLLECTION, mom_id=mom_id)
-        return [Task.from_dict(r) for r in records]
+        return Task.from_dicts(records)
 
-    def start_task(self, task_id: str) -> Task:
-        """Mark a task as in-progress."""
-        task = self.get_task(task_id)
-        if not task:
+    def _require(self, task_id: str, expected_rev: Optional[int] = None) -> Tuple[Task, dict]:
+        """Return the task and its stored record, or raise if it doesn't exist.
+
+        With ``expected_rev``, also raise :class:`VersionConflictError` if the
+        task has been changed since the caller read that revision.
+        """
+        data = self.store.get(self.TASKS_COLLECTION, task_id)
+        if not data:
             raise ValueError(f"Task '{task_id}' not found")
-        task.start()
-        self.store.update(self.TASKS_COLLECTION, task.id, task.to_dict())
+        check_revision(self.TASKS_COLLECTION, task_id, data, expected_rev)
+        return Task.from_dict(data), data
+
+    def _save(self, task: Task, before: dict) -> Task:
+        """Write back a task read by :meth:`_require`, unless it changed meanwhile."""
+        data = task.to_dict()
+        self.store.update(self.TASKS_COLLECTION, task.id, data, expected_rev=revision(before))
+        task.rev = data[REV_FIELD]
+        self.events.publish([
+            ChangeEvent(self.TASKS_COLLECTION, "update", task.id, before=before, after=data)
+        ])
         return task
 
-    def complete_task(self, task_id: str) -> Task:
+    def start_task(self, task_id: str, expected_rev: Optional[int] = None) -> Task:
+        """Mark a task as in-progress."""
+        task, before = self._require(task_id, expected_rev)
+        task.start()
+        return self._save(task, before)
+
+    def complete_task(self, task_id: str, expected_rev: Optional[int] = None) -> Task:
         """Mark a task as completed."""
-        task = self.get_task(task_id)
-        if not task:
-            raise ValueError(f"Task '{task_id}' not found")
+        task, before = self._require(task_id, expected_rev)
         task.complete()
-        self.store.update(self.TASKS_COLLECTION, task.id, task.to_dict())
-        return task
+        return self._save(task, before)
 
-    def cancel_task(self, task_id: str) -> Task:
+    def cancel_task(self, task_id: str, expected_rev: Optional[int] = None) -> Task:
         """Cancel a task."""
-        task = self.get_task(task_id)
-        if not task:
-            raise ValueError(f"Task '{task_id}' not found")
+        task, before = self._require(task_id, expected_rev)
         task.cancel()
-        self.store.update(self.TASKS_COLLECTION, task.id, task.to_dict())
-        return task
+        return self._save(task, before)
+
+    def bulk_transition(self, task_ids: Iterable[str], action: str) -> BatchResult:
+        """Apply ``start``, ``complete`` or ``cancel`` to many tasks at once.
+
+        Tasks that are missing or not in a valid state for the action are
+        reported by id; the rest are persisted with a single store write.
+        Tasks changed or deleted by someone else in the meantime are
+        reported as conflicts, and the write is retried without them.
+        """
+        if action not in self.TRANSITIONS:
+            raise ValueError(f"Unknown action '{action}', expected one of {self.TRANSITIONS}")
+        result = BatchResult()
+        changed: Dict[str, Task] = {}
+        before: Dict[str, dict] = {}
+        for task_id in task_ids:
+            task = changed.get(task_id)
+            if task is None:
+                data = self.store.get(self.TASKS_COLLECTION, task_id)
+                if not data:
+                    result.errors.append({"id": task_id, "error": f"Task '{task_id}' not found"})
+                    continue
+                task = Task.from_dict(data)
+                before[task_id] = data
+            try:
+                getattr(task, action)()
+            except ValueError as e:
+                result.errors.append({"id": task_id, "error": str(e)})
+                continue
+            changed[task.id] = task
+        while changed:
+            records = {id: t.to_dict() for id, t in changed.items()}
+            try:
+                self.store.update_many(
+                    self.TASKS_COLLECTION,
+                    records,
+                    expected_revs={id: revision(before[id]) for id in records},
+                )
+            except ValueError:
+                # A conflict, or a task deleted meanwhile: drop those and retry.
+                if not self._drop_conflicts(changed, before, result):
+                    raise
+                continue
+            for id, task in changed.items():
+                task.rev = records[id][REV_FIELD]
+            self.events.publish([
+                ChangeEvent(self.TASKS_COLLECTION, "update", id, before=before[id], after=data)
+                for id, data in records.items()
+            ])
+            break
+        result.succeeded = list(changed.values())
+        return result
+
+    def _drop_conflicts(
+        self, changed: Dict[str, Task], before: Dict[str, dict], result: BatchResult
+    ) -> bool:
+        """Report and remove the tasks of ``changed`` that moved past ``before``."""
+        current = self.store.get_many(self.TASKS_COLLECTION, changed)
+        stale = [id for id in changed if revision(current.get(id)) != revision(before[id])]
+        for id in stale:
+            if id not in current:
+                error = f"Task '{id}' was deleted concurrently"
+            else:
+                error = (
+                    f"Task '{id}' was changed concurrently: at revision "
+                    f"{revision(current[id])}, expected {revision(before[id])}"
+                )
+            result.errors.append({"id": id, "error": error})
+            del changed[id]
+        return bool(stale)
 
     def update_task(
         self,
@@ -105,11 +432,10 @@ class TaskService:
         assigned_to: Optional[str] = None,
         due_date: Optional[str] = None,
         priority: Optional[TaskPriority] = None,
+        expected_rev: Optional[int] = None,
     ) -> Task:
         """Update mutable fields of a task."""
-        task = self.get_task(task_id)
-        if not task:
-            raise ValueError(f"Task '{task_id}' not found")
+        task, before = self._require(task_id, expected_rev)
         if task.status in (TaskStatus.COMPLETED, TaskStatus.CANCELLED):
             raise ValueError(f"Cannot update a task with status '{task.status.value}'")
         if title is not None:
@@ -119,12 +445,22 @@ class TaskService:
         if assigned_to is not None:
             task.assigned_to = assigned_to
         if due_date is not None:
-            task.due_date = due_date
+            task.due_date = normalize_due_date(due_date)
         if priority is not None:
             task.priority = priority
-        self.store.update(self.TASKS_COLLECTION, task.id, task.to_dict())
-        return task
+        return self._save(task, before)
+
+    def delete_task(self, task_id: str, expected_rev: Optional[int] = None) -> bool:
+        """Delete a task by ID.
 
-    def delete_task(self, task_id: str) -> bool:
-        """Delete a task by ID."""
-        return self.store.delete(self.TASKS_COLLECTION, task_id)
+        With ``expected_rev``, raise :class:`VersionConflictError` unless the
+        task is still at that revision.
+        """
+        before = self.store.get(self.TASKS_COLLECTION, task_id)
+        if before is None:
+            return False
+        check_revision(self.TASKS_COLLECTION, task_id, before, expected_rev)
+        if not self.store.delete(self.TASKS_COLLECTION, task_id, expected_rev=revision(before)):
+            return False
+        self.events.publish([ChangeEvent(self.TASKS_COLLECTION, "delete", task_id, before=before)])
+        return True
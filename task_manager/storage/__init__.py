@@ -1,3 +1,5 @@
+from task_manager.storage.factory import create_store
 from task_manager.storage.json_store import JsonStore
+from task_manager.storage.sqlite_store import SqliteStore
 
-__all__ = ["JsonStore"]
+__all__ = ["JsonStore", "SqliteStore", "create_store"]
@@ -0,0 +1,75 @@
+"""Awaitable access to a synchronous store, for use from an event loop."""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from task_manager.storage.json_store import JsonStore
+
+T = TypeVar("T")
+
+
+def _offload(name: str, write: bool = False) -> Callable[..., Any]:
+    async def method(self: "AsyncStore", *args: Any, **kwargs: Any) -> Any:
+        run = self.write if write else self.read
+        return await run(getattr(self.store, name), *args, **kwargs)
+
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = f"Awaitable :meth:`JsonStore.{name}`."
+    return method
+
+
+class AsyncStore:
+    """Runs a :class:`JsonStore` or :class:`SqliteStore` off the event loop.
+
+    Reads go to a pool of ``read_workers`` threads and writes to a separate
+    pool of ``write_workers``, one by default. A burst of reads is therefore
+    never queued behind slow writes, or the other way round, the way it is in
+    the threadpool that sync handlers share. Writes already serialize per
+    collection inside the store, so one writer loses little. The store itself
+    is unchanged: a read still waits for a write to the *same* collection
+    that holds its lock.
+
+    Any store method can be run with :meth:`read` or :meth:`write`; the
+    common ones are mirrored as coroutines below.
+    """
+
+    def __init__(self, store: JsonStore, read_workers: int = 8, write_workers: int = 1):
+        if read_workers < 1 or write_workers < 1:
+            raise ValueError("read_workers and write_workers must be at least 1")
+        self.store = store
+        self._readers = ThreadPoolExecutor(read_workers, thread_name_prefix="store-read")
+        self._writers = ThreadPoolExecutor(write_workers, thread_name_prefix="store-write")
+
+    async def read(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on a reader thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on a writer thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writers, functools.partial(fn, *args, **kwargs))
+
+    get = _offload("get")
+    get_many = _offload("get_many")
+    get_all = _offload("get_all")
+    find = _offload("find")
+    query = _offload("query")
+    page = _offload("page")
+    revision = _offload("revision")
+    version = _offload("version")
+    insert = _offload("insert", write=True)
+    insert_many = _offload("insert_many", write=True)
+    update = _offload("update", write=True)
+    update_many = _offload("update_many", write=True)
+    update_with = _offload("update_with", write=True)
+    delete = _offload("delete", write=True)
+    delete_many = _offload("delete_many", write=True)
+
+    def close(self) -> None:
+        """Finish queued work, then close the store."""
+        self._writers.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.store.close()
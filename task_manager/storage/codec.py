@@ -0,0 +1,74 @@
+"""JSON codecs shared by the storage backends and the API responses."""
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+HAVE_ORJSON = orjson is not None
+CODECS = ("auto", "json", "orjson")
+
+
+class Codec(ABC):
+    """Converts between Python values and UTF-8 encoded JSON.
+
+    ``encode`` is compact unless ``pretty`` asks for a 2-space indent, for
+    files meant to be read by people. ``decode`` accepts bytes or str.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def encode(self, obj: Any, pretty: bool = False) -> bytes:
+        """Encode ``obj`` as UTF-8 JSON."""
+
+    @abstractmethod
+    def decode(self, data: Union[bytes, str]) -> Any:
+        """Decode JSON from bytes or str."""
+
+
+class StdlibCodec(Codec):
+    name = "json"
+
+    _compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), check_circular=False)
+    _pretty = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+    def encode(self, obj: Any, pretty: bool = False) -> bytes:
+        return (self._pretty if pretty else self._compact).encode(obj).encode()
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    name = "orjson"
+
+    def encode(self, obj: Any, pretty: bool = False) -> bytes:
+        # Non-str keys are stringified, as the json module does.
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+_INSTANCES: Dict[str, Codec] = {"json": StdlibCodec()}
+if HAVE_ORJSON:
+    _INSTANCES["orjson"] = OrjsonCodec()
+
+
+def get_codec(name: str = "auto") -> Codec:
+    """Return the named codec; ``auto`` is orjson when installed, else json."""
+    if name == "auto":
+        name = "orjson" if HAVE_ORJSON else "json"
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec '{name}', expected one of {CODECS}")
+    if name not in _INSTANCES:
+        raise ValueError("The orjson codec requires orjson to be installed")
+    return _INSTANCES[name]
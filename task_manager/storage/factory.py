@@ -0,0 +1,43 @@
+"""Build the configured storage backend."""
+
+import os
+from typing import Optional, Union
+
+from task_manager.storage.json_store import JsonStore
+from task_manager.storage.sqlite_store import SqliteStore
+
+BACKENDS = ("json", "sqlite")
+DEFAULT_DATA_DIR = "data"
+
+
+def create_store(
+    backend: Optional[str] = None,
+    data_dir: Optional[str] = None,
+    **options,
+) -> Union[JsonStore, SqliteStore]:
+    """Create a store from explicit arguments or the environment.
+
+    ``TASK_MANAGER_STORE`` selects the backend (``json`` or ``sqlite``),
+    ``TASK_MANAGER_DATA_DIR`` the data directory and, for the JSON backend,
+    ``TASK_MANAGER_STORE_MODE`` the storage mode, ``TASK_MANAGER_FSYNC``
+    the fsync policy, ``TASK_MANAGER_COMMIT_WINDOW`` the group-commit
+    window in seconds, ``TASK_MANAGER_PRETTY_JSON`` whether snapshots are
+    indented and ``TASK_MANAGER_SLOW_MS`` the threshold above which reads,
+    loads and saves go to the slow-operation log. ``TASK_MANAGER_CODEC``
+    picks the JSON codec for either backend. Explicit arguments win.
+    """
+    backend = backend or os.environ.get("TASK_MANAGER_STORE", "json")
+    data_dir = data_dir or os.environ.get("TASK_MANAGER_DATA_DIR", DEFAULT_DATA_DIR)
+    options.setdefault("codec", os.environ.get("TASK_MANAGER_CODEC", "auto"))
+    if backend == "json":
+        options.setdefault("mode", os.environ.get("TASK_MANAGER_STORE_MODE", "snapshot"))
+        options.setdefault("fsync", os.environ.get("TASK_MANAGER_FSYNC", "") in ("1", "true"))
+        options.setdefault("commit_window", float(os.environ.get("TASK_MANAGER_COMMIT_WINDOW", "0")))
+        pretty = os.environ.get("TASK_MANAGER_PRETTY_JSON", "") in ("1", "true")
+        options.setdefault("pretty", pretty)
+        slow_ms = os.environ.get("TASK_MANAGER_SLOW_MS")
+        options.setdefault("slow_ms", float(slow_ms) if slow_ms else None)
+        return JsonStore(data_dir=data_dir, **options)
+    if backend == "sqlite":
+        return SqliteStore(data_dir=data_dir, **options)
+    raise ValueError(f"Unknown storage backend '{backend}', expected one of {BACKENDS}")
@@ -0,0 +1,55 @@
+"""Crash-safe file writing helpers shared by the storage backends."""
+
+import os
+import uuid
+from typing import IO, Any, Callable
+
+# Like tempfile.mkstemp, but created with 0o666 so the umask applies.
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def fsync_dir(path: str) -> None:
+    """Flush a directory entry so a completed rename survives a crash."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(
+    path: str, write: Callable[[IO[Any]], None], fsync: bool = False, binary: bool = False
+) -> None:
+    """Write a file via a temp file in the same directory and rename it.
+
+    Readers and crashes only ever observe the old or the new content, never a
+    truncated file. With ``fsync`` the data and the rename are flushed to disk
+    before returning. ``binary`` opens the file for writing bytes. The file
+    keeps the mode of the one it replaces, and a new file gets the usual
+    umask-derived mode.
+    """
+    directory = os.path.dirname(path) or "."
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    fd = os.open(tmp_path, _TEMP_FLAGS, 0o666)
+    try:
+        with os.fdopen(fd, "wb" if binary else "w") as f:
+            try:
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            write(f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if fsync:
+        fsync_dir(directory)
@@ -0,0 +1,282 @@
+"""Secondary indexes kept in memory alongside JsonStore collections."""
+
+import bisect
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from task_manager.storage.pagination import SortKey
+
+_EMPTY: Dict[str, None] = {}
+_MAX_CHAR = chr(0x10FFFF)
+# Partition key for records whose partition value can't be hashed.
+_UNHASHABLE = object()
+
+
+def is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class HashIndex:
+    """Maps each value of one field to the ids of the records holding it.
+
+    Postings are dicts used as insertion-ordered sets, so lookups return ids
+    in a stable order. Records whose value is unhashable (e.g. a list) are not
+    indexed; they can never equal a hashable filter value anyway.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._postings: Dict[Any, Dict[str, None]] = {}
+
+    def build(self, records: Iterable[Tuple[str, dict]]) -> None:
+        self._postings = {}
+        for id, record in records:
+            self.add(id, record)
+
+    def add(self, id: str, record: dict) -> None:
+        value = record.get(self.field)
+        if is_hashable(value):
+            self._postings.setdefault(value, {})[id] = None
+
+    def remove(self, id: str, record: dict) -> None:
+        value = record.get(self.field)
+        if not is_hashable(value):
+            return
+        posting = self._postings.get(value)
+        if posting is not None:
+            posting.pop(id, None)
+            if not posting:
+                del self._postings[value]
+
+    def replace(self, id: str, old: dict, new: dict) -> None:
+        if old.get(self.field) == new.get(self.field):
+            return
+        self.remove(id, old)
+        self.add(id, new)
+
+    def lookup(self, value: Any) -> Dict[str, None]:
+        return self._postings.get(value, _EMPTY)
+
+
+class _SortedRun:
+    """Parallel value/id lists ordered by value, ties in insertion order."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()):
+        pairs = sorted(pairs, key=lambda pair: pair[0])
+        self.values: List[str] = [value for value, _ in pairs]
+        self.ids: List[str] = [id for _, id in pairs]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def pairs(self, positions: Iterable[int]) -> Iterator[Tuple[str, str]]:
+        for position in positions:
+            yield self.values[position], self.ids[position]
+
+    def add(self, value: str, id: str) -> None:
+        position = bisect.bisect_right(self.values, value)
+        self.values.insert(position, value)
+        self.ids.insert(position, id)
+
+    def remove(self, value: str, id: str) -> None:
+        start = bisect.bisect_left(self.values, value)
+        end = bisect.bisect_right(self.values, value, start)
+        for position in range(start, end):
+            if self.ids[position] == id:
+                del self.values[position]
+                del self.ids[position]
+                return
+
+    def bounds(self, op: str, value: str) -> Tuple[int, int]:
+        """Positions ``[start, end)`` of the entries satisfying ``op value``."""
+        values = self.values
+        if op == "eq":
+            return bisect.bisect_left(values, value), bisect.bisect_right(values, value)
+        if op == "lt":
+            return 0, bisect.bisect_left(values, value)
+        if op == "lte":
+            return 0, bisect.bisect_right(values, value)
+        if op == "gt":
+            return bisect.bisect_right(values, value), len(values)
+        if op == "gte":
+            return bisect.bisect_left(values, value), len(values)
+        if op == "prefix":
+            return (
+                bisect.bisect_left(values, value),
+                bisect.bisect_left(values, value + _MAX_CHAR),
+            )
+        raise ValueError(f"SortedIndex cannot serve '{op}'")
+
+
+class SortedIndex:
+    """Keeps the string values of one field in order, for range and prefix scans.
+
+    Only string values are indexed: ISO dates and timestamps, which is what
+    the range predicates compare; non-string values never satisfy a string
+    range anyway. A range is found with two bisections, so a scan costs
+    O(log n + k).
+
+    With ``partition_by`` the index keeps one ordered run per value of that
+    field (e.g. per task status), and :meth:`select` can restrict a range to
+    some partitions, so "due before X among open tasks" never touches the
+    closed ones.
+
+    The ids of records without a value are kept too, in id order, and other
+    non-string values are counted, so :meth:`keys` can produce a whole
+    collection in :class:`SortSpec` order when that count is zero.
+    """
+
+    def __init__(self, field: str, partition_by: Optional[str] = None):
+        self.field = field
+        self.partition_by = partition_by
+        self._runs: Dict[Any, _SortedRun] = {}
+        self._nulls: List[str] = []
+        self.unordered = 0
+
+    def _partition(self, record: dict) -> Any:
+        if self.partition_by is None:
+            return None
+        value = record.get(self.partition_by)
+        return value if is_hashable(value) else _UNHASHABLE
+
+    def build(self, records: Iterable[Tuple[str, dict]]) -> None:
+        pairs: Dict[Any, List[Tuple[str, str]]] = {}
+        nulls = []
+        self.unordered = 0
+        for id, record in records:
+            value = record.get(self.field)
+            if isinstance(value, str):
+                pairs.setdefault(self._partition(record), []).append((value, id))
+            elif value is None:
+                nulls.append(id)
+            else:
+                self.unordered += 1
+        self._runs = {partition: _SortedRun(run) for partition, run in pairs.items()}
+        self._nulls = sorted(nulls)
+
+    def add(self, id: str, record: dict) -> None:
+        value = record.get(self.field)
+        if isinstance(value, str):
+            partition = self._partition(record)
+            run = self._runs.get(partition)
+            if run is None:
+                run = self._runs[partition] = _SortedRun()
+            run.add(value, id)
+        elif value is None:
+            bisect.insort(self._nulls, id)
+        else:
+            self.unordered += 1
+
+    def remove(self, id: str, record: dict) -> None:
+        value = record.get(self.field)
+        if value is None:
+            position = bisect.bisect_left(self._nulls, id)
+            if position < len(self._nulls) and self._nulls[position] == id:
+                del self._nulls[position]
+            return
+        if not isinstance(value, str):
+            self.unordered -= 1
+            return
+        partition = self._partition(record)
+        run = self._runs.get(partition)
+        if run is not None:
+            run.remove(value, id)
+            if not run:
+                del self._runs[partition]
+
+    def replace(self, id: str, old: dict, new: dict) -> None:
+        if old.get(self.field) == new.get(self.field) and (
+            self.partition_by is None
+            or old.get(self.partition_by) == new.get(self.partition_by)
+        ):
+            return
+        self.remove(id, old)
+        self.add(id, new)
+
+    def select(
+        self,
+        conditions: Sequence[Tuple[str, str]],
+        partitions: Optional[Iterable[Any]] = None,
+    ) -> Tuple[int, Callable[[], Iterable[str]]]:
+        """Locate the ids satisfying every ``(op, value)`` condition.
+
+        ``partitions`` limits the scan to those partition values (ignored for
+        an unpartitioned index). Returns the number of matching entries and a
+        function producing their ids, ordered by value within each partition.
+        """
+        spans = []
+        for run in self._runs_in(partitions):
+            start, end = 0, len(run)
+            for op, value in conditions:
+                low, high = run.bounds(op, value)
+                start, end = max(start, low), min(end, high)
+            if start < end:
+                spans.append((run, start, end))
+        count = sum(end - start for _, start, end in spans)
+        return count, lambda: itertools.chain.from_iterable(
+            run.ids[start:end] for run, start, end in spans
+        )
+
+    def _runs_in(self, partitions: Optional[Iterable[Any]]) -> List[_SortedRun]:
+        if partitions is None or self.partition_by is None:
+            return list(self._runs.values())
+        return [self._runs[p] for p in partitions if p in self._runs]
+
+    def size(self, partitions: Optional[Iterable[Any]] = None) -> int:
+        """Entries :meth:`keys` may go through for these partitions."""
+        return sum(map(len, self._runs_in(partitions))) + len(self._nulls)
+
+    def keys(
+        self,
+        descending: bool = False,
+        after: Optional[SortKey] = None,
+        partitions: Optional[Iterable[Any]] = None,
+    ) -> Iterator[SortKey]:
+        """Yield the sort keys of the indexed records following ``after``.
+
+        Keys come in :class:`SortSpec` order: by value, ties by id, records
+        without a value last (first when ``descending``). Records of other
+        partitions than ``partitions`` are left out, except value-less ones,
+        which aren't partitioned.
+        """
+        runs = self._runs_in(partitions)
+        if descending:
+            if after is None or after[0] == 1:
+                end = len(self._nulls)
+                if after is not None:
+                    end = bisect.bisect_left(self._nulls, after[2])
+                for position in range(end - 1, -1, -1):
+                    yield (1, "", self._nulls[position])
+            streams = []
+            for run in runs:
+                end = len(run) if after is None or after[0] == 1 else (
+                    bisect.bisect_right(run.values, after[1])
+                )
+                streams.append(run.pairs(range(end - 1, -1, -1)))
+            pairs = heapq.merge(*streams, key=lambda pair: pair[0], reverse=True)
+        else:
+            streams = []
+            if after is None or after[0] == 0:
+                for run in runs:
+                    start = 0 if after is None else bisect.bisect_left(run.values, after[1])
+                    streams.append(run.pairs(range(start, len(run))))
+            pairs = heapq.merge(*streams, key=lambda pair: pair[0])
+        for value, group in itertools.groupby(pairs, key=lambda pair: pair[0]):
+            for id in sorted((id for _, id in group), reverse=descending):
+                key = (0, value, id)
+                if after is None or (key < after if descending else key > after):
+                    yield key
+        if not descending:
+            start = 0
+            if after is not None and after[0] == 1:
+                start = bisect.bisect_right(self._nulls, after[2])
+            for position in range(start, len(self._nulls)):
+                yield (1, "", self._nulls[position])
+
+
+INDEX_KINDS = {"hash": HashIndex, "sorted": SortedIndex}
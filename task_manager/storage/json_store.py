@@ -1,80 +1,947 @@
 """JSON file-based storage backend for persisting application data."""
 
-import json
+import copy
+import hashlib
+import itertools
 import os
-from typing import Dict, List, Optional
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from task_manager.metrics import METRICS
+from task_manager.storage.codec import get_codec
+from task_manager.storage.fileio import atomic_write
+from task_manager.storage.indexes import INDEX_KINDS, HashIndex, SortedIndex, is_hashable
+from task_manager.storage.locking import FileLock, ReadWriteLock
+from task_manager.storage.log import CollectionLog
+from task_manager.storage.pagination import Page, SortSpec, decode_key, page_in_order, paginate
+from task_manager.storage.query import RANGE_OPERATORS, Predicate, project
+from task_manager.storage.slowlog import SLOW_LOG_FILE, SlowLog
+from task_manager.storage.snapshot import LazyRecords, SnapshotIndex, index_path, write_snapshot
+from task_manager.storage.versions import REV_FIELD, CollectionVersion, check_revision, revision
+
+STORAGE_MODES = ("snapshot", "log")
+
+FileStat = Optional[Tuple[int, int, int]]
+
+
+def _file_stat(path: str) -> FileStat:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
 
 
 class JsonStore:
-    """Simple JSON file storage for all application entities."""
+    """Simple JSON file storage for all application entities.
+
+    In the default ``"snapshot"`` mode every mutation rewrites the whole
+    collection file. In ``"log"`` mode mutations are appended to a
+    per-collection log (see :class:`CollectionLog`) and folded into the
+    snapshot by a background compaction once ``compact_threshold`` entries
+    have accumulated, so a single write costs O(record size). Files are
+    compact JSON written and read with ``codec`` (see
+    :func:`get_codec`); ``pretty=True`` indents snapshots for reading by eye.
+
+    Compact snapshots get a ``<collection>.idx`` offset index (see
+    :mod:`task_manager.storage.snapshot`). A collection loaded through it is
+    memory-mapped and each record decoded on first access, so point lookups
+    don't parse the whole file; the first full scan decodes the rest.
+
+    Fields declared through ``indexes`` or :meth:`ensure_index` get a
+    :class:`HashIndex` (equality and ``in``) or a :class:`SortedIndex`
+    (ranges and prefixes) that :meth:`find`, :meth:`query` and :meth:`page`
+    use instead of scanning. Indexes are built the first time a collection is
+    searched and kept current by every mutation afterwards.
+
+    Snapshots are always written to a temp file and renamed into place, so a
+    crash never leaves a truncated collection; ``fsync=True`` additionally
+    forces snapshots and log appends to disk. Setting ``commit_window``
+    (seconds) and/or ``commit_batch`` (mutations) enables group commit:
+    mutations return immediately and are flushed together once the window
+    elapses or the batch fills, trading that much durability for one write
+    per burst instead of one per mutation. :meth:`flush` and :meth:`close`
+    force pending commits out.
+
+    The store is safe to share between threads and between processes using
+    the same data directory. Each collection has a reader/writer lock, and
+    every mutation also holds an advisory lock on ``<collection>.lock``.
+    Before each operation the collection files are stat'ed; if another
+    process changed them since this process last read or wrote them, the
+    collection is reloaded. Group commit defers writes past the file lock,
+    so it is only safe with a single writing process.
 
-    def __init__(self, data_dir: str = "data"):
+    Every record carries a revision in its ``_rev`` field, set on insert and
+    bumped on update; :meth:`update` and :meth:`update_many` can require the
+    current revision and raise :class:`VersionConflictError` otherwise.
+    :meth:`version` identifies the state of a whole collection: an epoch,
+    derived from the files the collection was last loaded from, plus a
+    counter of the mutations made by this process since. Another process
+    writing forces a reload and so a new epoch, so two different states never
+    share a version, though the same state may get different versions in
+    different processes.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = "data",
+        mode: str = "snapshot",
+        compact_threshold: int = 10000,
+        indexes: Optional[Dict[str, Iterable[str]]] = None,
+        fsync: bool = False,
+        commit_window: float = 0.0,
+        commit_batch: int = 0,
+        codec: str = "auto",
+        pretty: bool = False,
+        slow_ms: Optional[float] = None,
+    ):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{mode}', expected one of {STORAGE_MODES}")
         self.data_dir = data_dir
+        self.mode = mode
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.commit_window = commit_window
+        self.commit_batch = commit_batch
+        self.codec = get_codec(codec)
+        self.pretty = pretty
+        self.slow_log = (
+            SlowLog(os.path.join(data_dir, SLOW_LOG_FILE), slow_ms) if slow_ms is not None else None
+        )
+        self._group_commit = commit_window > 0 or commit_batch > 0
         os.makedirs(data_dir, exist_ok=True)
         self._collections: Dict[str, Dict[str, dict]] = {}
+        self._stamps: Dict[str, Tuple[FileStat, ...]] = {}
+        # Per collection: (epoch, mutation counter, time of the last change).
+        self._versions: Dict[str, Tuple[str, int, float]] = {}
+        self._logs: Dict[str, CollectionLog] = {}
+        self._compactions: Dict[str, threading.Thread] = {}
+        self._locks: Dict[str, ReadWriteLock] = {}
+        self._file_locks: Dict[str, FileLock] = {}
+        self._compact_locks: Dict[str, Tuple[threading.Lock, FileLock]] = {}
+        self._locks_guard = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._pending = 0
+        self._batch_full = False
+        self._timer: Optional[threading.Timer] = None
+        # Keyed by (kind, field), kind being "hash" or "sorted"; the value is
+        # the sorted index's partition field, if any.
+        self._index_fields: Dict[str, Dict[Tuple[str, str], Optional[str]]] = {}
+        self._indexes: Dict[str, Dict[Tuple[str, str], Any]] = {}
+        # Insertion ordinals for cursors, and the collections whose loaded
+        # records they currently cover.
+        self._ordinals: Dict[str, Dict[str, int]] = {}
+        self._next_ordinal: Dict[str, int] = {}
+        self._ordinals_current: Set[str] = set()
+        self._ordinals_lock = threading.Lock()
+        for collection, fields in (indexes or {}).items():
+            for field in fields:
+                self.ensure_index(collection, field)
 
     def _file_path(self, collection: str) -> str:
         return os.path.join(self.data_dir, f"{collection}.json")
 
+    def _log(self, collection: str) -> CollectionLog:
+        return self._logs[collection]
+
+    # -- Locking and cross-process freshness --
+
+    def _lock_for(self, collection: str) -> ReadWriteLock:
+        """Return the collection's lock, setting up its per-collection state."""
+        lock = self._locks.get(collection)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.get(collection)
+                if lock is None:
+                    self._logs[collection] = CollectionLog(self.data_dir, collection, self.codec)
+                    self._file_locks[collection] = FileLock(
+                        os.path.join(self.data_dir, f"{collection}.lock")
+                    )
+                    self._compact_locks[collection] = (
+                        threading.Lock(),
+                        FileLock(os.path.join(self.data_dir, f"{collection}.compact.lock")),
+                    )
+                    lock = self._locks[collection] = ReadWriteLock()
+        return lock
+
+    def _stamp(self, collection: str) -> Tuple[FileStat, ...]:
+        """Identify the on-disk state of a collection by file metadata.
+
+        In log mode the snapshot is left out: compaction rewrites it without
+        changing the collection's contents, while every real change touches
+        one of the logs.
+        """
+        if self.mode == "log":
+            log = self._log(collection)
+            return (_file_stat(log.path), _file_stat(log.rotated_path))
+        return (_file_stat(self._file_path(collection)),)
+
+    def _is_stale(self, collection: str) -> bool:
+        if collection not in self._collections:
+            return True
+        return self._stamps.get(collection) != self._stamp(collection)
+
+    @contextmanager
+    def _reading(self, collection: str) -> Iterator[Dict[str, dict]]:
+        """Hold the collection's read lock, reloading it first if stale."""
+        lock = self._lock_for(collection)
+        if self._is_stale(collection):
+            with lock.write(), self._file_locks[collection].exclusive():
+                if self._is_stale(collection):
+                    self._load(collection)
+        with lock.read():
+            yield self._collections[collection]
+
+    @contextmanager
+    def _writing(self, collection: str) -> Iterator[Dict[str, dict]]:
+        """Hold the collection's write lock and its cross-process file lock."""
+        lock = self._lock_for(collection)
+        with lock.write(), self._file_locks[collection].exclusive():
+            if self._is_stale(collection):
+                self._load(collection)
+            yield self._collections[collection]
+            self._stamps[collection] = self._stamp(collection)
+
+    # -- Indexes --
+
+    def ensure_index(
+        self,
+        collection: str,
+        field: str,
+        kind: str = "hash",
+        partition_by: Optional[str] = None,
+    ) -> None:
+        """Declare a ``"hash"`` or ``"sorted"`` index on ``field`` for ``collection``.
+
+        A sorted index may be partitioned by another field; see
+        :class:`SortedIndex`. Redeclaring an index with a different partition
+        field replaces it.
+        """
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{kind}', expected one of {list(INDEX_KINDS)}")
+        if partition_by is not None and kind != "sorted":
+            raise ValueError("Only sorted indexes can be partitioned")
+        with self._lock_for(collection).write():
+            declared = self._index_fields.setdefault(collection, {})
+            key = (kind, field)
+            if key in declared and declared[key] == partition_by:
+                return
+            declared[key] = partition_by
+            built = self._indexes.get(collection)
+            if built is not None:
+                built[key] = self._build_index(
+                    kind, field, partition_by, self._collections[collection]
+                )
+
+    def indexes(self) -> Dict[str, List[Tuple[str, str]]]:
+        """The declared ``(kind, field)`` indexes of each collection."""
+        return {collection: list(declared) for collection, declared in self._index_fields.items()}
+
+    @staticmethod
+    def _build_index(
+        kind: str, field: str, partition_by: Optional[str], records: Dict[str, dict]
+    ) -> Any:
+        index = SortedIndex(field, partition_by) if kind == "sorted" else HashIndex(field)
+        index.build(records.items())
+        return index
+
+    def _indexes_for(self, collection: str) -> Dict[Tuple[str, str], Any]:
+        """Return the collection's indexes, building them on first use.
+
+        Called with at least the read lock held; concurrent readers may both
+        build, which is harmless since they see the same records.
+        """
+        built = self._indexes.get(collection)
+        if built is None:
+            records = self._collections[collection]
+            built = {}
+            for (kind, field), partition_by in self._index_fields.get(collection, {}).items():
+                built[(kind, field)] = self._build_index(kind, field, partition_by, records)
+            self._indexes[collection] = built
+        return built
+
+    def _index_put(self, collection: str, id: str, old: Optional[dict], new: dict) -> None:
+        for index in self._indexes.get(collection, {}).values():
+            if old is None:
+                index.add(id, new)
+            else:
+                index.replace(id, old, new)
+        if old is None and collection in self._ordinals_current:
+            self._ordinals[collection][id] = self._next_ordinal[collection]
+            self._next_ordinal[collection] += 1
+
+    def _index_delete(self, collection: str, id: str, old: dict) -> None:
+        for index in self._indexes.get(collection, {}).values():
+            index.remove(id, old)
+        if collection in self._ordinals_current:
+            self._ordinals[collection].pop(id, None)
+
+    def _ordinals_for(self, collection: str, records: Dict[str, dict]) -> Dict[str, int]:
+        """Number the collection's records in insertion order; the caller holds a lock.
+
+        Numbers increase in the order the records are held in. Records keep
+        their numbers across reloads, so a cursor still finds its place after
+        the last record of its page is deleted, even by another process.
+        """
+        if collection in self._ordinals_current:
+            return self._ordinals[collection]
+        with self._ordinals_lock:
+            if collection not in self._ordinals_current:
+                previous = self._ordinals.get(collection, {})
+                next_ordinal = self._next_ordinal.get(collection, 0)
+                ordinals = {}
+                last = -1
+                for id in records.ids() if isinstance(records, LazyRecords) else records:
+                    ordinal = previous.get(id, -1)
+                    if ordinal <= last:
+                        ordinal, next_ordinal = next_ordinal, next_ordinal + 1
+                    ordinals[id] = last = ordinal
+                self._ordinals[collection] = ordinals
+                self._next_ordinal[collection] = next_ordinal
+                self._ordinals_current.add(collection)
+        return self._ordinals[collection]
+
+    # -- Persistence --
+
     def _load(self, collection: str) -> Dict[str, dict]:
-        if collection in self._collections:
-            return self._collections[collection]
+        """(Re)read a collection from disk; the caller holds its locks."""
+        start = time.perf_counter()
         path = self._file_path(collection)
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                self._collections[collection] = json.load(f)
+        base = None if self.pretty else SnapshotIndex.open(path)
+        if base is not None:
+            records = LazyRecords(base, self.codec.decode)
+        elif os.path.exists(path):
+            with open(path, "rb") as f:
+                records = self.codec.decode(f.read())
+        else:
+            records = {}
+        log = self._log(collection)
+        # Another process may have rotated the log under our append handle.
+        log.close()
+        if log.exists():
+            log.replay(records)
+        self._collections[collection] = records
+        self._indexes.pop(collection, None)
+        self._ordinals_current.discard(collection)
+        if self.mode == "snapshot" and log.exists():
+            # Switching back from log mode: fold the log in once.
+            self._save(collection)
+            log.clear()
+        stamp = self._stamps[collection] = self._stamp(collection)
+        mtimes = [s[0] / 1e9 for s in stamp if s is not None]
+        if mtimes:
+            epoch = hashlib.blake2s(repr(stamp).encode(), digest_size=6).hexdigest()
+            self._versions[collection] = (epoch, 0, max(mtimes))
         else:
-            self._collections[collection] = {}
-        return self._collections[collection]
+            # Nothing on disk to derive an epoch from that a later, different
+            # empty collection wouldn't share.
+            self._versions[collection] = (uuid.uuid4().hex[:12], 0, time.time())
+        METRICS.observe("store_load_seconds", time.perf_counter() - start, collection=collection)
+        self._log_slow(start, collection, "load", scanned=len(records))
+        return records
 
-    def _save(self, collection: str) -> None:
+    def _write_snapshot(
+        self, collection: str, records: Dict[str, dict]
+    ) -> Optional[SnapshotIndex]:
+        """Write a snapshot file; returns its index unless it is pretty-printed."""
         path = self._file_path(collection)
-        with open(path, "w") as f:
-            json.dump(self._collections.get(collection, {}), f, indent=2)
+        start = time.perf_counter()
+        with METRICS.timer("store_save_seconds", collection=collection):
+            if not self.pretty:
+                base = write_snapshot(path, records, self.codec, fsync=self.fsync)
+            else:
+                base = None
+                atomic_write(
+                    path,
+                    lambda f: f.write(self.codec.encode(dict(records), pretty=True)),
+                    fsync=self.fsync,
+                    binary=True,
+                )
+                try:
+                    os.remove(index_path(path))
+                except FileNotFoundError:
+                    pass
+        slow = self.slow_log is not None and self.slow_log.is_slow(time.perf_counter() - start)
+        if METRICS.enabled or slow:
+            written = os.path.getsize(path)
+            METRICS.inc("store_bytes_written_total", written, collection=collection)
+            if slow:
+                self._log_slow(start, collection, "save", scanned=len(records), written=written)
+        return base
+
+    def _save(self, collection: str) -> None:
+        records = self._collections.get(collection, {})
+        base = self._write_snapshot(collection, records)
+        if base is not None and isinstance(records, LazyRecords) and not records.materialized:
+            # Drop the overlay of changes now that the file holds them.
+            records.rebase(base)
+
+    def _persist(
+        self, collection: str, puts: Dict[str, dict], deletes: Iterable[str] = ()
+    ) -> None:
+        """Record a set of mutations already applied in memory, in one write."""
+        deletes = list(deletes)
+        epoch, counter, _ = self._versions[collection]
+        self._versions[collection] = (epoch, counter + 1, time.time())
+        if self.mode == "log":
+            written = self._log(collection).append(puts, deletes)
+            METRICS.inc("store_bytes_written_total", written, collection=collection)
+        self._commit(collection, len(puts) + len(deletes))
+
+    def _commit(self, collection: str, mutations: int) -> None:
+        """Make mutations durable now, or defer them to the next group commit."""
+        if not self._group_commit:
+            self._flush_collection(collection)
+            return
+        with self._commit_lock:
+            self._dirty.add(collection)
+            self._pending += mutations
+            if 0 < self.commit_batch <= self._pending:
+                self._batch_full = True
+            elif self.commit_window > 0 and self._timer is None:
+                self._timer = threading.Timer(self.commit_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_collection(self, collection: str) -> None:
+        if self.mode == "snapshot":
+            self._save(collection)
+        elif self.fsync:
+            self._log(collection).sync()
+
+    def _after_write(self, collection: str) -> None:
+        """Follow-up work run once a mutation has released its locks."""
+        if self._batch_full:
+            self.flush()
+        self._maybe_compact(collection)
+
+    def flush(self) -> None:
+        """Write out every mutation deferred by group commit."""
+        with self._flush_lock:
+            with self._commit_lock:
+                dirty, self._dirty = self._dirty, set()
+                self._pending = 0
+                self._batch_full = False
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for collection in dirty:
+                with self._lock_for(collection).write(), self._file_locks[collection].exclusive():
+                    self._flush_collection(collection)
+                    self._stamps[collection] = self._stamp(collection)
+
+    def _maybe_compact(self, collection: str) -> None:
+        if self.mode != "log" or self._log(collection).entries < self.compact_threshold:
+            return
+        running = self._compactions.get(collection)
+        if running is not None and running.is_alive():
+            return
+        thread = threading.Thread(
+            target=self.compact, args=(collection,), name=f"compact-{collection}", daemon=True
+        )
+        self._compactions[collection] = thread
+        thread.start()
+
+    def compact(self, collection: str) -> None:
+        """Fold the collection's log into a fresh snapshot file.
+
+        Only the log rotation and the final cleanup hold the collection locks;
+        the snapshot itself is written while other threads and processes keep
+        appending to the fresh log. A separate ``<collection>.compact.lock``
+        keeps two processes from compacting at once.
+        """
+        self._lock_for(collection)
+        thread_lock, file_lock = self._compact_locks[collection]
+        log = self._log(collection)
+        with thread_lock, file_lock.exclusive():
+            with self._writing(collection) as records:
+                snapshot = records.copy()
+                log.rotate()
+            self._write_snapshot(collection, snapshot)
+            with self._writing(collection):
+                log.discard_rotated()
+
+    def close(self) -> None:
+        """Flush pending commits, wait for compactions and release files."""
+        self.flush()
+        for thread in list(self._compactions.values()):
+            thread.join()
+        for collection, lock in list(self._locks.items()):
+            with lock.write():
+                self._log(collection).close()
+                self._file_locks[collection].close()
+                self._compact_locks[collection][1].close()
+
+    # -- Public API --
 
     def insert(self, collection: str, id: str, data: dict) -> dict:
         """Insert a new record into a collection."""
-        records = self._load(collection)
-        if id in records:
-            raise ValueError(f"Record with id '{id}' already exists in '{collection}'")
-        records[id] = data
-        self._save(collection)
+        with self._writing(collection) as records:
+            if id in records:
+                raise ValueError(f"Record with id '{id}' already exists in '{collection}'")
+            data[REV_FIELD] = 1
+            records[id] = data
+            self._index_put(collection, id, None, data)
+            self._persist(collection, {id: data})
+        self._after_write(collection)
         return data
 
+    def insert_many(self, collection: str, items: Dict[str, dict]) -> List[dict]:
+        """Insert several records with a single persist.
+
+        Nothing is inserted if any id already exists.
+        """
+        with self._writing(collection) as records:
+            existing = [id for id in items if id in records]
+            if existing:
+                raise ValueError(
+                    f"Records with ids {existing} already exist in '{collection}'"
+                )
+            for id, data in items.items():
+                data[REV_FIELD] = 1
+                records[id] = data
+                self._index_put(collection, id, None, data)
+            self._persist(collection, items)
+        self._after_write(collection)
+        return list(items.values())
+
     def get(self, collection: str, id: str) -> Optional[dict]:
         """Get a single record by ID."""
-        records = self._load(collection)
-        return records.get(id)
+        with self._reading(collection) as records:
+            return records.get(id)
+
+    def get_many(self, collection: str, ids: Iterable[str]) -> Dict[str, dict]:
+        """Get several records by ID under one lock; missing ids are left out."""
+        with self._reading(collection) as records:
+            found = {}
+            for id in ids:
+                record = records.get(id)
+                if record is not None:
+                    found[id] = record
+            return found
 
     def get_all(self, collection: str) -> List[dict]:
         """Get all records in a collection."""
-        records = self._load(collection)
-        return list(records.values())
-
-    def update(self, collection: str, id: str, data: dict) -> dict:
-        """Update an existing record."""
-        records = self._load(collection)
-        if id not in records:
-            raise ValueError(f"Record with id '{id}' not found in '{collection}'")
-        records[id] = data
-        self._save(collection)
+        start = time.perf_counter()
+        with self._reading(collection) as records:
+            found = list(records.values())
+        self._log_slow(
+            start, collection, "get_all", access="all", scanned=len(found), returned=len(found)
+        )
+        return found
+
+    def update(
+        self, collection: str, id: str, data: dict, expected_rev: Optional[int] = None
+    ) -> dict:
+        """Update an existing record, bumping its revision.
+
+        With ``expected_rev``, raise :class:`VersionConflictError` unless the
+        stored record is still at that revision.
+        """
+        with self._writing(collection) as records:
+            if id not in records:
+                raise ValueError(f"Record with id '{id}' not found in '{collection}'")
+            data[REV_FIELD] = check_revision(collection, id, records[id], expected_rev) + 1
+            self._index_put(collection, id, records[id], data)
+            records[id] = data
+            self._persist(collection, {id: data})
+        self._after_write(collection)
         return data
 
-    def delete(self, collection: str, id: str) -> bool:
-        """Delete a record by ID."""
-        records = self._load(collection)
-        if id not in records:
-            return False
-        del records[id]
-        self._save(collection)
+    def update_many(
+        self,
+        collection: str,
+        items: Dict[str, dict],
+        expected_revs: Optional[Dict[str, int]] = None,
+    ) -> List[dict]:
+        """Update several existing records with a single persist.
+
+        Nothing is updated if any id is missing or, with ``expected_revs``,
+        if any of those records has moved past its expected revision.
+        """
+        expected_revs = expected_revs or {}
+        with self._writing(collection) as records:
+            missing = [id for id in items if id not in records]
+            if missing:
+                raise ValueError(f"Records with ids {missing} not found in '{collection}'")
+            revs = {
+                id: check_revision(collection, id, records[id], expected_revs.get(id))
+                for id in items
+            }
+            for id, data in items.items():
+                data[REV_FIELD] = revs[id] + 1
+                self._index_put(collection, id, records[id], data)
+                records[id] = data
+            self._persist(collection, items)
+        self._after_write(collection)
+        return list(items.values())
+
+    def update_with(
+        self, collection: str, changes: Dict[str, Callable[[Optional[dict]], Optional[dict]]]
+    ) -> Dict[str, Optional[dict]]:
+        """Read, modify and write records in one step, atomically across processes.
+
+        Each function in ``changes`` gets a copy of its record (None if it
+        doesn't exist) and returns the new record, which is inserted or
+        updated, or None to delete it. Nothing is written if a function
+        raises. Returns the new records by id.
+        """
+        with self._writing(collection) as records:
+            updates = {}
+            for id, change in changes.items():
+                old = records.get(id)
+                updates[id] = (old, change(copy.deepcopy(old)))
+            puts, deletes = {}, []
+            for id, (old, new) in updates.items():
+                if new is None:
+                    if old is not None:
+                        self._index_delete(collection, id, records.pop(id))
+                        deletes.append(id)
+                    continue
+                new[REV_FIELD] = 1 if old is None else revision(old) + 1
+                self._index_put(collection, id, old, new)
+                records[id] = new
+                puts[id] = new
+            if puts or deletes:
+                self._persist(collection, puts, deletes)
+        if puts or deletes:
+            self._after_write(collection)
+        return {id: new for id, (_, new) in updates.items()}
+
+    def delete(self, collection: str, id: str, expected_rev: Optional[int] = None) -> bool:
+        """Delete a record by ID.
+
+        With ``expected_rev``, raise :class:`VersionConflictError` unless the
+        stored record is still at that revision.
+        """
+        with self._writing(collection) as records:
+            if id not in records:
+                return False
+            check_revision(collection, id, records[id], expected_rev)
+            self._index_delete(collection, id, records.pop(id))
+            self._persist(collection, {}, [id])
+        self._after_write(collection)
         return True
 
+    def delete_many(self, collection: str, ids: Iterable[str]) -> int:
+        """Delete several records with a single persist; returns how many existed."""
+        with self._writing(collection) as records:
+            deleted = []
+            for id in dict.fromkeys(ids):
+                if id in records:
+                    self._index_delete(collection, id, records.pop(id))
+                    deleted.append(id)
+            if deleted:
+                self._persist(collection, {}, deleted)
+        if deleted:
+            self._after_write(collection)
+        return len(deleted)
+
+    def revision(self, collection: str, id: str) -> Optional[int]:
+        """Return a record's revision, or None if it doesn't exist."""
+        with self._reading(collection) as records:
+            return revision(records.get(id))
+
+    def version(self, collection: str) -> CollectionVersion:
+        """Return the current version of a collection; see the class docstring."""
+        with self._reading(collection):
+            epoch, counter, modified = self._versions[collection]
+        return CollectionVersion(f"{epoch}.{counter}", modified)
+
     def find(self, collection: str, **filters) -> List[dict]:
-        """Find records matching all provided field filters."""
-        records = self._load(collection)
-        results = []
-        for record in records.values():
-            match = all(record.get(k) == v for k, v in filters.items())
-            if match:
-                results.append(record)
-        return results
+        """Find records matching all provided field filters.
+
+        Filters on indexed fields are answered by intersecting their posting
+        sets, smallest first; any remaining filters are checked against the
+        intersection only.
+        """
+        start = time.perf_counter()
+        with self._reading(collection) as records:
+            ids, access, scanned = self._match_ids(collection, records, filters)
+            found = [records[id] for id in ids]
+        self._log_slow(
+            start, collection, "find", filters, access=access, scanned=scanned, returned=len(found)
+        )
+        return found
+
+    def query(
+        self,
+        collection: str,
+        where: Sequence[Predicate] = (),
+        sort: Optional[SortSpec] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        """Return records matching every predicate, optionally sorted and limited.
+
+        See :meth:`explain` for how the predicates are answered, and
+        :meth:`page` for ``fields``.
+        """
+        return self.page(collection, limit, sort=sort, where=where, fields=fields).items
+
+    def explain(
+        self,
+        collection: str,
+        filters: Optional[Dict[str, Any]] = None,
+        where: Sequence[Predicate] = (),
+    ) -> Dict[str, Any]:
+        """Describe how a query would be answered.
+
+        Every predicate an index can serve is costed: equality and ``in`` on a
+        hash index by posting size, ranges, prefixes and equality on a sorted
+        index by bisection (all bounds on one field are combined). The
+        cheapest one produces the candidates, which are intersected with the
+        other hash postings (smallest first) before the remaining predicates
+        are checked against the records; without a usable index the collection is
+        scanned. Returns ``{"access": "hash" | "sorted" | "scan", "field": ...,
+        "estimated": rows}``.
+        """
+        with self._reading(collection) as records:
+            predicates = self._predicates(filters or {}, where)
+            paths = self._access_paths(collection, predicates)
+            if not paths:
+                return {"access": "scan", "field": None, "estimated": len(records)}
+            estimated, kind, field, _ = min(paths, key=lambda path: path[0])
+            return {"access": kind, "field": field, "estimated": estimated}
+
+    def iterate(
+        self,
+        collection: str,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        where: Sequence[Predicate] = (),
+    ) -> Iterator[dict]:
+        """Yield matching records one at a time without holding the lock.
+
+        The matching ids are captured up front; records are then fetched in
+        batches under a short read lock each, so a slow consumer never blocks
+        writers. Records deleted meanwhile are skipped, updated ones are
+        yielded in their latest state.
+        """
+        with self._reading(collection) as records:
+            ids, _, _ = self._match_ids(collection, records, filters or {}, where)
+        for start in range(0, len(ids), batch_size):
+            with self._reading(collection) as records:
+                batch = [records.get(id) for id in ids[start:start + batch_size]]
+            for record in batch:
+                if record is not None:
+                    yield record
+
+    def page(
+        self,
+        collection: str,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        sort: Optional[SortSpec] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        where: Sequence[Predicate] = (),
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[dict]:
+        """Return one page of matching records and the cursor for the next.
+
+        ``filters`` are equality conditions, ``where`` any further predicates.
+        See :func:`paginate` for the ordering and cursor rules; without a sort
+        records come in insertion order. With ``fields``, the records returned
+        are new dicts holding just those fields.
+        """
+        start = time.perf_counter()
+        with self._reading(collection) as records:
+            page, access, scanned = self._page(
+                collection, records, limit, cursor, sort, filters or {}, where
+            )
+        if fields is not None:
+            page = page.map(lambda record: project(record, fields))
+        METRICS.observe("store_query_seconds", time.perf_counter() - start, collection=collection)
+        self._log_slow(
+            start, collection, "page", filters, where, sort=sort.field if sort else None,
+            access=access, scanned=scanned, returned=len(page.items),
+        )
+        return page
+
+    def _page(
+        self,
+        collection: str,
+        records: Dict[str, dict],
+        limit: Optional[int],
+        cursor: Optional[str],
+        sort: Optional[SortSpec],
+        filters: Dict[str, Any],
+        where: Sequence[Predicate],
+    ) -> Tuple[Page[dict], str, int]:
+        """A page, its access path and the records examined; the caller holds the read lock."""
+        if sort is not None:
+            walked = self._walk_sort_index(collection, records, limit, cursor, sort, filters, where)
+            if walked is not None:
+                return walked
+        ids, access, scanned = self._match_ids(collection, records, filters, where)
+        ordinals = None
+        if sort is None:
+            ordinals = self._ordinals_for(collection, records)
+            if access not in ("all", "scan"):
+                # Index postings aren't in insertion order.
+                ids.sort(key=ordinals.__getitem__)
+        return paginate(records, ids, limit, cursor, sort, ordinals), access, scanned
+
+    def _walk_sort_index(
+        self,
+        collection: str,
+        records: Dict[str, dict],
+        limit: Optional[int],
+        cursor: Optional[str],
+        sort: SortSpec,
+        filters: Dict[str, Any],
+        where: Sequence[Predicate],
+    ) -> Optional[Tuple[Page[dict], str, int]]:
+        """Serve a sorted page from a sorted index on the sort field, when that pays.
+
+        Sorting the matches costs all of them on every page; walking the index
+        from the cursor costs about ``limit`` over the share of the index
+        that matches. Returns None to leave the page to :func:`paginate`.
+        """
+        if sort.ranks is not None or limit is None:
+            return None
+        index = self._indexes_for(collection).get(("sorted", sort.field))
+        if index is None or index.unordered:
+            return None
+        predicates = self._predicates(filters, where)
+        partitions = self._partitions(index.partition_by, predicates)
+        paths = self._access_paths(collection, predicates) if predicates else []
+        if paths:
+            matches = min(path[0] for path in paths)
+            if matches * matches < (limit + 1) * index.size(partitions):
+                return None
+        keys = index.keys(sort.descending, decode_key(cursor), partitions)
+        page, examined = page_in_order(
+            records, keys, lambda record: all(p.matches(record) for p in predicates), limit
+        )
+        self._count_lookup(collection, "sorted", examined)
+        return page, "sorted", examined
+
+    @staticmethod
+    def _predicates(filters: Dict[str, Any], where: Sequence[Predicate]) -> List[Predicate]:
+        predicates = [Predicate(k, "eq", v) for k, v in filters.items()]
+        predicates.extend(where)
+        return predicates
+
+    def _match_ids(
+        self,
+        collection: str,
+        records: Dict[str, dict],
+        filters: Dict[str, Any],
+        where: Sequence[Predicate] = (),
+    ) -> Tuple[List[str], str, int]:
+        """Match ``filters`` and ``where``; the caller holds the read lock.
+
+        Returns the matching ids, the access path used (``all``, ``hash``,
+        ``sorted`` or ``scan``) and the number of records it went through.
+        """
+        predicates = self._predicates(filters, where)
+        if not predicates:
+            METRICS.inc("store_lookups_total", collection=collection, access="all")
+            ids = list(records.ids() if isinstance(records, LazyRecords) else records)
+            return ids, "all", len(ids)
+        paths = self._access_paths(collection, predicates)
+        if not paths:
+            self._count_lookup(collection, "scan", len(records))
+            ids = [
+                id for id, record in records.items()
+                if all(p.matches(record) for p in predicates)
+            ]
+            return ids, "scan", len(records)
+        _, kind, _, candidates = min(paths, key=lambda path: path[0])
+        # Intersect the hash postings, smallest first, before reading any record.
+        indexes = self._indexes_for(collection)
+        postings = [self._hash_postings(indexes, p) for p in predicates]
+        others = sorted((ps for ps in postings if ps is not None), key=lambda ps: sum(map(len, ps)))
+        source = itertools.chain.from_iterable(others.pop(0)) if kind == "hash" else candidates()
+        ids = [
+            id for id in source
+            if all(any(id in posting for posting in ps) for ps in others)
+        ]
+        self._count_lookup(collection, kind, len(ids))
+        return [id for id in ids if all(p.matches(records[id]) for p in predicates)], kind, len(ids)
+
+    def _log_slow(
+        self,
+        start: float,
+        collection: str,
+        op: str,
+        filters: Optional[Dict[str, Any]] = None,
+        where: Sequence[Predicate] = (),
+        **details: Any,
+    ) -> None:
+        """Add an operation that began at ``start`` to the slow log, if it was slow."""
+        if self.slow_log is None:
+            return
+        elapsed = time.perf_counter() - start
+        if not self.slow_log.is_slow(elapsed):
+            return
+        shape = sorted({f"{p.field} {p.op}" for p in self._predicates(filters or {}, where)})
+        self.slow_log.record(collection, op, elapsed, filters=shape, **details)
+
+    @staticmethod
+    def _count_lookup(collection: str, access: str, examined: int) -> None:
+        if METRICS.enabled:
+            METRICS.inc("store_lookups_total", collection=collection, access=access)
+            METRICS.inc("store_records_examined_total", examined, collection=collection)
+
+    def _access_paths(
+        self, collection: str, predicates: List[Predicate]
+    ) -> List[Tuple[int, str, str, Callable[[], Iterable[str]]]]:
+        """Index accesses able to narrow ``predicates``: (rows, kind, field, ids)."""
+        indexes = self._indexes_for(collection)
+        paths = []
+        conditions: Dict[str, List[Tuple[str, str]]] = {}
+        for p in predicates:
+            postings = self._hash_postings(indexes, p)
+            if postings is not None:
+                paths.append((
+                    sum(map(len, postings)), "hash", p.field,
+                    lambda postings=postings: itertools.chain.from_iterable(postings),
+                ))
+            sorted_index = indexes.get(("sorted", p.field))
+            if (
+                sorted_index is not None
+                and isinstance(p.value, str)
+                and (p.op in RANGE_OPERATORS or p.op in ("eq", "prefix"))
+            ):
+                conditions.setdefault(p.field, []).append((p.op, p.value))
+        for field, bounds in conditions.items():
+            index = indexes[("sorted", field)]
+            partitions = self._partitions(index.partition_by, predicates)
+            estimated, ids = index.select(bounds, partitions)
+            paths.append((estimated, "sorted", field, ids))
+        return paths
+
+    @staticmethod
+    def _hash_postings(
+        indexes: Dict[Tuple[str, str], Any], p: Predicate
+    ) -> Optional[List[Dict[str, None]]]:
+        """The postings whose union an eq/in predicate selects, if a hash index serves it."""
+        index = indexes.get(("hash", p.field))
+        if index is None:
+            return None
+        if p.op == "eq" and is_hashable(p.value):
+            return [index.lookup(p.value)]
+        if p.op == "in" and all(map(is_hashable, p.value)):
+            return [index.lookup(v) for v in dict.fromkeys(p.value)]
+        return None
+
+    @staticmethod
+    def _partitions(partition_by: Optional[str], predicates: List[Predicate]) -> Optional[list]:
+        """Partition values an eq/in predicate restricts ``partition_by`` to, if any."""
+        if partition_by is None:
+            return None
+        for p in predicates:
+            if p.field != partition_by:
+                continue
+            if p.op == "eq" and is_hashable(p.value):
+                return [p.value]
+            if p.op == "in" and all(map(is_hashable, p.value)):
+                return list(dict.fromkeys(p.value))
+        return None
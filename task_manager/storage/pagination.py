@@ -0,0 +1,186 @@
+"""Sorting and cursor pagination shared by the storage backends."""
+
+import base64
+import binascii
+import bisect
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# (is_null, value_or_rank, id): nulls sort after every value, ids break ties.
+SortKey = Tuple[int, Any, str]
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results plus the cursor for the next one, if any."""
+
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+    def map(self, fn: Callable[[T], U]) -> "Page[U]":
+        return Page([fn(item) for item in self.items], self.next_cursor)
+
+
+@dataclass(frozen=True)
+class SortSpec:
+    """Order records by one field, optionally through a rank table.
+
+    ``ranks`` maps categorical values (e.g. priorities) to their sort
+    position; values missing from it sort after all ranked ones.
+    """
+
+    field: str
+    descending: bool = False
+    ranks: Optional[Dict[str, int]] = field(default=None, hash=False)
+
+    def key(self, id: str, record: dict) -> SortKey:
+        value = record.get(self.field)
+        if self.ranks is not None:
+            return (int(value is None), self.ranks.get(value, len(self.ranks)), id)
+        if value is None:
+            return (1, "", id)
+        return (0, value, id)
+
+
+def parse_sort(
+    sort: Optional[str], allowed: Dict[str, Optional[Dict[str, int]]]
+) -> Optional[SortSpec]:
+    """Turn ``"field"`` / ``"-field"`` into a SortSpec for an allowed field."""
+    if not sort:
+        return None
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in allowed:
+        raise ValueError(f"Cannot sort by '{name}', expected one of {sorted(allowed)}")
+    return SortSpec(name, descending=descending, ranks=allowed[name])
+
+
+def encode_cursor(position: Any) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+def decode_position(cursor: Optional[str]) -> Optional[Tuple[int, str]]:
+    """Decode a cursor for insertion-order pages: the last item's ordinal and id."""
+    if cursor is None:
+        return None
+    position = decode_cursor(cursor)
+    if (
+        not isinstance(position, list)
+        or len(position) != 2
+        or not isinstance(position[0], int)
+        or not isinstance(position[1], str)
+    ):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return position[0], position[1]
+
+
+def decode_key(cursor: Optional[str]) -> Optional[SortKey]:
+    """Decode a cursor for sorted pages: the sort key of the last item."""
+    if cursor is None:
+        return None
+    position = decode_cursor(cursor)
+    if not isinstance(position, list) or len(position) != 3:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return (position[0], position[1], position[2])
+
+
+class _OrdinalView:
+    """The ordinals of ``ids`` as a sequence, looked up only where bisect probes."""
+
+    __slots__ = ("ids", "ordinals")
+
+    def __init__(self, ids: List[str], ordinals: Dict[str, int]):
+        self.ids = ids
+        self.ordinals = ordinals
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, position: int) -> int:
+        return self.ordinals[self.ids[position]]
+
+
+def paginate(
+    records: Dict[str, dict],
+    ids: List[str],
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    sort: Optional[SortSpec] = None,
+    ordinals: Optional[Dict[str, int]] = None,
+) -> Page[dict]:
+    """Page through ``ids`` of an in-memory id->record map.
+
+    Without ``sort``, ``ids`` must be in insertion order and ``ordinals``
+    number them increasingly; the cursor is the last item's ordinal and id.
+    With ``sort`` the cursor is the last item's sort key. Either way, pages
+    stay stable while records are inserted or deleted in between.
+    """
+    if sort is None:
+        if ordinals is None:
+            raise ValueError("Insertion-order pages need the records' ordinals")
+        after = decode_position(cursor)
+        start = 0
+        if after is not None:
+            # The last item's current ordinal, unless it has been deleted since.
+            last = ordinals.get(after[1], after[0])
+            start = bisect.bisect_right(_OrdinalView(ids, ordinals), last)
+        end = len(ids) if limit is None else start + limit
+        selected = ids[start:end]
+        next_cursor = None
+        if end < len(ids) and selected:
+            next_cursor = encode_cursor([ordinals[selected[-1]], selected[-1]])
+        return Page([records[id] for id in selected], next_cursor)
+    keys = sorted(sort.key(id, records[id]) for id in ids)
+    after = decode_key(cursor)
+    if sort.descending:
+        end = len(keys) if after is None else bisect.bisect_left(keys, after)
+        start = 0 if limit is None else max(0, end - limit)
+        selected = keys[start:end][::-1]
+        has_more = start > 0
+    else:
+        start = 0 if after is None else bisect.bisect_right(keys, after)
+        end = len(keys) if limit is None else start + limit
+        selected = keys[start:end]
+        has_more = end < len(keys)
+    next_cursor = encode_cursor(list(selected[-1])) if has_more and selected else None
+    return Page([records[key[2]] for key in selected], next_cursor)
+
+
+def page_in_order(
+    records: Dict[str, dict],
+    keys: Iterable[SortKey],
+    match: Callable[[dict], bool],
+    limit: Optional[int],
+) -> Tuple[Page[dict], int]:
+    """Take a page of records matching ``match`` from sort keys already in page order.
+
+    ``keys`` would typically come from a sorted index (see
+    :meth:`SortedIndex.keys`), so a page costs the records it goes through
+    rather than a sort of every match. Returns the page and that count.
+    """
+    items: List[dict] = []
+    last: Optional[SortKey] = None
+    examined = 0
+    for key in keys:
+        record = records[key[2]]
+        examined += 1
+        if not match(record):
+            continue
+        if limit is not None and len(items) == limit:
+            return Page(items, encode_cursor(list(last)) if items else None), examined
+        items.append(record)
+        last = key
+    return Page(items), examined
@@ -0,0 +1,100 @@
+"""Query predicates shared by the storage backends.
+
+A query is a list of :class:`Predicate` objects ANDed together. Build them
+with the helpers below, e.g. ``[in_("priority", ["high", "critical"]),
+lt("due_date", "2026-03-01")]``, and pass them as ``where`` to ``query()``,
+``page()`` or ``iterate()``. ``query()`` and ``page()`` also take
+``fields``, to return just those fields of each record; see :func:`project`.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+
+OPERATORS = ("eq", "in", "lt", "lte", "gt", "gte", "prefix", "exists")
+RANGE_OPERATORS = ("lt", "lte", "gt", "gte")
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """One condition on one field of a record.
+
+    ``eq`` and ``in`` compare with ``==``; the range operators compare with
+    ``<``/``>`` and never match a missing value or one of another type;
+    ``prefix`` matches strings starting with ``value``; ``exists`` matches
+    records whose field is set (``value=True``) or unset/null (``False``).
+    """
+
+    field: str
+    op: str
+    value: Any = None
+
+    def __post_init__(self):
+        if self.op not in OPERATORS:
+            raise ValueError(f"Unknown operator '{self.op}', expected one of {OPERATORS}")
+        if self.op == "in":
+            object.__setattr__(self, "value", tuple(self.value))
+        elif self.op == "prefix" and not isinstance(self.value, str):
+            raise ValueError("prefix predicates need a string value")
+
+    def matches(self, record: dict) -> bool:
+        actual = record.get(self.field)
+        op = self.op
+        if op == "eq":
+            return actual == self.value
+        if op == "in":
+            return actual in self.value
+        if op == "exists":
+            return (actual is not None) == bool(self.value)
+        if op == "prefix":
+            return isinstance(actual, str) and actual.startswith(self.value)
+        if actual is None:
+            return False
+        try:
+            if op == "lt":
+                return actual < self.value
+            if op == "lte":
+                return actual <= self.value
+            if op == "gt":
+                return actual > self.value
+            return actual >= self.value
+        except TypeError:
+            return False
+
+
+def eq(field: str, value: Any) -> Predicate:
+    return Predicate(field, "eq", value)
+
+
+def in_(field: str, values: Iterable[Any]) -> Predicate:
+    return Predicate(field, "in", values)
+
+
+def lt(field: str, value: Any) -> Predicate:
+    return Predicate(field, "lt", value)
+
+
+def lte(field: str, value: Any) -> Predicate:
+    return Predicate(field, "lte", value)
+
+
+def gt(field: str, value: Any) -> Predicate:
+    return Predicate(field, "gt", value)
+
+
+def gte(field: str, value: Any) -> Predicate:
+    return Predicate(field, "gte", value)
+
+
+def prefix(field: str, value: str) -> Predicate:
+    return Predicate(field, "prefix", value)
+
+
+def exists(field: str, present: bool = True) -> Predicate:
+    return Predicate(field, "exists", present)
+
+
+def project(record: dict, fields: Optional[Sequence[str]]) -> dict:
+    """Keep only ``fields`` of ``record`` (all of it for None); missing ones are left out."""
+    if fields is None:
+        return record
+    return {f: record[f] for f in fields if f in record}
@@ -0,0 +1,224 @@
+"""A rolling on-disk log of slow store operations, and a report over it.
+
+:class:`JsonStore` records every read, load and snapshot write that takes
+longer than a threshold as one JSON line:
+
+    {"ts": "...", "collection": "tasks", "op": "find", "ms": 182.4,
+     "filters": ["assigned_to eq", "status eq"], "sort": null,
+     "access": "scan", "scanned": 48210, "returned": 12, "bytes": null}
+
+``filters`` is the query's *shape*: its field/operator pairs without the
+values, so queries that differ only in their values group together.
+``access`` is the access path the store chose (``all``, ``hash``,
+``sorted`` or ``scan``). :func:`slow_report` ranks the shapes by total time
+and suggests the indexes that would have narrowed them.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from task_manager.storage.query import RANGE_OPERATORS
+
+SLOW_LOG_FILE = "slow_ops.log"
+
+# A shape served by an index still counts as poorly served when it reads
+# this many times more records than it returns.
+SCAN_RATIO = 4
+
+READ_OPS = ("find", "get_all", "page")
+
+
+class SlowLog:
+    """Append-only log of operations slower than ``threshold_ms``.
+
+    The file is rotated to ``<path>.1`` ... ``<path>.<backups>`` when it
+    grows past ``max_bytes``. Each entry is a single short ``write`` in
+    append mode, so processes sharing a data directory can log to the same
+    file; rotation is per process and may rarely drop a concurrent entry.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold_ms: float = 100.0,
+        max_bytes: int = 1 << 20,
+        backups: int = 3,
+    ):
+        if threshold_ms < 0:
+            raise ValueError("threshold_ms must not be negative")
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def is_slow(self, seconds: float) -> bool:
+        return seconds * 1000 >= self.threshold_ms
+
+    def record(
+        self,
+        collection: str,
+        op: str,
+        seconds: float,
+        filters: Sequence[str] = (),
+        sort: Optional[str] = None,
+        access: Optional[str] = None,
+        scanned: Optional[int] = None,
+        returned: Optional[int] = None,
+        written: Optional[int] = None,
+    ) -> None:
+        entry = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "collection": collection,
+            "op": op,
+            "ms": round(seconds * 1000, 3),
+            "filters": list(filters),
+            "sort": sort,
+            "access": access,
+            "scanned": scanned,
+            "returned": returned,
+            "bytes": written,
+        }
+        line = (json.dumps(entry) + "\n").encode()
+        with self._lock:
+            try:
+                if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+            except FileNotFoundError:
+                pass
+            with open(self.path, "ab") as f:
+                f.write(line)
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def read_entries(path: str, backups: int = 3) -> Iterator[dict]:
+    """Yield the entries of a slow log and its rotated files, oldest first.
+
+    Lines that aren't valid JSON (e.g. cut short by a crash) are skipped.
+    """
+    paths = [f"{path}.{i}" for i in range(backups, 0, -1)] + [path]
+    for name in paths:
+        try:
+            f = open(name, "rb")
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _suggest(filters: Sequence[str], indexed: Set[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """(kind, field) indexes that would serve ``filters`` and don't exist yet."""
+    suggestions = []
+    for shape in filters:
+        field, _, op = shape.partition(" ")
+        if op in ("eq", "in"):
+            kind = "hash"
+        elif op in RANGE_OPERATORS or op == "prefix":
+            kind = "sorted"
+        else:
+            continue
+        if (kind, field) in indexed or (op == "eq" and ("sorted", field) in indexed):
+            continue
+        if (kind, field) not in suggestions:
+            suggestions.append((kind, field))
+    return suggestions
+
+
+def slow_report(
+    entries: Iterable[dict],
+    indexed: Optional[Dict[str, Iterable[Tuple[str, str]]]] = None,
+    top: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Summarize slow-log entries.
+
+    Returns a dict with:
+
+    * ``shapes``: reads grouped by collection, operation, filter shape and
+      sort field, worst total time first, with their count, total, p95 and
+      max milliseconds, the most frequent access path and the mean records
+      scanned and returned;
+    * ``writes``: loads and saves per collection, likewise, with mean bytes
+      written;
+    * ``indexes``: suggested ``(collection, kind, field)`` indexes, each with
+      the total time of the slow reads it would have served. A shape gets
+      suggestions when it was scanned, or when its index still read more
+      than :data:`SCAN_RATIO` times the records it returned. ``indexed``
+      maps collections to the ``(kind, field)`` indexes they already have.
+    """
+    indexed_sets = {c: set(specs) for c, specs in (indexed or {}).items()}
+    groups: Dict[Tuple, List[dict]] = {}
+    for entry in entries:
+        if entry.get("op") in READ_OPS:
+            key: Tuple = (
+                "read", entry["collection"], entry["op"], tuple(entry.get("filters") or ()),
+                entry.get("sort"),
+            )
+        else:
+            key = ("write", entry.get("collection"), entry.get("op"))
+        groups.setdefault(key, []).append(entry)
+
+    shapes, writes = [], []
+    gains: Dict[Tuple[str, str, str], float] = {}
+    for key, group in groups.items():
+        durations = [e["ms"] for e in group]
+        row: Dict[str, Any] = {
+            "collection": key[1],
+            "op": key[2],
+            "count": len(group),
+            "total_ms": round(sum(durations), 3),
+            "p95_ms": _percentile(durations, 0.95),
+            "max_ms": max(durations),
+        }
+        if key[0] == "write":
+            sizes = [e["bytes"] for e in group if e.get("bytes") is not None]
+            row["mean_bytes"] = round(sum(sizes) / len(sizes)) if sizes else None
+            writes.append(row)
+            continue
+        scanned = [e["scanned"] for e in group if e.get("scanned") is not None]
+        returned = [e["returned"] for e in group if e.get("returned") is not None]
+        row.update(
+            filters=list(key[3]),
+            sort=key[4],
+            access=Counter(e.get("access") for e in group).most_common(1)[0][0],
+            mean_scanned=round(sum(scanned) / len(scanned)) if scanned else None,
+            mean_returned=round(sum(returned) / len(returned)) if returned else None,
+        )
+        shapes.append(row)
+        poorly_served = row["access"] in ("scan", "all") or (
+            row["mean_scanned"] is not None
+            and row["mean_scanned"] > SCAN_RATIO * max(row["mean_returned"] or 0, 1)
+        )
+        if poorly_served:
+            for kind, field in _suggest(key[3], indexed_sets.get(key[1], set())):
+                gain = (key[1], kind, field)
+                gains[gain] = gains.get(gain, 0.0) + row["total_ms"]
+
+    shapes.sort(key=lambda r: -r["total_ms"])
+    writes.sort(key=lambda r: -r["total_ms"])
+    indexes = [
+        {"collection": c, "kind": kind, "field": field, "total_ms": round(ms, 3)}
+        for (c, kind, field), ms in sorted(gains.items(), key=lambda item: -item[1])
+    ]
+    return {"shapes": shapes[:top], "writes": writes[:top], "indexes": indexes[:top]}
@@ -0,0 +1,321 @@
+"""Indexed snapshot files that can be read one record at a time.
+
+A snapshot is a JSON object with one record per line::
+
+    {"<id>":{...},
+    "<id>":{...}}
+
+It is still plain JSON, so anything that can read the old snapshots can read
+it. Next to it, ``<collection>.idx`` maps each id to the byte range of its
+record. The index is a small binary file:
+
+* a header: magic, then the snapshot's size, mtime and inode when the index
+  was written, then the record count;
+* one fixed-size entry per record, sorted by id so it can be
+  binary-searched in place: (key offset, value offset, key length, value
+  length);
+* the entries' positions in file order, so iteration keeps insertion order;
+* the ids, UTF-8 encoded.
+
+Both files are memory-mapped, so finding and decoding one record touches
+only the pages it lives on. An index whose recorded stat no longer matches
+the snapshot is ignored, and the snapshot is then read whole.
+"""
+
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from typing import IO, Any, Callable, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from task_manager.storage.codec import Codec
+from task_manager.storage.fileio import atomic_write
+
+_MAGIC = b"TMIDX001"
+_HEADER = struct.Struct("<QqQQ")  # snapshot size, mtime_ns, inode; record count
+_ENTRY = struct.Struct("<QQII")  # key offset, value offset, key length, value length
+_ORDER = struct.Struct("<I")
+_PREFIX = len(_MAGIC) + _HEADER.size
+
+
+def index_path(snapshot_path: str) -> str:
+    return os.path.splitext(snapshot_path)[0] + ".idx"
+
+
+def _map(path: str) -> Tuple[Any, os.stat_result]:
+    """Map a whole file read-only; returns the buffer and the file's stat."""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if os.name == "nt" or st.st_size == 0:
+            # Windows can't replace a mapped file; read it instead.
+            return f.read(), st
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), st
+
+
+class SnapshotIndex:
+    """Read-only, memory-mapped view of an indexed snapshot file."""
+
+    def __init__(self, data: Any, index: Any, count: int):
+        self._data = data
+        self._index = index
+        self._count = count
+        self._order_start = _PREFIX + count * _ENTRY.size
+        self._keys_start = self._order_start + count * _ORDER.size
+
+    @classmethod
+    def open(cls, path: str) -> Optional["SnapshotIndex"]:
+        """Map ``path`` and its index, or return None if it has no valid index."""
+        try:
+            index, _ = _map(index_path(path))
+            data, st = _map(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        if index[:len(_MAGIC)] != _MAGIC or len(index) < _PREFIX:
+            return None
+        size, mtime_ns, ino, count = _HEADER.unpack_from(index, len(_MAGIC))
+        if (size, mtime_ns, ino) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        return cls(data, index, count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, pos: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._index, _PREFIX + pos * _ENTRY.size)
+
+    def _key(self, key_offset: int, key_length: int) -> bytes:
+        start = self._keys_start + key_offset
+        return self._index[start:start + key_length]
+
+    def find(self, id: str) -> int:
+        """Return the entry position of ``id``, or -1."""
+        target = id.encode()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, _, key_length, _ = self._entry(mid)
+            key = self._key(key_offset, key_length)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def raw(self, pos: int) -> bytes:
+        """The encoded record at entry position ``pos``."""
+        _, value_offset, _, value_length = self._entry(pos)
+        return self._data[value_offset:value_offset + value_length]
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """(id, entry position) pairs in file order."""
+        for i in range(self._count):
+            (pos,) = _ORDER.unpack_from(self._index, self._order_start + i * _ORDER.size)
+            key_offset, _, key_length, _ = self._entry(pos)
+            yield self._key(key_offset, key_length).decode(), pos
+
+
+class LazyRecords(MutableMapping):
+    """A collection's records, decoded from a :class:`SnapshotIndex` on access.
+
+    Behaves like the ``{id: record}`` dict JsonStore otherwise keeps,
+    including its order. Reads of single records decode just those records.
+    Writes and deletes are kept in memory on top of the snapshot. The first
+    full iteration decodes everything into a plain dict, which then serves
+    every later operation.
+    """
+
+    def __init__(self, base: SnapshotIndex, decode: Callable[[bytes], dict]):
+        self._base = base
+        self._decode = decode
+        self._values: Dict[str, dict] = {}  # decoded or written, all visible
+        self._deleted: Set[str] = set()  # ids in the base that were removed
+        self._appended: Dict[str, None] = {}  # ids added after the base, in order
+        self._all: Optional[Dict[str, dict]] = None
+
+    @property
+    def materialized(self) -> bool:
+        return self._all is not None
+
+    def _position(self, id: str) -> int:
+        return -1 if id in self._deleted else self._base.find(id)
+
+    def __getitem__(self, id: str) -> dict:
+        if self._all is not None:
+            return self._all[id]
+        value = self._values.get(id)
+        if value is None:
+            pos = self._position(id)
+            if pos < 0:
+                raise KeyError(id)
+            value = self._values[id] = self._decode(self._base.raw(pos))
+        return value
+
+    def get(self, id: str, default: Any = None) -> Any:
+        try:
+            return self[id]
+        except KeyError:
+            return default
+
+    def __contains__(self, id: object) -> bool:
+        if self._all is not None:
+            return id in self._all
+        return id in self._values or (isinstance(id, str) and self._position(id) >= 0)
+
+    def __setitem__(self, id: str, value: dict) -> None:
+        if self._all is not None:
+            self._all[id] = value
+            return
+        if id not in self:
+            self._appended[id] = None
+        self._values[id] = value
+
+    def __delitem__(self, id: str) -> None:
+        if self._all is not None:
+            del self._all[id]
+            return
+        if id not in self:
+            raise KeyError(id)
+        self._values.pop(id, None)
+        if id in self._appended:
+            del self._appended[id]
+        else:
+            self._deleted.add(id)
+
+    def __len__(self) -> int:
+        if self._all is not None:
+            return len(self._all)
+        return len(self._base) - len(self._deleted) + len(self._appended)
+
+    def _materialize(self) -> Dict[str, dict]:
+        if self._all is None:
+            records = {}
+            for id, pos in self._base.items():
+                if id in self._deleted:
+                    continue
+                value = self._values.get(id)
+                records[id] = value if value is not None else self._decode(self._base.raw(pos))
+            for id in self._appended:
+                records[id] = self._values[id]
+            # The lazy state is left as is: a reader that started before
+            # this may still be using it.
+            self._all = records
+        return self._all
+
+    def ids(self) -> Iterator[str]:
+        """The ids in order, without decoding any record."""
+        if self._all is not None:
+            yield from self._all
+            return
+        for id, _ in self._base.items():
+            if id not in self._deleted:
+                yield id
+        yield from self._appended
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._materialize())
+
+    def keys(self):
+        return self._materialize().keys()
+
+    def values(self):
+        return self._materialize().values()
+
+    def items(self):
+        return self._materialize().items()
+
+    def copy(self) -> Mapping[str, dict]:
+        """A snapshot of the current records that later writes don't affect."""
+        if self._all is not None:
+            return dict(self._all)
+        copy = LazyRecords(self._base, self._decode)
+        copy._values = dict(self._values)
+        copy._deleted = set(self._deleted)
+        copy._appended = dict(self._appended)
+        return copy
+
+    def rebase(self, base: SnapshotIndex) -> None:
+        """Switch to ``base``, a snapshot of exactly the current records.
+
+        Only valid before materializing, with no reader using this mapping.
+        """
+        self._base = base
+        self._deleted = set()
+        self._appended = {}
+
+    def encoded(self, encode: Callable[[Any], bytes]) -> Iterator[Tuple[str, bytes]]:
+        """(id, encoded record) pairs in order, copying untouched records as is."""
+        if self._all is not None:
+            for id, value in self._all.items():
+                yield id, encode(value)
+            return
+        for id, pos in self._base.items():
+            if id in self._deleted:
+                continue
+            value = self._values.get(id)
+            yield id, encode(value) if value is not None else self._base.raw(pos)
+        for id in self._appended:
+            yield id, encode(self._values[id])
+
+
+def write_snapshot(
+    path: str, records: Mapping[str, dict], codec: Codec, fsync: bool = False
+) -> Optional[SnapshotIndex]:
+    """Write ``records`` as an indexed snapshot and return a view of it.
+
+    Returns None if the index could not be written; the snapshot itself is
+    complete either way.
+    """
+    if isinstance(records, LazyRecords):
+        pairs = records.encoded(codec.encode)
+    else:
+        pairs = ((id, codec.encode(value)) for id, value in records.items())
+    ids: List[bytes] = []
+    ranges: List[Tuple[int, int]] = []
+
+    def write(f: IO[bytes]) -> None:
+        f.write(b"{")
+        offset = 1
+        for id, value in pairs:
+            key = codec.encode(id)
+            prefix = (b",\n" if ids else b"") + key + b":"
+            f.write(prefix)
+            f.write(value)
+            offset += len(prefix)
+            ids.append(id.encode())
+            ranges.append((offset, len(value)))
+            offset += len(value)
+        f.write(b"}")
+
+    atomic_write(path, write, fsync=fsync, binary=True)
+    st = os.stat(path)
+    try:
+        _write_index(index_path(path), st, ids, ranges, fsync)
+    except OSError:
+        return None
+    return SnapshotIndex.open(path)
+
+
+def _write_index(
+    path: str, st: os.stat_result, ids: List[bytes], ranges: List[Tuple[int, int]], fsync: bool
+) -> None:
+    by_key = sorted(range(len(ids)), key=ids.__getitem__)
+    rank = [0] * len(ids)
+    entries = bytearray()
+    keys = bytearray()
+    for pos, i in enumerate(by_key):
+        rank[i] = pos
+        value_offset, value_length = ranges[i]
+        entries += _ENTRY.pack(len(keys), value_offset, len(ids[i]), value_length)
+        keys += ids[i]
+    order = b"".join(_ORDER.pack(pos) for pos in rank)
+    header = _MAGIC + _HEADER.pack(st.st_size, st.st_mtime_ns, st.st_ino, len(ids))
+
+    def write(f: IO[bytes]) -> None:
+        f.write(header)
+        f.write(entries)
+        f.write(order)
+        f.write(keys)
+
+    atomic_write(path, write, fsync=fsync, binary=True)
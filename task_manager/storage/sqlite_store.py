@@ -0,0 +1,641 @@
+"""SQLite storage backend implementing the JsonStore interface."""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from task_manager.metrics import METRICS
+from task_manager.storage.codec import get_codec
+from task_manager.storage.pagination import (
+    Page,
+    SortSpec,
+    decode_key,
+    decode_position,
+    encode_cursor,
+    paginate,
+)
+from task_manager.storage.query import RANGE_OPERATORS, Predicate, project
+from task_manager.storage.versions import REV_FIELD, CollectionVersion, check_revision, revision
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Filter values SQLite can compare directly against json_extract() results.
+_SQL_SCALARS = (str, int, float, bool, type(None))
+_SQL_COMPARISONS = {"lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+_MAX_CHAR = chr(0x10FFFF)
+_VERSIONS_TABLE = "_collection_versions"
+
+
+def _check_identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid collection or field name '{name}'")
+    return name
+
+
+class SqliteStore:
+    """SQLite-backed store with the same contract as :class:`JsonStore`.
+
+    Each collection is a table of ``(id, data)`` rows holding the record as
+    JSON text, ordered by rowid so iteration matches insertion order like the
+    JSON backend. Declared index fields become expression indexes on
+    ``json_extract(data, '$.field')`` and :meth:`find` pushes its filters
+    down into the ``WHERE`` clause, so records are never all held in memory.
+    The database runs in WAL mode, letting readers in other processes proceed
+    while a write is in flight.
+
+    Records carry a ``_rev`` revision as in JsonStore. Collection versions
+    live in their own table and are bumped in the same transaction as every
+    write, so they are shared by all processes using the database; each
+    collection's version row also holds a random epoch, so a recreated
+    database never repeats an old version.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = "data",
+        filename: str = "task_manager.db",
+        indexes: Optional[Dict[str, Iterable[str]]] = None,
+        codec: str = "auto",
+    ):
+        self.data_dir = data_dir
+        self.codec = get_codec(codec)
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, filename)
+        # Autocommit mode: each statement is its own transaction. The
+        # statement cache keeps the parameterized queries below prepared.
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {_VERSIONS_TABLE} "
+            "(collection TEXT PRIMARY KEY, epoch TEXT NOT NULL, "
+            "version INTEGER NOT NULL, modified REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._tables: Set[str] = set()
+        # Each entry is the tuple of fields making up one (possibly compound) index.
+        self._index_fields: Dict[str, List[Tuple[str, ...]]] = {}
+        for collection, fields in (indexes or {}).items():
+            for field in fields:
+                self.ensure_index(collection, field)
+
+    def _encode(self, data: dict) -> str:
+        # A str, not bytes: SQLite's JSON functions reject BLOBs.
+        return self.codec.encode(data).decode()
+
+    def _table(self, collection: str) -> str:
+        """Return the quoted table name, creating the table on first use."""
+        if collection not in self._tables:
+            _check_identifier(collection)
+            with self._lock:
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{collection}" '
+                    "(id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                )
+                for columns in self._index_fields.get(collection, []):
+                    self._create_index(collection, columns)
+            self._tables.add(collection)
+        return f'"{collection}"'
+
+    def _create_index(self, collection: str, columns: Tuple[str, ...]) -> None:
+        expressions = ", ".join(f"json_extract(data, '$.{field}')" for field in columns)
+        self._conn.execute(
+            f'CREATE INDEX IF NOT EXISTS "{collection}__{"__".join(columns)}" '
+            f'ON "{collection}"({expressions})'
+        )
+
+    def ensure_index(
+        self,
+        collection: str,
+        field: str,
+        kind: str = "hash",
+        partition_by: Optional[str] = None,
+    ) -> None:
+        """Declare a column index on ``field`` for ``collection``.
+
+        SQLite's B-tree expression index serves both equality and range
+        predicates, so ``kind`` is accepted for compatibility and ignored.
+        With ``partition_by`` the index is compound, ``(partition_by, field)``,
+        which serves an equality on the partition plus a range on ``field``.
+        """
+        _check_identifier(collection)
+        _check_identifier(field)
+        columns: Tuple[str, ...] = (field,)
+        if partition_by is not None:
+            _check_identifier(partition_by)
+            columns = (partition_by, field)
+        declared = self._index_fields.setdefault(collection, [])
+        if columns in declared:
+            return
+        declared.append(columns)
+        if collection in self._tables:
+            with self._lock:
+                self._create_index(collection, columns)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run several statements as one transaction under the connection lock."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection, collection: str) -> None:
+        """Advance a collection's version; call inside the write's transaction."""
+        conn.execute(
+            f"INSERT INTO {_VERSIONS_TABLE} (collection, epoch, version, modified) "
+            "VALUES (?, ?, 1, ?) ON CONFLICT(collection) DO UPDATE "
+            "SET version = version + 1, modified = excluded.modified",
+            (collection, uuid.uuid4().hex[:12], time.time()),
+        )
+
+    @staticmethod
+    def _revisions(conn: sqlite3.Connection, table: str, ids: Iterable[str]) -> Dict[str, dict]:
+        """Return ``{id: {"_rev": n}}`` for the ids that exist, for check_revision."""
+        revs = {}
+        for id in ids:
+            row = conn.execute(
+                f"SELECT json_extract(data, '$.{REV_FIELD}') FROM {table} WHERE id = ?", (id,)
+            ).fetchone()
+            if row is not None:
+                revs[id] = {REV_FIELD: row[0] or 0}
+        return revs
+
+    def insert(self, collection: str, id: str, data: dict) -> dict:
+        """Insert a new record into a collection."""
+        table = self._table(collection)
+        data[REV_FIELD] = 1
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    f"INSERT INTO {table} (id, data) VALUES (?, ?)", (id, self._encode(data))
+                )
+                self._bump_version(conn, collection)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Record with id '{id}' already exists in '{collection}'")
+        return data
+
+    def insert_many(self, collection: str, items: Dict[str, dict]) -> List[dict]:
+        """Insert several records in one transaction.
+
+        Nothing is inserted if any id already exists.
+        """
+        table = self._table(collection)
+        for data in items.values():
+            data[REV_FIELD] = 1
+        try:
+            with self._transaction() as conn:
+                conn.executemany(
+                    f"INSERT INTO {table} (id, data) VALUES (?, ?)",
+                    [(id, self._encode(data)) for id, data in items.items()],
+                )
+                self._bump_version(conn, collection)
+        except sqlite3.IntegrityError:
+            existing = [id for id in items if self.get(collection, id) is not None]
+            raise ValueError(f"Records with ids {existing} already exist in '{collection}'")
+        return list(items.values())
+
+    def get(self, collection: str, id: str) -> Optional[dict]:
+        """Get a single record by ID."""
+        table = self._table(collection)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data FROM {table} WHERE id = ?", (id,)
+            ).fetchone()
+        return self.codec.decode(row[0]) if row else None
+
+    def get_many(self, collection: str, ids: Iterable[str]) -> Dict[str, dict]:
+        """Get several records by ID; missing ids are left out."""
+        table = self._table(collection)
+        ids = list(dict.fromkeys(ids))
+        rows: Dict[str, str] = {}
+        with self._lock:
+            # Stay well below SQLite's limit on bound parameters.
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows.update(self._conn.execute(
+                    f"SELECT id, data FROM {table} WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                ).fetchall())
+        return {id: self.codec.decode(rows[id]) for id in ids if id in rows}
+
+    def get_all(self, collection: str) -> List[dict]:
+        """Get all records in a collection."""
+        table = self._table(collection)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT data FROM {table} ORDER BY rowid").fetchall()
+        return [self.codec.decode(row[0]) for row in rows]
+
+    def update(
+        self, collection: str, id: str, data: dict, expected_rev: Optional[int] = None
+    ) -> dict:
+        """Update an existing record, bumping its revision.
+
+        With ``expected_rev``, raise :class:`VersionConflictError` unless the
+        stored record is still at that revision.
+        """
+        table = self._table(collection)
+        with self._transaction() as conn:
+            current = self._revisions(conn, table, [id]).get(id)
+            if current is None:
+                raise ValueError(f"Record with id '{id}' not found in '{collection}'")
+            data[REV_FIELD] = check_revision(collection, id, current, expected_rev) + 1
+            conn.execute(f"UPDATE {table} SET data = ? WHERE id = ?", (self._encode(data), id))
+            self._bump_version(conn, collection)
+        return data
+
+    def update_many(
+        self,
+        collection: str,
+        items: Dict[str, dict],
+        expected_revs: Optional[Dict[str, int]] = None,
+    ) -> List[dict]:
+        """Update several existing records in one transaction.
+
+        Nothing is updated if any id is missing or, with ``expected_revs``,
+        if any of those records has moved past its expected revision.
+        """
+        expected_revs = expected_revs or {}
+        table = self._table(collection)
+        with self._transaction() as conn:
+            current = self._revisions(conn, table, items)
+            missing = [id for id in items if id not in current]
+            if missing:
+                raise ValueError(f"Records with ids {missing} not found in '{collection}'")
+            for id, data in items.items():
+                rev = check_revision(collection, id, current[id], expected_revs.get(id))
+                data[REV_FIELD] = rev + 1
+            conn.executemany(
+                f"UPDATE {table} SET data = ? WHERE id = ?",
+                [(self._encode(data), id) for id, data in items.items()],
+            )
+            self._bump_version(conn, collection)
+        return list(items.values())
+
+    def update_with(
+        self, collection: str, changes: Dict[str, Callable[[Optional[dict]], Optional[dict]]]
+    ) -> Dict[str, Optional[dict]]:
+        """Read, modify and write records in one transaction.
+
+        Each function in ``changes`` gets its record (None if it doesn't
+        exist) and returns the new record, which is inserted or updated, or
+        None to delete it. Nothing is written if a function raises. Returns
+        the new records by id.
+        """
+        table = self._table(collection)
+        with self._transaction() as conn:
+            updates = {}
+            for id, change in changes.items():
+                row = conn.execute(f"SELECT data FROM {table} WHERE id = ?", (id,)).fetchone()
+                old = self.codec.decode(row[0]) if row else None
+                updates[id] = (old is not None, revision(old), change(old))
+            written = False
+            for id, (existed, rev, new) in updates.items():
+                if new is None:
+                    if existed:
+                        conn.execute(f"DELETE FROM {table} WHERE id = ?", (id,))
+                        written = True
+                    continue
+                new[REV_FIELD] = rev + 1 if existed else 1
+                conn.execute(
+                    f"INSERT INTO {table} (id, data) VALUES (?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                    (id, self._encode(new)),
+                )
+                written = True
+            if written:
+                self._bump_version(conn, collection)
+        return {id: new for id, (_, _, new) in updates.items()}
+
+    def delete(self, collection: str, id: str, expected_rev: Optional[int] = None) -> bool:
+        """Delete a record by ID.
+
+        With ``expected_rev``, raise :class:`VersionConflictError` unless the
+        stored record is still at that revision.
+        """
+        table = self._table(collection)
+        with self._transaction() as conn:
+            current = self._revisions(conn, table, [id]).get(id)
+            if current is None:
+                return False
+            check_revision(collection, id, current, expected_rev)
+            cursor = conn.execute(f"DELETE FROM {table} WHERE id = ?", (id,))
+            if cursor.rowcount > 0:
+                self._bump_version(conn, collection)
+        return cursor.rowcount > 0
+
+    def delete_many(self, collection: str, ids: Iterable[str]) -> int:
+        """Delete several records in one transaction; returns how many existed."""
+        table = self._table(collection)
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                f"DELETE FROM {table} WHERE id = ?", [(id,) for id in dict.fromkeys(ids)]
+            )
+            if cursor.rowcount > 0:
+                self._bump_version(conn, collection)
+        return cursor.rowcount
+
+    def revision(self, collection: str, id: str) -> Optional[int]:
+        """Return a record's revision, or None if it doesn't exist.
+
+        Only the revision is extracted; the record itself isn't decoded.
+        """
+        table = self._table(collection)
+        with self._lock:
+            current = self._revisions(self._conn, table, [id]).get(id)
+        return None if current is None else current[REV_FIELD]
+
+    def version(self, collection: str) -> CollectionVersion:
+        """Return the current version of a collection (``0`` if never written)."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT epoch, version, modified FROM {_VERSIONS_TABLE} WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+        if row is None:
+            return CollectionVersion("0", 0.0)
+        epoch, version, modified = row
+        return CollectionVersion(f"{epoch}.{version}", modified)
+
+    def find(self, collection: str, **filters) -> List[dict]:
+        """Find records matching all provided field filters.
+
+        Scalar filters become ``json_extract(...) IS ?`` clauses (``IS`` so a
+        ``None`` filter matches missing fields, as in JsonStore); anything else
+        is compared in Python against the rows SQL returns.
+        """
+        table = self._table(collection)
+        where, params, remaining = self._where(self._predicates(filters, ()))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM {table}{where} ORDER BY rowid", params
+            ).fetchall()
+        return _filter_rows(rows, remaining, self.codec.decode)
+
+    def iterate(
+        self,
+        collection: str,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        where: Sequence[Predicate] = (),
+    ) -> Iterator[dict]:
+        """Yield matching records one at a time, reading them in batches.
+
+        Each batch is a separate keyset query on rowid, so the connection lock
+        is only held per batch and memory stays bounded by ``batch_size``.
+        """
+        table = self._table(collection)
+        sql_where, params, remaining = self._where(self._predicates(filters or {}, where))
+        clauses = [sql_where[len(" WHERE "):]] if sql_where else []
+        clauses.append("rowid > ?")
+        sql = (
+            f"SELECT rowid, data FROM {table} WHERE {' AND '.join(clauses)} "
+            "ORDER BY rowid LIMIT ?"
+        )
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, params + [last_rowid, batch_size]).fetchall()
+            for _, data in rows:
+                record = self.codec.decode(data)
+                if all(p.matches(record) for p in remaining):
+                    yield record
+            if len(rows) < batch_size:
+                return
+            last_rowid = rows[-1][0]
+
+    def page(
+        self,
+        collection: str,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        sort: Optional[SortSpec] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        where: Sequence[Predicate] = (),
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[dict]:
+        """Return one page of matching records and the cursor for the next.
+
+        Sorting, the cursor condition and the limit are all pushed into SQL
+        (a row-value comparison on the sort key), so only one page of rows is
+        read and decoded. Cursors follow the same rules as JsonStore's. With
+        ``fields``, SQL extracts just those fields and the rest of each
+        record is never decoded.
+        """
+        with METRICS.timer("store_query_seconds", collection=collection):
+            return self._page(collection, limit, cursor, sort, filters, where, fields)
+
+    def _page(
+        self,
+        collection: str,
+        limit: Optional[int],
+        cursor: Optional[str],
+        sort: Optional[SortSpec],
+        filters: Optional[Dict[str, Any]],
+        where: Sequence[Predicate],
+        fields: Optional[Sequence[str]],
+    ) -> Page[dict]:
+        table = self._table(collection)
+        where, params, remaining = self._where(self._predicates(filters or {}, where))
+        if remaining:
+            # Non-scalar filters can't be pushed down; page in Python instead.
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, id, data FROM {table}{where} ORDER BY rowid", params
+                ).fetchall()
+            records = {id: self.codec.decode(data) for _, id, data in rows}
+            ordinals = {id: rowid for rowid, id, _ in rows}
+            ids = [id for id, r in records.items() if all(p.matches(r) for p in remaining)]
+            page = paginate(records, ids, limit, cursor, sort, ordinals)
+            return page if fields is None else page.map(lambda r: project(r, fields))
+        columns, read = self._columns(fields)
+        if sort is None:
+            after = decode_position(cursor)
+            if after is not None:
+                # Resume after the last row, or after its rowid if it has been deleted since.
+                clause = f"rowid > coalesce((SELECT rowid FROM {table} WHERE id = ?), ?)"
+                where = f"{where} AND {clause}" if where else f" WHERE {clause}"
+                params = params + [after[1], after[0]]
+            sql = f"SELECT rowid, id, {columns} FROM {table}{where} ORDER BY rowid LIMIT ?"
+            with self._lock:
+                rows = self._conn.execute(
+                    sql, params + [-1 if limit is None else limit + 1]
+                ).fetchall()
+            has_more = limit is not None and len(rows) > limit
+            rows = rows[:limit] if has_more else rows
+            next_cursor = encode_cursor([rows[-1][0], rows[-1][1]]) if has_more and rows else None
+            return Page([read(row[2:]) for row in rows], next_cursor)
+
+        _check_identifier(sort.field)
+        value = f"json_extract(data, '$.{sort.field}')"
+        key_params: List[Any] = []
+        if sort.ranks is not None:
+            cases = " ".join("WHEN ? THEN ?" for _ in sort.ranks)
+            sort_value = f"CASE {value} {cases} ELSE {len(sort.ranks)} END"
+            for name, rank in sort.ranks.items():
+                key_params.extend([name, rank])
+        else:
+            sort_value = f"coalesce({value}, '')"
+        key = f"({value} IS NULL), {sort_value}, id"
+        direction = "DESC" if sort.descending else "ASC"
+        order = f"({value} IS NULL) {direction}, {sort_value} {direction}, id {direction}"
+        after = decode_key(cursor)
+        clauses = [where[len(" WHERE "):]] if where else []
+        query_params = list(params)
+        if after is not None:
+            op = "<" if sort.descending else ">"
+            clauses.append(f"({key}) {op} (?, ?, ?)")
+            query_params.extend(key_params)
+            query_params.extend([int(after[0]), after[1], after[2]])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {key}, {columns} FROM {table}{where} ORDER BY {order} LIMIT ?"
+        query_params = key_params + query_params + key_params
+        query_params.append(-1 if limit is None else limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, query_params).fetchall()
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit] if has_more else rows
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor([last[0], last[1], last[2]])
+        return Page([read(row[3:]) for row in rows], next_cursor)
+
+    def query(
+        self,
+        collection: str,
+        where: Sequence[Predicate] = (),
+        sort: Optional[SortSpec] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        """Return records matching every predicate, optionally sorted and limited."""
+        return self.page(collection, limit, sort=sort, where=where, fields=fields).items
+
+    def _columns(
+        self, fields: Optional[Sequence[str]]
+    ) -> Tuple[str, Callable[[Sequence[Any]], dict]]:
+        """Return the SQL selecting a record or some of its fields, and its row reader.
+
+        Each field takes two columns, its value and its JSON type: the type
+        tells a missing field from a null one and booleans from integers,
+        and only nested arrays and objects need decoding.
+        """
+        if fields is None:
+            return "data", lambda row: self.codec.decode(row[0])
+        columns = []
+        for field in fields:
+            _check_identifier(field)
+            columns.append(f"json_extract(data, '$.{field}'), json_type(data, '$.{field}')")
+        decode = self.codec.decode
+
+        def read(row: Sequence[Any]) -> dict:
+            record = {}
+            for i, field in enumerate(fields):
+                value, kind = row[2 * i], row[2 * i + 1]
+                if kind is None:
+                    continue
+                if kind in ("array", "object"):
+                    value = decode(value)
+                elif kind in ("true", "false"):
+                    value = kind == "true"
+                record[field] = value
+            return record
+
+        return ", ".join(columns), read
+
+    def explain(
+        self,
+        collection: str,
+        filters: Optional[Dict[str, Any]] = None,
+        where: Sequence[Predicate] = (),
+    ) -> Dict[str, Any]:
+        """Return SQLite's query plan for the predicates, one step per entry."""
+        table = self._table(collection)
+        sql_where, params, remaining = self._where(self._predicates(filters or {}, where))
+        with self._lock:
+            rows = self._conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT data FROM {table}{sql_where}", params
+            ).fetchall()
+        return {"access": "sqlite", "plan": [row[-1] for row in rows],
+                "python_filters": len(remaining)}
+
+    @staticmethod
+    def _predicates(filters: Dict[str, Any], where: Sequence[Predicate]) -> List[Predicate]:
+        predicates = [Predicate(k, "eq", v) for k, v in filters.items()]
+        predicates.extend(where)
+        return predicates
+
+    def _where(self, predicates: List[Predicate]) -> Tuple[str, List[Any], List[Predicate]]:
+        """Build a WHERE clause for the predicates SQL can evaluate; return the rest.
+
+        Equality uses ``IS`` so a ``None`` filter matches missing fields, as in
+        JsonStore. Predicates on non-scalar values (e.g. lists) are returned to
+        be checked in Python against the rows SQL selects.
+        """
+        clauses = []
+        params: List[Any] = []
+        remaining = []
+        for p in predicates:
+            _check_identifier(p.field)
+            value = f"json_extract(data, '$.{p.field}')"
+            if p.op == "exists":
+                clauses.append(f"{value} IS {'NOT ' if p.value else ''}NULL")
+            elif p.op == "eq" and isinstance(p.value, _SQL_SCALARS):
+                clauses.append(f"{value} IS ?")
+                params.append(p.value)
+            elif p.op == "in" and all(isinstance(v, _SQL_SCALARS) for v in p.value):
+                present = [v for v in p.value if v is not None]
+                alternatives = []
+                if present:
+                    alternatives.append(f"{value} IN ({', '.join('?' for _ in present)})")
+                    params.extend(present)
+                if len(present) < len(p.value):
+                    alternatives.append(f"{value} IS NULL")
+                clauses.append(f"({' OR '.join(alternatives)})" if alternatives else "0")
+            elif p.op in RANGE_OPERATORS and isinstance(p.value, _SQL_SCALARS):
+                if p.value is None:
+                    clauses.append("0")
+                else:
+                    clauses.append(f"{value} {_SQL_COMPARISONS[p.op]} ?")
+                    params.append(p.value)
+                    # SQLite orders numbers before text; Python can't compare them.
+                    clauses.append(
+                        f"json_type(data, '$.{p.field}') "
+                        + ("= 'text'" if isinstance(p.value, str) else "!= 'text'")
+                    )
+            elif p.op == "prefix":
+                # A range rather than LIKE, which is case-insensitive and can't use the index.
+                clauses.append(f"{value} >= ? AND {value} < ?")
+                params.extend([p.value, p.value + _MAX_CHAR])
+            else:
+                remaining.append(p)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params, remaining
+
+
+def _filter_rows(
+    rows: List[tuple], remaining: List[Predicate], decode: Callable[[str], dict]
+) -> List[dict]:
+    records = [decode(row[0]) for row in rows]
+    if remaining:
+        records = [r for r in records if all(p.matches(r) for p in remaining)]
+    return records
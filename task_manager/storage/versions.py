@@ -0,0 +1,46 @@
+"""Record revisions and collection versions kept by the storage backends."""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# Field each stored record carries its revision in: 1 on insert, +1 per update.
+REV_FIELD = "_rev"
+
+
+class VersionConflictError(ValueError):
+    """A write expected a record revision that is no longer current."""
+
+
+@dataclass(frozen=True)
+class CollectionVersion:
+    """Identifies one state of a collection.
+
+    ``tag`` is opaque and changes whenever the collection does; ``modified``
+    is the time of the last change, in seconds since the epoch.
+    """
+
+    tag: str
+    modified: float
+
+    @classmethod
+    def combine(cls, versions: Iterable["CollectionVersion"]) -> "CollectionVersion":
+        """A version of data drawn from several collections (or records)."""
+        versions = list(versions)
+        return cls("+".join(v.tag for v in versions), max((v.modified for v in versions), default=0.0))
+
+
+def revision(record: Optional[dict]) -> Optional[int]:
+    """Return the revision of a stored record (0 if written before revisions)."""
+    if record is None:
+        return None
+    return record.get(REV_FIELD, 0)
+
+
+def check_revision(collection: str, id: str, record: dict, expected: Optional[int]) -> int:
+    """Return the record's revision, raising if it isn't ``expected``."""
+    current = record.get(REV_FIELD, 0)
+    if expected is not None and current != expected:
+        raise VersionConflictError(
+            f"Record '{id}' in '{collection}' is at revision {current}, expected {expected}"
+        )
+    return current
@@ -0,0 +1,91 @@
+"""Tests for the columnar task analytics table."""
+
+import shutil
+import tempfile
+from datetime import date
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from task_manager.services.analytics import TaskAnalytics
+from task_manager.services.events import ChangeEvent, EventBus
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+
+
+@pytest.fixture
+def store():
+    tmp_dir = tempfile.mkdtemp()
+    yield JsonStore(data_dir=tmp_dir)
+    shutil.rmtree(tmp_dir)
+
+
+@pytest.fixture
+def wired(store):
+    events = EventBus()
+    service = TaskService(store, events)
+    service.create_task("T0", "d1", "Alice", due_date="2026-01-01")
+    analytics = TaskAnalytics(store)
+    events.subscribe(analytics.apply)
+    return analytics, service
+
+
+class TestTaskAnalytics:
+    def test_loads_existing_tasks_and_follows_events(self, wired):
+        analytics, service = wired
+        t1 = service.create_task("T1", "d1", "Bob", due_date="2026-02-01")
+        t2 = service.create_task("T2", "d2", "Bob")
+        service.complete_task(t1.id)
+        service.delete_task(t2.id)
+        result = analytics.count(group_by=["assigned_to", "status"])
+        assert result["total"] == 2
+        assert result["groups"] == [
+            {"assigned_to": "Alice", "status": "open", "count": 1},
+            {"assigned_to": "Bob", "status": "completed", "count": 1},
+        ]
+        assert len(analytics) == 2
+
+    def test_filters(self, wired):
+        analytics, service = wired
+        service.create_tasks([
+            {"title": f"T{i}", "department_id": "d2", "assigned_to": "Carol",
+             "priority": "high" if i % 2 else "low", "due_date": f"2026-03-{i + 1:02d}"}
+            for i in range(6)
+        ])
+        assert analytics.count(filters={"department_id": "d2", "priority": "high"})["total"] == 3
+        assert analytics.count(filters={"priority": ["high", "low"]})["total"] == 6
+        assert analytics.count(filters={"assigned_to": "Nobody"})["total"] == 0
+        assert analytics.count(due_after=date(2026, 3, 2), due_before=date(2026, 3, 4))["total"] == 3
+
+    def test_overdue_only_counts_active_tasks(self, wired):
+        analytics, service = wired
+        done = service.create_task("Done", "d1", "Alice", due_date="2025-12-01")
+        service.complete_task(done.id)
+        service.create_task("No due date", "d1", "Alice")
+        result = analytics.count(overdue=True, as_of=date(2026, 1, 2), group_by=["status"])
+        assert result == {"total": 1, "groups": [{"status": "open", "count": 1}]}
+
+    def test_growth_and_compaction(self, wired):
+        analytics, service = wired
+        created = service.create_tasks([
+            {"title": f"T{i}", "department_id": "d1", "assigned_to": "Bob"} for i in range(3000)
+        ]).succeeded
+        analytics.apply([
+            ChangeEvent(TaskService.TASKS_COLLECTION, "delete", task.id, before=task.to_dict())
+            for task in created[:2500]
+        ])
+        assert analytics.count(group_by=["assigned_to"])["groups"] == [
+            {"assigned_to": "Bob", "count": 500},
+            {"assigned_to": "Alice", "count": 1},
+        ]
+        assert len(analytics) == 501
+        service.create_task("After", "d1", "Carol")
+        assert analytics.count(filters={"assigned_to": "Carol"})["total"] == 1
+        analytics.rebuild()
+        assert len(analytics) == 3002
+
+    def test_rejects_unknown_fields(self, wired):
+        analytics, _ = wired
+        with pytest.raises(ValueError, match="Cannot filter or group"):
+            analytics.count(group_by=["title"])
@@ -0,0 +1,250 @@
+"""HTTP tests for the API routers."""
+
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from task_manager.api.main import create_app
+from task_manager.metrics import METRICS
+
+
+@pytest.fixture
+def client():
+    """An API client over a temporary data directory."""
+    tmp_dir = tempfile.mkdtemp()
+    with TestClient(create_app(data_dir=tmp_dir)) as c:
+        yield c
+    shutil.rmtree(tmp_dir)
+
+
+def _create_task(client, title="T", **fields):
+    body = {"title": title, "department_id": "d1", "assigned_to": "Alice", **fields}
+    response = client.post("/api/tasks", json=body)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestConditionalRequests:
+    def test_record_etag_and_if_none_match(self, client):
+        task = _create_task(client)
+        response = client.get(f"/api/tasks/{task['id']}")
+        assert response.status_code == 200 and response.headers["ETag"] == '"1"'
+        assert "_rev" not in response.json()
+        cached = client.get(f"/api/tasks/{task['id']}", headers={"If-None-Match": '"1"'})
+        assert cached.status_code == 304 and cached.content == b""
+        client.patch(f"/api/tasks/{task['id']}", json={"title": "U"})
+        changed = client.get(f"/api/tasks/{task['id']}", headers={"If-None-Match": '"1"'})
+        assert changed.status_code == 200 and changed.headers["ETag"] == '"2"'
+
+    def test_collection_etag_and_if_none_match(self, client):
+        _create_task(client)
+        response = client.get("/api/tasks")
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"') and "Last-Modified" in response.headers
+        assert client.get("/api/tasks", headers={"If-None-Match": etag}).status_code == 304
+        _create_task(client, "T2")
+        assert client.get("/api/tasks", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_if_match_on_patch(self, client):
+        task = _create_task(client)
+        url = f"/api/tasks/{task['id']}"
+        stale = client.patch(url, json={"title": "U"}, headers={"If-Match": '"7"'})
+        assert stale.status_code == 412
+        weak = client.patch(url, json={"title": "U"}, headers={"If-Match": 'W/"1"'})
+        assert weak.status_code == 412
+        updated = client.patch(url, json={"title": "U"}, headers={"If-Match": '"1"'})
+        assert updated.status_code == 200 and updated.headers["ETag"] == '"2"'
+        assert updated.json()["title"] == "U"
+
+    def test_if_match_on_delete(self, client):
+        task = _create_task(client)
+        url = f"/api/tasks/{task['id']}"
+        assert client.delete(url, headers={"If-Match": '"2"'}).status_code == 412
+        assert client.get(url).status_code == 200
+        assert client.delete(url, headers={"If-Match": '"1"'}).json() == {"ok": True}
+        assert client.get(url).status_code == 404
+        assert client.delete(url, headers={"If-Match": '"1"'}).status_code == 404
+
+
+class TestPagination:
+    def test_walk_pages_with_next_cursor(self, client):
+        created = [_create_task(client, f"T{i}")["id"] for i in range(5)]
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/tasks", params=params)
+            assert response.status_code == 200
+            seen.extend(t["id"] for t in response.json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert seen == created and pages == 3
+
+    def test_sorted_pages(self, client):
+        for due in ("2026-03-01", "2026-01-01", "2026-02-01"):
+            _create_task(client, due_date=due)
+        first = client.get("/api/tasks", params={"limit": 2, "sort": "-due_date"})
+        rest = client.get(
+            "/api/tasks",
+            params={"limit": 2, "sort": "-due_date", "cursor": first.headers["X-Next-Cursor"]},
+        )
+        assert [t["due_date"] for t in first.json() + rest.json()] == [
+            "2026-03-01", "2026-02-01", "2026-01-01"
+        ]
+        assert "X-Next-Cursor" not in rest.headers
+
+    @pytest.mark.parametrize("params", [
+        {"limit": 2, "cursor": "not-a-cursor"},
+        {"limit": 2, "sort": "title"},
+        {"limit": 2, "status": "bogus"},
+    ])
+    def test_bad_parameters(self, client, params):
+        _create_task(client)
+        response = client.get("/api/tasks", params=params)
+        assert response.status_code == 400 and response.json()["detail"]
+
+
+class TestChanges:
+    def test_long_poll_returns_after_a_write(self, client):
+        position = client.get("/api/changes").json()
+        assert position["changes"] == [] and position["reset"] is False
+        writer = threading.Timer(0.2, _create_task, (client, "Late"))
+        writer.start()
+        start = time.monotonic()
+        batch = client.get("/api/changes", params={
+            "since": position["last_seq"], "epoch": position["epoch"], "timeout": 10,
+        }).json()
+        writer.join()
+        assert time.monotonic() - start < 5
+        assert [(c["collection"], c["action"]) for c in batch["changes"]] == [("tasks", "insert")]
+        assert batch["changes"][0]["record"]["title"] == "Late"
+        assert batch["last_seq"] == position["last_seq"] + 1
+
+    def test_long_poll_times_out_with_an_empty_batch(self, client):
+        _create_task(client)
+        position = client.get("/api/changes").json()
+        batch = client.get("/api/changes", params={
+            "since": position["last_seq"], "epoch": position["epoch"], "timeout": 0.2,
+        }).json()
+        assert batch == {**position, "changes": []}
+
+    def test_long_poll_filters_collections(self, client):
+        position = client.get("/api/changes").json()
+        _create_task(client)
+        client.post("/api/departments", json={"name": "Eng"})
+        batch = client.get("/api/changes", params={
+            "since": position["last_seq"], "epoch": position["epoch"],
+            "collection": "departments", "timeout": 0,
+        }).json()
+        assert [c["collection"] for c in batch["changes"]] == ["departments"]
+
+    def test_stale_epoch_resets(self, client):
+        _create_task(client)
+        batch = client.get("/api/changes", params={"since": 0, "epoch": "old", "timeout": 0})
+        assert batch.json()["reset"] is True
+
+
+class TestSearch:
+    def test_ranked_hits(self, client):
+        task = _create_task(client, "Hiring freeze memo", description="Hiring freeze details")
+        _create_task(client, "Travel policy")
+        hits = client.get("/api/search", params={"q": "hiring freeze"}).json()
+        assert len(hits) == 1
+        assert hits[0]["type"] == "task" and hits[0]["id"] == task["id"]
+        assert hits[0]["title"] == "Hiring freeze memo" and hits[0]["score"] > 0
+        assert client.get("/api/search", params={"q": "hiring", "type": "mom"}).json() == []
+
+    def test_bad_parameters(self, client):
+        response = client.get("/api/search", params={"q": "x", "type": "meeting"})
+        assert response.status_code == 400 and "Unknown search type" in response.json()["detail"]
+        assert client.get("/api/search").status_code == 422
+        assert client.get("/api/search", params={"q": "x", "limit": 0}).status_code == 422
+
+
+@pytest.fixture
+def mom(client):
+    """A MOM with its meeting, department and one linked task."""
+    dept = client.post("/api/departments", json={"name": "Eng"}).json()
+    meeting = client.post("/api/meetings", json={
+        "title": "Planning", "department_id": dept["id"], "date": "2026-01-01",
+    }).json()
+    mom = client.post("/api/moms", json={
+        "meeting_id": meeting["id"], "prepared_by": "Alice", "summary": "Quarterly planning",
+    }).json()
+    task = _create_task(client, "Follow up", department_id=dept["id"], mom_id=mom["id"])
+    return dept, meeting, mom, task
+
+
+class TestExpand:
+    def test_expand_mom(self, client, mom):
+        dept, meeting, created, task = mom
+        response = client.get(f"/api/moms/{created['id']}", params={"expand": "meeting,tasks"})
+        body = response.json()
+        assert body["meeting"] == meeting
+        assert [t["id"] for t in body["tasks"]] == [task["id"]]
+        assert "department" not in body and "_rev" not in body["tasks"][0]
+        listed = client.get("/api/moms", params={"expand": ["department"]}).json()
+        assert [m["department"] for m in listed] == [dept]
+
+    def test_expand_tasks(self, client, mom):
+        _, meeting, created, task = mom
+        listed = client.get("/api/tasks", params={"expand": "mom,meeting", "limit": 10}).json()
+        assert listed[0]["mom"]["id"] == created["id"]
+        assert listed[0]["meeting"] == meeting
+
+    def test_unknown_expansion(self, client, mom):
+        _, _, created, _ = mom
+        for url in (f"/api/moms/{created['id']}", "/api/moms", "/api/tasks"):
+            response = client.get(url, params={"expand": "owner"})
+            assert response.status_code == 400 and "Cannot expand" in response.json()["detail"]
+
+
+class TestFieldSelection:
+    def test_fields_and_views(self, client, mom):
+        _, _, created, task = mom
+        listed = client.get("/api/tasks", params={"fields": "title,status"}).json()
+        assert listed == [{"id": task["id"], "title": "Follow up", "status": "open"}]
+        paged = client.get("/api/tasks", params={"fields": ["title"], "limit": 5}).json()
+        assert paged == [{"id": task["id"], "title": "Follow up"}]
+        summary = client.get("/api/tasks", params={"view": "summary"}).json()[0]
+        assert "description" not in summary and summary["title"] == "Follow up"
+        moms = client.get("/api/moms", params={"view": "summary"}).json()
+        assert "agenda_items" not in moms[0] and moms[0]["summary"] == "Quarterly planning"
+
+    def test_fields_with_expand(self, client, mom):
+        _, meeting, _, _ = mom
+        listed = client.get("/api/tasks", params={"fields": "title", "expand": "meeting"}).json()
+        assert listed[0]["title"] == "Follow up" and listed[0]["meeting"] == meeting
+
+    @pytest.mark.parametrize("url", ["/api/tasks", "/api/moms"])
+    @pytest.mark.parametrize("params", [{"fields": "title,owner"}, {"view": "tiny"}])
+    def test_unknown_field_or_view(self, client, url, params):
+        response = client.get(url, params=params)
+        assert response.status_code == 400 and response.json()["detail"]
+
+
+class TestMetrics:
+    def test_disabled(self, client):
+        response = client.get("/metrics")
+        assert response.status_code == 503 and "TASK_MANAGER_METRICS" in response.json()["detail"]
+
+    def test_prometheus_text(self, client):
+        METRICS.reset()
+        METRICS.enable()
+        try:
+            _create_task(client)
+            client.get("/api/tasks")
+            response = client.get("/metrics")
+        finally:
+            METRICS.enable(False)
+            METRICS.reset()
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'http_requests_total{method="GET",route="/api/tasks",status="200"} 1' in text
+        assert 'store_save_seconds_count{collection="tasks"} 1' in text
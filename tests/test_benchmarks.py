@@ -0,0 +1,55 @@
+"""Tests for the benchmark harness."""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from benchmarks.datasets import Scale, generate
+from benchmarks.harness import Result, compare, load, measure, percentile, save
+from task_manager.storage.json_store import JsonStore
+
+
+@pytest.fixture
+def tmp_dir():
+    tmp_dir = tempfile.mkdtemp()
+    yield tmp_dir
+    shutil.rmtree(tmp_dir)
+
+
+def test_percentiles():
+    ordered = [float(i) for i in range(1, 101)]
+    assert percentile(ordered, 50) == 50.0
+    assert percentile(ordered, 99) == 99.0
+    result = Result.from_samples("op", [0.002, 0.001, 0.003])
+    assert result.p50_ms == pytest.approx(2.0)
+    assert result.ops_per_sec == pytest.approx(500.0)
+
+
+def test_measure_counts_iterations():
+    calls = []
+    result = measure("op", calls.append, 5, warmup=2)
+    assert calls == [0, 1, 0, 1, 2, 3, 4]
+    assert result.iterations == 5
+
+
+def test_save_load_and_compare(tmp_dir):
+    path = os.path.join(tmp_dir, "baseline.json")
+    save(path, [Result("a", 10, 100.0, 1.0, 2.0, 1.0), Result("b", 10, 100.0, 1.0, 2.0, 1.0)],
+         {"scale": "small"})
+    assert json.load(open(path))["meta"] == {"scale": "small"}
+    current = [Result("a", 10, 80.0, 1.1, 2.0, 1.1), Result("b", 10, 50.0, 1.5, 3.0, 1.5),
+               Result("c", 10, 50.0, 9.0, 9.0, 9.0)]
+    comparisons = compare(current, load(path), threshold=0.2)
+    assert [(c.name, c.regressed) for c in comparisons] == [("a", False), ("b", True)]
+
+
+def test_generate_dataset(tmp_dir):
+    store = JsonStore(data_dir=tmp_dir)
+    dataset = generate(store, Scale(departments=2, meetings=3, agenda_items=2, tasks=10))
+    assert len(store.get_all("tasks")) == 10
+    assert len(dataset.mom_ids) == 3
+    assert all(len(m["agenda_items"]) == 2 for m in store.get_all("mom"))
+    assert {t["department_id"] for t in store.get_all("tasks")} <= set(dataset.department_ids)
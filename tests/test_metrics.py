@@ -0,0 +1,136 @@
+"""Tests for the metrics registry and instrumentation."""
+
+import asyncio
+import shutil
+import tempfile
+
+import pytest
+
+from task_manager.api.metrics import MetricsMiddleware
+from task_manager.metrics import METRICS, SIZE_BUCKETS, Metrics, instrument, parse, summarize
+from task_manager.services.task_service import TaskService
+from task_manager.storage.json_store import JsonStore
+
+
+@pytest.fixture
+def metrics():
+    METRICS.reset()
+    METRICS.enable()
+    yield METRICS
+    METRICS.enable(False)
+    METRICS.reset()
+
+
+@pytest.fixture
+def store():
+    tmp_dir = tempfile.mkdtemp()
+    s = JsonStore(data_dir=tmp_dir)
+    yield s
+    shutil.rmtree(tmp_dir)
+
+
+def _values(metrics, name):
+    return {
+        tuple(sorted(labels.items())): value
+        for n, labels, value in metrics.samples() if n == name
+    }
+
+
+class TestRegistry:
+    def test_disabled_records_nothing(self):
+        m = Metrics()
+        m.inc("store_lookups_total", collection="tasks")
+        m.observe("store_load_seconds", 0.1)
+        with m.timer("store_save_seconds"):
+            pass
+        assert m.samples() == [] and m.render() == ""
+
+    def test_render_and_parse_round_trip(self):
+        m = Metrics(enabled=True)
+        m.inc("store_lookups_total", collection='odd "name"\n', access="scan")
+        m.inc("store_lookups_total", 2, collection="tasks", access="hash")
+        for value in (0.0004, 0.003, 0.003, 20):
+            m.observe("store_load_seconds", value, collection="tasks")
+        m.observe("http_response_size_bytes", 300, SIZE_BUCKETS, route="/api/tasks")
+        text = m.render()
+        assert "# TYPE store_load_seconds histogram" in text
+        assert 'store_load_seconds_bucket{collection="tasks",le="0.005"} 3' in text
+        assert 'store_load_seconds_bucket{collection="tasks",le="+Inf"} 4' in text
+        assert 'store_load_seconds_count{collection="tasks"} 4' in text
+        assert parse(text) == m.samples()
+
+    def test_summarize(self):
+        m = Metrics(enabled=True)
+        for _ in range(99):
+            m.observe("store_query_seconds", 0.002, collection="tasks")
+        m.observe("store_query_seconds", 0.2, collection="tasks")
+        m.observe("http_response_size_bytes", 10 ** 6, SIZE_BUCKETS, route="/api/tasks")
+        m.inc("models_decoded_total", 5, model="Task")
+        lines = list(summarize(parse(m.render())))
+        assert lines[0].startswith("  store_query_seconds{collection=tasks}  n=100")
+        assert "p50<=2.50ms" in lines[0] and "p99<=2.50ms" in lines[0]
+        assert "http_response_size_bytes" in lines[1]
+        assert lines[2] == "  models_decoded_total{model=Task}  5"
+
+    def test_instrument_times_public_methods(self, metrics):
+        @instrument
+        class Service:
+            def work(self, x):
+                return x * 2
+
+            def _helper(self):
+                return 1
+
+        assert Service().work(2) == 4 and Service()._helper() == 1
+        assert Service.work.__name__ == "work"
+        counts = _values(metrics, "service_call_seconds_count")
+        assert counts == {(("method", "Service.work"),): 1}
+
+
+class TestInstrumentation:
+    def test_store_counters(self, metrics, store):
+        store.ensure_index("items", "kind")
+        store.insert_many("items", {
+            str(i): {"id": str(i), "kind": "ab"[i % 2], "n": i} for i in range(10)
+        })
+        store.find("items", kind="a")
+        store.find("items", n=3)
+        lookups = _values(metrics, "store_lookups_total")
+        assert lookups[(("access", "hash"), ("collection", "items"))] == 1
+        assert lookups[(("access", "scan"), ("collection", "items"))] == 1
+        assert _values(metrics, "store_records_examined_total") == {(("collection", "items"),): 15}
+        assert _values(metrics, "store_save_seconds_count") == {(("collection", "items"),): 1}
+        written = _values(metrics, "store_bytes_written_total")[(("collection", "items"),)]
+        assert written == len(open(store._file_path("items"), "rb").read())
+
+    def test_services_and_models(self, metrics, store):
+        svc = TaskService(store)
+        svc.create_task("T", "d1", "Bob")
+        # A second store, like another process, loads the collection itself.
+        other = TaskService(JsonStore(data_dir=store.data_dir))
+        assert len(other.list_tasks(assigned_to="Bob")) == 1
+        calls = _values(metrics, "service_call_seconds_count")
+        assert calls[(("method", "TaskService.create_task"),)] == 1
+        assert calls[(("method", "TaskService.list_tasks"),)] == 1
+        assert _values(metrics, "models_decoded_total") == {(("model", "Task"),): 1}
+        assert _values(metrics, "store_load_seconds_count")[(("collection", "tasks"),)] == 2
+
+    def test_middleware_labels_by_route(self, metrics):
+        class Route:
+            path = "/api/tasks/{task_id}"
+
+        async def app(scope, receive, send):
+            scope["route"] = Route()
+            await send({"type": "http.response.start", "status": 404, "headers": []})
+            await send({"type": "http.response.body", "body": b"x" * 10, "more_body": True})
+            await send({"type": "http.response.body", "body": b"y" * 5})
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": "/api/tasks/123"}
+        asyncio.run(MetricsMiddleware(app)(scope, None, send))
+        labels = (("method", "GET"), ("route", "/api/tasks/{task_id}"))
+        assert _values(metrics, "http_requests_total") == {labels + (("status", "404"),): 1}
+        assert _values(metrics, "http_response_size_bytes_sum") == {labels: 15}
+        assert _values(metrics, "http_request_duration_seconds_count") == {labels: 1}
@@ -5,7 +5,7 @@ import pytest
 from task_manager.models.department import Department
 from task_manager.models.meeting import Meeting
 from task_manager.models.mom import AgendaItem, MinutesOfMeeting, MOMStatus
-from task_manager.models.task import Task, TaskPriority, TaskStatus
+from task_manager.models.task import Task, TaskPriority, TaskStatus, normalize_due_date
 
 
 class TestDepartment:
@@ -187,3 +187,45 @@ class TestTask:
         assert restored.id == task.id
         assert restored.priority == TaskPriority.CRITICAL
         assert restored.mom_id == "mom-1"
+
+    def test_round_trip_is_exact(self):
+        task = Task(title="T", department_id="d1", assigned_to="Alice", due_date="2026-01-01")
+        assert Task.from_dict(task.to_dict()) == task
+        assert not hasattr(task, "__dict__")
+
+    def test_from_dict_fills_missing_timestamps(self):
+        task = Task.from_dict({"id": "t1", "title": "T", "department_id": "d1", "assigned_to": "A"})
+        assert task.status == TaskStatus.OPEN and task.priority == TaskPriority.MEDIUM
+        assert task.created_at == task.updated_at
+        assert task.created_at.startswith("20")
+
+    def test_from_dict_rejects_unknown_enum_values(self):
+        data = Task(title="T", department_id="d1", assigned_to="A").to_dict()
+        with pytest.raises(ValueError):
+            Task.from_dict(dict(data, status="archived"))
+        with pytest.raises(ValueError):
+            Task.from_dict(dict(data, priority="urgent"))
+
+    def test_from_dicts(self):
+        tasks = [Task(title=f"T{i}", department_id="d1", assigned_to="A") for i in range(3)]
+        assert Task.from_dicts(t.to_dict() for t in tasks) == tasks
+
+    def test_normalize_due_date(self):
+        assert normalize_due_date("2026-03-01") == "2026-03-01"
+        assert normalize_due_date("2026/3/1") == "2026-03-01"
+        assert normalize_due_date(" 2026-03-01T17:30:00 ") == "2026-03-01"
+        assert normalize_due_date("") is None and normalize_due_date(None) is None
+        for bad in ("tomorrow", "2026-02-30", "01-03-2026x"):
+            with pytest.raises(ValueError, match="Invalid due date"):
+                normalize_due_date(bad)
+
+
+class TestBulkDecoding:
+    def test_other_models_round_trip(self):
+        mom = MinutesOfMeeting(meeting_id="m-1", prepared_by="Alice")
+        mom.add_agenda_item("Item 1", "Discussion 1")
+        meeting = Meeting(title="M", department_id="d1", date="2026-01-01", attendees=["A"])
+        dept = Department(name="HR")
+        assert MinutesOfMeeting.from_dicts([mom.to_dict()]) == [mom]
+        assert Meeting.from_dicts([meeting.to_dict()]) == [meeting]
+        assert Department.from_dicts([dept.to_dict()]) == [dept]
@@ -1,25 +1,49 @@
 """Tests for service layer."""
 
+import asyncio
+import json
+import multiprocessing
 import os
 import shutil
 import tempfile
+import threading
 
 import pytest
 
 from task_manager.models.mom import MOMStatus
 from task_manager.models.task import TaskPriority, TaskStatus
+from task_manager.services.aio import AsyncMOMService, AsyncTaskService
+from task_manager.services.cache import ModelCache
+from task_manager.services.changefeed import ChangeFeed
+from task_manager.services.counters import Counters
 from task_manager.services.department_service import DepartmentService
+from task_manager.services.events import ChangeEvent, EventBus
+from task_manager.services.expand import (
+    MOM_EXPANSIONS,
+    expand_moms,
+    expand_tasks,
+    expanded_collections,
+    parse_expand,
+    with_expand_keys,
+)
+from task_manager.services.export import export_ndjson
+from task_manager.services.fields import select_fields
 from task_manager.services.mom_service import MOMService
-from task_manager.services.task_service import TaskService
-from task_manager.storage.json_store import JsonStore
+from task_manager.services.search import SearchIndex, stem, tokenize
+from task_manager.services.task_service import TaskQuery, TaskService
+from task_manager.storage.async_store import AsyncStore
+from task_manager.storage.factory import create_store
+from task_manager.storage.sqlite_store import SqliteStore
+from task_manager.storage.versions import VersionConflictError
 
 
-@pytest.fixture
-def store():
-    """Create a temporary data directory for test isolation."""
+@pytest.fixture(params=["json", "sqlite"])
+def store(request):
+    """Create a temporary data directory for test isolation, per backend."""
     tmp_dir = tempfile.mkdtemp()
-    s = JsonStore(data_dir=tmp_dir)
+    s = create_store(request.param, data_dir=tmp_dir)
     yield s
+    s.close()
     shutil.rmtree(tmp_dir)
 
 
@@ -225,3 +249,582 @@ class TestTaskService:
         alice_tasks = task_service.list_tasks(assigned_to="Alice")
         assert len(alice_tasks) == 1
         assert alice_tasks[0].assigned_to == "Alice"
+
+    def test_create_tasks_batch(self, task_service):
+        result = task_service.create_tasks([
+            {"title": "T1", "department_id": "d1", "assigned_to": "Alice"},
+            {"title": "T2", "department_id": "d1"},
+            {"title": "T3", "department_id": "d1", "assigned_to": "Bob", "priority": "urgent"},
+            {"title": "T4", "department_id": "d1", "assigned_to": "Carol", "priority": "high"},
+        ])
+        assert [t.title for t in result.succeeded] == ["T1", "T4"]
+        assert [e["index"] for e in result.errors] == [1, 2]
+        assert result.succeeded[1].priority == TaskPriority.HIGH
+        assert len(task_service.list_tasks()) == 2
+
+    def test_bulk_transition(self, task_service):
+        t1 = task_service.create_task("T1", "d1", "Alice")
+        t2 = task_service.create_task("T2", "d1", "Bob")
+        task_service.complete_task(t2.id)
+        result = task_service.bulk_transition([t1.id, t2.id, "missing"], "start")
+        assert [t.id for t in result.succeeded] == [t1.id]
+        assert [e["id"] for e in result.errors] == [t2.id, "missing"]
+        assert task_service.get_task(t1.id).status == TaskStatus.IN_PROGRESS
+
+    def test_bulk_transition_reports_concurrent_changes(self, task_service, monkeypatch):
+        t1, t2, t3 = (task_service.create_task(f"T{i}", "d1", "Alice") for i in range(3))
+        store = task_service.store
+        update_many = store.update_many
+
+        def racing_update_many(*args, **kwargs):
+            # Another writer gets in between the reads and the batch write.
+            monkeypatch.setattr(store, "update_many", update_many)
+            task_service.update_task(t2.id, title="Renamed")
+            store.delete(task_service.TASKS_COLLECTION, t3.id)
+            return update_many(*args, **kwargs)
+
+        monkeypatch.setattr(store, "update_many", racing_update_many)
+        result = task_service.bulk_transition([t1.id, t2.id, t3.id], "start")
+        assert [t.id for t in result.succeeded] == [t1.id]
+        errors = {e["id"]: e["error"] for e in result.errors}
+        assert "changed concurrently" in errors[t2.id] and "deleted" in errors[t3.id]
+        assert task_service.get_task(t1.id).status == TaskStatus.IN_PROGRESS
+        assert task_service.get_task(t2.id).status == TaskStatus.OPEN
+
+    def test_bulk_transition_unknown_action(self, task_service):
+        with pytest.raises(ValueError, match="Unknown action"):
+            task_service.bulk_transition([], "archive")
+
+    def test_list_tasks_page_sorted_by_priority(self, task_service):
+        for title, priority in [("a", "low"), ("b", "critical"), ("c", "medium"), ("d", "high")]:
+            task_service.create_task(title, "d1", "Alice", priority=TaskPriority(priority))
+        page = task_service.list_tasks_page(2, sort="-priority")
+        assert [t.title for t in page.items] == ["b", "d"]
+        page = task_service.list_tasks_page(2, cursor=page.next_cursor, sort="-priority")
+        assert [t.title for t in page.items] == ["c", "a"]
+        assert page.next_cursor is None
+
+    def test_list_tasks_with_query(self, task_service):
+        specs = [
+            ("a", "d1", "high", "2026-01-05"),
+            ("b", "d1", "critical", "2026-02-10"),
+            ("c", "d1", "low", "2026-01-03"),
+            ("d", "d2", "critical", "2026-01-04"),
+            ("e", "d1", "critical", None),
+        ]
+        for title, dept, priority, due in specs:
+            task_service.create_task(title, dept, "Alice", due_date=due,
+                                     priority=TaskPriority(priority))
+        done = task_service.create_task("f", "d1", "Bob", due_date="2026-01-01",
+                                        priority=TaskPriority.HIGH)
+        task_service.complete_task(done.id)
+        query = TaskQuery(
+            department_id="d1",
+            status=[TaskStatus.OPEN, TaskStatus.IN_PROGRESS],
+            priority=[TaskPriority.HIGH, TaskPriority.CRITICAL],
+            due_before="2026-03-01",
+        )
+        tasks = task_service.list_tasks(query=query, sort="-due_date")
+        assert [t.title for t in tasks] == ["b", "a"]
+        assert [t.title for t in task_service.list_tasks(query=TaskQuery(has_due_date=False))] == ["e"]
+        page = task_service.list_tasks_page(1, query=TaskQuery(due_after="2026-01-03"), sort="due_date")
+        assert [t.title for t in page.items] == ["d"]
+
+    def test_due_dates_are_normalized(self, task_service):
+        task = task_service.create_task("T", "d1", "Alice", due_date="2026/3/1")
+        assert task.due_date == "2026-03-01"
+        task = task_service.update_task(task.id, due_date="2026-04-02T09:00")
+        assert task_service.get_task(task.id).due_date == "2026-04-02"
+        with pytest.raises(ValueError, match="Invalid due date"):
+            task_service.create_task("T", "d1", "Alice", due_date="next week")
+        result = task_service.create_tasks([
+            {"title": "A", "department_id": "d1", "assigned_to": "A", "due_date": "2026/5/6"},
+            {"title": "B", "department_id": "d1", "assigned_to": "A", "due_date": "soon"},
+        ])
+        assert result.succeeded[0].due_date == "2026-05-06"
+        assert "Invalid due date" in result.errors[0]["error"]
+
+    def test_overdue_and_due_between(self, task_service):
+        for title, due in [("a", "2026-01-05"), ("b", "2026-01-02"), ("c", "2026-01-09"),
+                           ("d", "2026-01-12"), ("e", None)]:
+            task_service.create_task(title, "d1", "Alice", due_date=due)
+        done = task_service.create_task("f", "d1", "Bob", due_date="2026-01-01")
+        task_service.complete_task(done.id)
+        started = task_service.list_tasks(query=TaskQuery(title_prefix="c"))[0]
+        task_service.start_task(started.id)
+
+        assert [t.title for t in task_service.overdue_tasks(as_of="2026-01-10")] == ["b", "a", "c"]
+        assert [t.title for t in task_service.overdue_tasks(as_of="2026-01-10", limit=1)] == ["b"]
+        assert [t.title for t in task_service.due_between("2026-01-01", "2026-01-09")] == ["b", "a", "c"]
+        assert [t.title for t in task_service.due_between(
+            "2026-01-01", "2026-01-09", status=[TaskStatus.COMPLETED]
+        )] == ["f"]
+        assert len(task_service.due_between("2026-01-01", "2026-01-31", status=())) == 5
+        assert [t.title for t in task_service.upcoming_tasks(days=4, as_of="2026-01-05")] == ["a", "c"]
+        with pytest.raises(ValueError, match="after end date"):
+            task_service.due_between("2026-02-01", "2026-01-01")
+
+    def test_list_tasks_page_rejects_unknown_sort(self, task_service):
+        with pytest.raises(ValueError, match="Cannot sort"):
+            task_service.list_tasks_page(10, sort="title")
+
+
+class TestRevisions:
+    def test_stale_revision_is_rejected(self, task_service, mom_service):
+        task = task_service.create_task("T", "d1", "Alice")
+        assert task.rev == 1
+        task = task_service.update_task(task.id, title="U", expected_rev=1)
+        assert task.rev == 2 and task_service.get_task(task.id).rev == 2
+        with pytest.raises(VersionConflictError):
+            task_service.start_task(task.id, expected_rev=1)
+        assert task_service.start_task(task.id, expected_rev=2).rev == 3
+        result = task_service.bulk_transition([task.id], "complete")
+        assert result.succeeded[0].rev == 4
+        with pytest.raises(VersionConflictError):
+            task_service.delete_task(task.id, expected_rev=3)
+        assert task_service.delete_task(task.id, expected_rev=4) is True
+
+        meeting = mom_service.create_meeting("M", "d1", "2026-02-06")
+        mom = mom_service.create_mom(meeting.id, prepared_by="Alice")
+        with pytest.raises(VersionConflictError):
+            mom_service.submit_for_review(mom.id, expected_rev=7)
+        assert mom_service.get_mom(mom.id).status == MOMStatus.DRAFT
+        assert mom_service.submit_for_review(mom.id, expected_rev=mom.rev).rev == 2
+
+    def test_concurrent_change_is_not_overwritten(self, task_service):
+        task = task_service.create_task("T", "d1", "Alice")
+        stale, before = task_service._require(task.id)
+        task_service.update_task(task.id, title="Changed elsewhere")
+        stale.title = "Stale write"
+        with pytest.raises(VersionConflictError):
+            task_service._save(stale, before)
+        assert task_service.get_task(task.id).title == "Changed elsewhere"
+
+
+class TestChangeFeed:
+    def _events(self, collection, count):
+        return [ChangeEvent(collection, "insert", f"{collection}-{i}") for i in range(count)]
+
+    def test_feed_follows_service_writes(self, store):
+        bus = EventBus()
+        feed = ChangeFeed()
+        bus.subscribe(feed.apply)
+        tasks = TaskService(store, bus)
+        depts = DepartmentService(store, bus)
+        dept = depts.create_department("Eng")
+        task = tasks.create_task("T", dept.id, "Alice")
+        tasks.start_task(task.id)
+        tasks.delete_task(task.id)
+        batch = feed.since(0)
+        assert [(c.seq, c.event.collection, c.event.action) for c in batch.changes] == [
+            (1, "departments", "insert"), (2, "tasks", "insert"),
+            (3, "tasks", "update"), (4, "tasks", "delete"),
+        ]
+        assert batch.last_seq == 4 and not batch.reset
+        assert batch.changes[2].to_dict()["record"]["status"] == "in_progress"
+        assert feed.since(4).changes == []
+
+    def test_filters_limit_and_resets(self):
+        feed = ChangeFeed(capacity=5)
+        feed.apply(self._events("tasks", 2) + self._events("mom", 1))
+        batch = feed.since(0, collections=["mom"])
+        assert [c.event.id for c in batch.changes] == ["mom-0"] and batch.last_seq == 3
+        batch = feed.since(0, limit=2)
+        assert [c.seq for c in batch.changes] == [1, 2] and batch.last_seq == 2
+        assert feed.since(1, epoch="other").reset
+        assert feed.since(9).reset
+        feed.apply(self._events("tasks", 4))
+        assert feed.since(1).reset  # seq 2 has been evicted
+        assert [c.seq for c in feed.since(2).changes] == [3, 4, 5, 6, 7]
+
+    def test_wait_wakes_on_publish_from_another_thread(self):
+        feed = ChangeFeed()
+
+        async def wait():
+            assert not await feed.wait(0, timeout=0.01)
+            threading.Timer(0.05, feed.apply, [self._events("tasks", 1)]).start()
+            return await feed.wait(0, timeout=5)
+
+        assert asyncio.run(wait())
+        assert asyncio.run(feed.wait(0, timeout=5))
+
+
+class TestModelCache:
+    def test_repeated_gets_are_served_from_cache(self, store, task_service):
+        task = task_service.create_task("T", "d1", "Alice")
+        first = task_service.get_task(task.id)
+        assert task_service.get_task(task.id) is first
+        assert task_service.get_task("missing") is None
+        stats = task_service.cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+
+    def test_service_writes_invalidate(self, task_service, mom_service):
+        task = task_service.create_task("T", "d1", "Alice")
+        assert task_service.get_task(task.id).status == TaskStatus.OPEN
+        task_service.start_task(task.id)
+        assert task_service.get_task(task.id).status == TaskStatus.IN_PROGRESS
+        task_service.delete_task(task.id)
+        assert task_service.get_task(task.id) is None
+
+        meeting = mom_service.create_meeting("Standup", "d1", "2026-01-01")
+        mom = mom_service.create_mom(meeting.id, "Alice")
+        assert mom_service.get_mom(mom.id).summary == ""
+        mom_service.update_summary(mom.id, "Done")
+        assert mom_service.get_mom(mom.id).summary == "Done"
+        assert mom_service.get_meeting(meeting.id).title == "Standup"
+
+    def test_direct_store_writes_are_detected(self, store, task_service):
+        a = task_service.create_task("A", "d1", "Alice")
+        b = task_service.create_task("B", "d1", "Bob")
+        cached = task_service.get_task(a.id)
+        task_service.get_task(b.id)
+        store.update("tasks", b.id, dict(b.to_dict(), title="B2"))  # bypasses the services
+        assert task_service.get_task(a.id) is cached  # same revision, still valid
+        assert task_service.get_task(b.id).title == "B2"
+        assert task_service.cache.stats()["revalidations"] == 1
+
+    def test_lru_eviction_and_ttl(self, store, task_service):
+        now = [0.0]
+        cache = ModelCache(store, maxsize=2, ttl=10, clock=lambda: now[0])
+        ids = [task_service.create_task(f"T{i}", "d1", "Alice").id for i in range(3)]
+        get = lambda id: cache.get("tasks", id, dict)
+        get(ids[0]), get(ids[1]), get(ids[0]), get(ids[2])  # evicts ids[1]
+        assert cache.stats()["evictions"] == 1
+        get(ids[0])
+        assert cache.stats()["hits"] == 2
+        get(ids[1])
+        assert cache.stats()["misses"] == 4
+        now[0] = 11
+        get(ids[1])
+        stats = cache.stats()
+        assert (stats["expirations"], stats["misses"], stats["size"]) == (1, 5, 2)
+        with pytest.raises(ValueError):
+            ModelCache(store, maxsize=0)
+
+
+class TestAsyncServices:
+    def test_offloads_service_calls(self, store, task_service, mom_service):
+        async def run():
+            aio = AsyncStore(store)
+            tasks = AsyncTaskService(task_service, aio)
+            moms = AsyncMOMService(mom_service, aio)
+            task = await tasks.create_task("T", "d1", "Alice")
+            assert (await tasks.start_task(task.id)).status == TaskStatus.IN_PROGRESS
+            assert [t.id for t in await tasks.list_tasks()] == [task.id]
+            with pytest.raises(ValueError):
+                await tasks.start_task(task.id)
+            with pytest.raises(VersionConflictError):
+                await tasks.complete_task(task.id, expected_rev=1)
+            meeting = await moms.create_meeting("Standup", "d1", "2026-01-01")
+            mom = await moms.create_mom(meeting.id, "Alice")
+            assert (await moms.get_mom_by_meeting(meeting.id)).id == mom.id
+
+        asyncio.run(run())
+
+    def test_keeps_the_sync_signature(self):
+        assert AsyncTaskService.get_task.__doc__ == TaskService.get_task.__doc__
+        assert AsyncTaskService.get_task.__name__ == "get_task"
+
+
+class TestExport:
+    def test_export_ndjson(self, store, task_service):
+        for i in range(5):
+            task_service.create_task(f"T{i}", "d1", "Alice" if i % 2 else "Bob")
+        chunks = list(export_ndjson(store, "tasks", {"assigned_to": "Alice"}, chunk_size=1))
+        assert [json.loads(c)["title"] for c in chunks] == ["T1", "T3"]
+        text = "".join(export_ndjson(store, "tasks"))
+        assert len(text.splitlines()) == 5
+        assert all("_rev" not in json.loads(line) for line in text.splitlines())
+
+    def test_export_rejects_unknown_collection_and_filter(self, store):
+        with pytest.raises(ValueError, match="Unknown export"):
+            list(export_ndjson(store, "users"))
+        with pytest.raises(ValueError, match="Cannot filter"):
+            list(export_ndjson(store, "departments", {"name": "x"}))
+
+
+def _count_events(backend, data_dir, count):
+    store = create_store(backend, data_dir=data_dir)
+    counters = Counters(store)
+    for i in range(count):
+        counters.apply([ChangeEvent("tasks", "insert", str(i), after={"status": "open"})])
+    store.close()
+
+
+def _index_tasks(backend, data_dir, count):
+    store = create_store(backend, data_dir=data_dir)
+    events = EventBus()
+    index = SearchIndex(store)
+    index.MERGE_AT = 10
+    events.subscribe(index.apply)
+    tasks = TaskService(store, events)
+    for i in range(count):
+        tasks.create_task(f"Audit {i}", "d1", "Alice")
+    store.close()
+
+
+class TestCounters:
+    @pytest.fixture
+    def wired(self, store):
+        events = EventBus()
+        counters = Counters(store)
+        events.subscribe(counters.apply)
+        return counters, TaskService(store, events), MOMService(store, events)
+
+    def test_counts_follow_writes(self, wired):
+        counters, tasks, moms = wired
+        t1 = tasks.create_task("T1", "d1", "Alice")
+        t2 = tasks.create_task("T2", "d1", "Bob")
+        tasks.create_tasks([{"title": "T3", "department_id": "d1", "assigned_to": "Carol"}])
+        tasks.start_task(t1.id)
+        tasks.bulk_transition([t1.id, t2.id], "complete")
+        tasks.delete_task(t2.id)
+        assert counters.get("tasks") == {"total": 2, "by_status": {"open": 1, "completed": 1}}
+
+        meeting = moms.create_meeting("Standup", "d1", "2026-01-01")
+        mom = moms.create_mom(meeting.id, "Alice")
+        moms.submit_for_review(mom.id)
+        assert counters.get("meetings") == {"total": 1}
+        assert counters.get("mom") == {"total": 1, "by_status": {"pending_review": 1}}
+
+    def test_failed_writes_are_not_counted(self, wired):
+        counters, tasks, _ = wired
+        task = tasks.create_task("T1", "d1", "Alice")
+        tasks.complete_task(task.id)
+        with pytest.raises(ValueError):
+            tasks.start_task(task.id)
+        assert tasks.delete_task("missing") is False
+        assert counters.get("tasks") == {"total": 1, "by_status": {"completed": 1}}
+
+    def test_processes_do_not_lose_increments(self, store):
+        Counters(store)
+        backend = "sqlite" if isinstance(store, SqliteStore) else "json"
+        ctx = multiprocessing.get_context("fork")
+        procs = [
+            ctx.Process(target=_count_events, args=(backend, store.data_dir, 25))
+            for _ in range(4)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+        assert Counters(store).get("tasks") == {"total": 100, "by_status": {"open": 100}}
+
+    def test_built_from_existing_data_and_rebuilt_on_demand(self, store, task_service):
+        task_service.create_task("T1", "d1", "Alice")
+        counters = Counters(store)
+        assert counters.get("tasks") == {"total": 1, "by_status": {"open": 1}}
+        task_service.create_task("T2", "d1", "Bob")  # not wired, so counters drift
+        assert counters.get("tasks")["total"] == 1
+        assert counters.rebuild()["tasks"] == {"total": 2, "by_status": {"open": 2}}
+        assert counters.get("tasks")["total"] == 2
+
+
+class TestSearchIndex:
+    @pytest.fixture
+    def wired(self, store):
+        events = EventBus()
+        index = SearchIndex(store)
+        events.subscribe(index.apply)
+        return index, TaskService(store, events), MOMService(store, events)
+
+    def test_tokenize_and_stem(self):
+        assert tokenize("The Deciding vote: we DECIDED, it decides!") == ["decid", "vot", "decid", "decid"]
+        assert {stem(w) for w in ("plan", "plans", "planned", "planning")} == {"plan"}
+        assert stem("process") == stem("processes") == "process"
+
+    @pytest.mark.parametrize("merge_at", [1, SearchIndex.MERGE_AT])
+    def test_ranked_hits_follow_writes(self, wired, merge_at):
+        index, tasks, moms = wired
+        index.MERGE_AT = merge_at
+        meeting = moms.create_meeting("Planning", "d1", "2026-01-01")
+        mom = moms.create_mom(meeting.id, "Alice", summary="Quarterly planning")
+        moms.add_agenda_item(mom.id, "Budget", "Reviewed costs", "Decided to freeze hiring")
+        moms.add_agenda_item(mom.id, "Roadmap", "Release dates", "")
+        task = tasks.create_task("Hiring freeze memo", "d1", "Bob", description="Hiring freeze details")
+
+        hits = index.search("hiring freeze")
+        assert [(h["type"], h["id"]) for h in hits] == [("task", task.id), ("agenda_item", mom.id)]
+        assert hits[1]["item"] == 0 and hits[1]["title"] == "Budget"
+        assert hits[0]["score"] > hits[1]["score"]
+        assert [h["type"] for h in index.search("planned")] == ["mom"]
+        assert [h["type"] for h in index.search("hiring", types=["agenda_item"])] == ["agenda_item"]
+        assert index.search("the") == []
+        assert len(index.search("hiring", limit=1)) == 1
+
+        tasks.update_task(task.id, title="Travel policy", description="")
+        assert [h["type"] for h in index.search("hiring")] == ["agenda_item"]
+        assert index.search("travel")[0]["id"] == task.id
+        tasks.delete_task(task.id)
+        assert index.search("travel") == []
+        assert index.store.get(SearchIndex.TERMS_COLLECTION, "travel") is None
+
+    def test_invalid_arguments(self, wired):
+        index, _, _ = wired
+        with pytest.raises(ValueError, match="Unknown search type"):
+            index.search("x", types=["meeting"])
+        with pytest.raises(ValueError):
+            index.search("x", limit=0)
+
+    def test_built_from_existing_data_and_rebuilt_on_demand(self, store, task_service):
+        task_service.create_task("Audit logs", "d1", "Alice")
+        index = SearchIndex(store)
+        assert [h["title"] for h in index.search("audit")] == ["Audit logs"]
+        task_service.create_task("Audit trail", "d1", "Bob")  # not wired, so the index drifts
+        assert len(index.search("audit")) == 1
+        assert index.rebuild() == 2
+        assert len(index.search("audit")) == 2
+        assert store.get(SearchIndex.STATS_COLLECTION, "all")["docs"] == 2
+
+    def test_writes_only_touch_their_documents(self, store, wired, monkeypatch):
+        index, tasks, _ = wired
+        for i in range(20):
+            tasks.create_task(f"Audit logs {i}", "d1", "Alice", description="retention policy")
+        index.rebuild()
+        written = []
+        writes = ("insert", "insert_many", "update", "update_many", "update_with", "delete_many")
+        for name in writes:
+            real = getattr(store, name)
+
+            def record(collection, arg, *rest, _real=real):
+                ids = [arg] if isinstance(arg, str) else list(arg)
+                written.append((collection, ids))
+                return _real(collection, arg, *rest)
+
+            monkeypatch.setattr(store, name, record)
+        task = tasks.create_task("Audit trail", "d1", "Bob")
+        assert written[1:] == [
+            (SearchIndex.PENDING_COLLECTION, [f"task:{task.id}"]),
+            (SearchIndex.STATS_COLLECTION, ["all"]),
+        ]
+        assert len(index.search("audit", limit=50)) == 21
+
+    def test_pending_documents_are_merged(self, store, wired):
+        index, tasks, _ = wired
+        index.MERGE_AT = 3
+        created = [tasks.create_task(f"Audit {i}", "d1", "Alice") for i in range(7)]
+        tasks.update_task(created[0].id, title="Travel policy")
+        tasks.delete_task(created[1].id)
+        stats = store.get(SearchIndex.STATS_COLLECTION, "all")
+        assert stats["pending"] == len(store.get_all(SearchIndex.PENDING_COLLECTION)) < 3
+        assert "merging" not in stats
+        audit = store.get(SearchIndex.TERMS_COLLECTION, "audit")["postings"]
+        assert f"task:{created[0].id}" not in audit and f"task:{created[1].id}" not in audit
+        hits = index.search("audit travel", limit=50)
+        index.rebuild()
+        assert index.search("audit travel", limit=50) == hits
+        assert {h["id"] for h in hits} == {created[0].id} | {t.id for t in created[2:]}
+
+    def test_processes_do_not_lose_updates(self, store):
+        index = SearchIndex(store)
+        backend = "sqlite" if isinstance(store, SqliteStore) else "json"
+        ctx = multiprocessing.get_context("fork")
+        procs = [
+            ctx.Process(target=_index_tasks, args=(backend, store.data_dir, 25))
+            for _ in range(4)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+        assert store.get(SearchIndex.STATS_COLLECTION, "all")["docs"] == 100
+        hits = index.search("audit", limit=200)
+        assert len(hits) == 100
+        index.rebuild()
+        assert index.search("audit", limit=200) == hits
+
+
+class TestExpand:
+    @pytest.fixture
+    def data(self, store, dept_service, mom_service, task_service):
+        dept = dept_service.create_department("Eng")
+        meetings = [mom_service.create_meeting(f"M{i}", dept.id, "2026-01-01") for i in range(3)]
+        moms = [mom_service.create_mom(m.id, "Alice") for m in meetings]
+        tasks = [
+            task_service.create_task("T0", dept.id, "Bob", mom_id=moms[0].id),
+            task_service.create_task("T1", dept.id, "Bob", mom_id=moms[0].id),
+            task_service.create_task("T2", "gone", "Carol", mom_id=moms[1].id),
+            task_service.create_task("T3", dept.id, "Dan"),
+        ]
+        return dept, meetings, moms, tasks
+
+    def test_parse_expand(self):
+        assert parse_expand(["meeting,tasks", " department", "meeting"], MOM_EXPANSIONS) == [
+            "meeting", "tasks", "department"
+        ]
+        assert parse_expand([], MOM_EXPANSIONS) == []
+        with pytest.raises(ValueError, match="Cannot expand"):
+            parse_expand(["meeting,owner"], MOM_EXPANSIONS)
+        assert expanded_collections("task", ["meeting", "department"]) == ["mom", "meetings", "departments"]
+
+    def test_expand_moms_in_one_read_per_collection(self, store, data, monkeypatch):
+        dept, meetings, moms, tasks = data
+        calls = []
+        real_get_many = store.get_many
+        monkeypatch.setattr(store, "get", lambda *a: pytest.fail("per-row lookup"))
+        monkeypatch.setattr(store, "get_many", lambda c, ids: calls.append(c) or real_get_many(c, ids))
+        expanded = expand_moms(store, [m.to_dict() for m in moms], MOM_EXPANSIONS)
+        assert calls == ["meetings", "departments"]
+        assert [m["meeting"]["title"] for m in expanded] == ["M0", "M1", "M2"]
+        assert all(m["department"] == dept.to_dict() for m in expanded)
+        assert [[t["title"] for t in m["tasks"]] for m in expanded] == [["T0", "T1"], ["T2"], []]
+        assert "_rev" not in expanded[0]["meeting"] and "_rev" not in expanded[0]["tasks"][0]
+
+    def test_expand_tasks(self, store, data):
+        dept, meetings, moms, tasks = data
+        expanded = expand_tasks(store, [t.to_dict() for t in tasks], ["mom", "meeting", "department"])
+        assert [t["mom"]["id"] if t["mom"] else None for t in expanded] == [
+            moms[0].id, moms[0].id, moms[1].id, None
+        ]
+        assert [t["meeting"]["title"] if t["meeting"] else None for t in expanded] == ["M0", "M0", "M1", None]
+        assert [t["department"]["name"] if t["department"] else None for t in expanded] == [
+            "Eng", "Eng", None, "Eng"
+        ]
+        assert expand_tasks(store, [tasks[3].to_dict()], []) == [tasks[3].to_dict()]
+
+
+class TestFieldSelection:
+    def test_select_fields(self):
+        views = TaskService.VIEWS
+        assert select_fields([], None, TaskService.FIELDS, views) is None
+        assert select_fields(["title,status", "title"], None, TaskService.FIELDS, views) == [
+            "id", "title", "status"
+        ]
+        summary = select_fields([], "summary", TaskService.FIELDS, views)
+        assert summary[0] == "id" and "description" not in summary
+        with_description = select_fields(["description"], "summary", TaskService.FIELDS, views)
+        assert with_description[-1] == "description"
+        with pytest.raises(ValueError, match="Unknown field"):
+            select_fields(["title,_rev"], None, TaskService.FIELDS, views)
+        with pytest.raises(ValueError, match="Unknown view"):
+            select_fields([], "full", TaskService.FIELDS, views)
+        assert with_expand_keys("task", ["id"], ["meeting", "mom"]) == ["id", "mom_id"]
+        assert with_expand_keys("task", None, ["mom"]) is None
+
+    def test_list_moms_summary(self, mom_service):
+        meeting = mom_service.create_meeting("M", "d1", "2026-01-01")
+        mom = mom_service.create_mom(meeting.id, "Alice")
+        mom_service.add_agenda_item(mom.id, "Budget", discussion="x" * 1000)
+        mom_service.submit_for_review(mom.id)
+        expected = mom_service.get_mom(mom.id).to_dict()
+        del expected["agenda_items"]
+        assert mom_service.list_moms(view="summary") == [expected]
+        assert mom_service.list_moms(MOMStatus.DRAFT, view="summary") == []
+        page = mom_service.list_moms_page(10, sort="created_at", fields=["status"])
+        assert page.items == [{"id": mom.id, "status": "pending_review"}]
+
+    def test_list_tasks_fields(self, task_service):
+        for i in range(3):
+            task_service.create_task(
+                f"T{i}", "d1", "Bob", description="long", due_date=f"2026-01-0{3 - i}"
+            )
+        tasks = task_service.list_tasks(sort="due_date", fields=["title"])
+        assert [t["title"] for t in tasks] == ["T2", "T1", "T0"]
+        assert set(tasks[0]) == {"id", "title"}
+        page = task_service.list_tasks_page(2, query=TaskQuery(assigned_to="Bob"), view="summary")
+        assert len(page.items) == 2 and page.next_cursor
+        assert "description" not in page.items[0] and page.items[0]["due_date"] == "2026-01-03"
+        with pytest.raises(ValueError):
+            task_service.list_tasks(fields=["secret"])
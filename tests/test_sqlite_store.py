@@ -0,0 +1,289 @@
+"""Tests for the SQLite storage backend."""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import pytest
+
+from task_manager.storage.factory import create_store
+from task_manager.storage.json_store import JsonStore
+from task_manager.storage.pagination import SortSpec
+from task_manager.storage.query import eq, exists, gt, gte, in_, lt, prefix
+from task_manager.storage.sqlite_store import SqliteStore
+from task_manager.storage.versions import VersionConflictError
+
+
+@pytest.fixture
+def data_dir():
+    tmp_dir = tempfile.mkdtemp()
+    yield tmp_dir
+    shutil.rmtree(tmp_dir)
+
+
+@pytest.fixture
+def store(data_dir):
+    s = SqliteStore(data_dir=data_dir)
+    yield s
+    s.close()
+
+
+class TestSqliteStore:
+    def test_insert_and_get(self, store):
+        data = {"id": "1", "name": "test"}
+        store.insert("items", "1", data)
+        assert store.get("items", "1") == data
+
+    def test_insert_duplicate_raises(self, store):
+        store.insert("items", "1", {"id": "1"})
+        with pytest.raises(ValueError, match="already exists"):
+            store.insert("items", "1", {"id": "1"})
+
+    def test_get_many(self, store):
+        for id in ("a", "b", "c"):
+            store.insert("items", id, {"id": id})
+        found = store.get_many("items", ["c", "missing", "a", "c"])
+        assert list(found) == ["c", "a"]
+        assert found["a"] == {"id": "a", "_rev": 1}
+        assert store.get_many("items", []) == {}
+
+    def test_get_nonexistent(self, store):
+        assert store.get("items", "999") is None
+
+    def test_get_all_keeps_insertion_order(self, store):
+        for id in ("b", "a", "c"):
+            store.insert("items", id, {"id": id})
+        store.update("items", "b", {"id": "b", "touched": True})
+        assert [r["id"] for r in store.get_all("items")] == ["b", "a", "c"]
+
+    def test_update_and_delete(self, store):
+        store.insert("items", "1", {"id": "1", "name": "old"})
+        store.update("items", "1", {"id": "1", "name": "new"})
+        assert store.get("items", "1")["name"] == "new"
+        assert store.delete("items", "1") is True
+        assert store.delete("items", "1") is False
+
+    def test_update_nonexistent_raises(self, store):
+        with pytest.raises(ValueError, match="not found"):
+            store.update("items", "999", {"id": "999"})
+
+    def test_find_pushes_filters_down(self, store):
+        store.ensure_index("items", "type")
+        store.insert("items", "1", {"id": "1", "type": "a", "color": "red"})
+        store.insert("items", "2", {"id": "2", "type": "b", "color": "red"})
+        store.insert("items", "3", {"id": "3", "type": "a", "color": "blue", "tags": ["x"]})
+        assert [r["id"] for r in store.find("items", type="a")] == ["1", "3"]
+        assert [r["id"] for r in store.find("items", type="a", color="red")] == ["1"]
+        assert [r["id"] for r in store.find("items", color=None)] == []
+        assert [r["id"] for r in store.find("items", tags=["x"])] == ["3"]
+
+    def test_find_none_matches_missing_field(self, store):
+        store.insert("items", "1", {"id": "1", "mom_id": None})
+        store.insert("items", "2", {"id": "2"})
+        store.insert("items", "3", {"id": "3", "mom_id": "m"})
+        assert [r["id"] for r in store.find("items", mom_id=None)] == ["1", "2"]
+
+    def test_declared_indexes_are_created(self, data_dir):
+        store = SqliteStore(data_dir=data_dir, indexes={"items": ["type"]})
+        store.insert("items", "1", {"id": "1", "type": "a"})
+        store.ensure_index("items", "color")
+        store.close()
+        conn = sqlite3.connect(store.path)
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        assert {"items__type", "items__color"} <= names
+
+    def test_invalid_collection_name_rejected(self, store):
+        with pytest.raises(ValueError, match="Invalid"):
+            store.insert('items"; DROP TABLE x; --', "1", {})
+
+    def test_persistence(self, data_dir):
+        store = SqliteStore(data_dir=data_dir)
+        store.insert("items", "1", {"id": "1", "name": "persisted"})
+        store.close()
+        reopened = SqliteStore(data_dir=data_dir)
+        assert reopened.get("items", "1")["name"] == "persisted"
+        reopened.close()
+
+    def test_wal_mode_enabled(self, store):
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+class TestCreateStore:
+    def test_defaults_to_json(self, data_dir, monkeypatch):
+        monkeypatch.delenv("TASK_MANAGER_STORE", raising=False)
+        assert isinstance(create_store(data_dir=data_dir), JsonStore)
+
+    def test_backend_from_environment(self, data_dir, monkeypatch):
+        monkeypatch.setenv("TASK_MANAGER_STORE", "sqlite")
+        store = create_store(data_dir=data_dir)
+        assert isinstance(store, SqliteStore)
+        store.close()
+
+    def test_unknown_backend_raises(self, data_dir):
+        with pytest.raises(ValueError, match="Unknown storage backend"):
+            create_store("redis", data_dir=data_dir)
+
+
+class TestSqliteStoreBatch:
+    def test_batch_operations(self, store):
+        store.insert_many("items", {str(i): {"id": str(i), "v": 0} for i in range(5)})
+        store.update_many("items", {"1": {"id": "1", "v": 1}})
+        assert store.delete_many("items", ["3", "4", "missing"]) == 2
+        assert [(r["id"], r["v"]) for r in store.get_all("items")] == [("0", 0), ("1", 1), ("2", 0)]
+
+    def test_insert_many_is_atomic(self, store):
+        store.insert("items", "1", {"id": "1"})
+        with pytest.raises(ValueError, match="already exist"):
+            store.insert_many("items", {"2": {"id": "2"}, "1": {"id": "1"}})
+        assert store.get("items", "2") is None
+
+    def test_update_many_rejects_missing_ids(self, store):
+        store.insert("items", "1", {"id": "1", "v": 1})
+        with pytest.raises(ValueError, match="not found"):
+            store.update_many("items", {"1": {"id": "1", "v": 2}, "2": {"id": "2"}})
+        assert store.get("items", "1")["v"] == 1
+
+
+class TestSqliteStoreVersions:
+    def test_record_revisions(self, store):
+        store.insert("items", "1", {"id": "1"})
+        store.update("items", "1", {"id": "1", "v": 1}, expected_rev=1)
+        assert store.get("items", "1") == {"id": "1", "v": 1, "_rev": 2}
+        assert store.revision("items", "1") == 2 and store.revision("items", "2") is None
+        with pytest.raises(VersionConflictError):
+            store.update("items", "1", {"id": "1", "v": 2}, expected_rev=1)
+        with pytest.raises(VersionConflictError):
+            store.update_many("items", {"1": {"id": "1", "v": 3}}, expected_revs={"1": 1})
+        assert store.get("items", "1")["v"] == 1
+        with pytest.raises(VersionConflictError):
+            store.delete("items", "1", expected_rev=1)
+        assert store.delete("items", "1", expected_rev=2) is True
+        assert store.delete("items", "1", expected_rev=2) is False
+
+    def test_collection_version_is_shared_between_connections(self, store, data_dir):
+        assert store.version("items").tag == "0"
+        store.insert("items", "1", {"id": "1"})
+        other = SqliteStore(data_dir=data_dir)
+        assert other.version("items") == store.version("items")
+        tag = store.version("items").tag
+        other.delete("items", "1")
+        assert store.version("items").tag not in ("0", tag)
+        assert store.version("items").modified > 0
+        other.close()
+
+
+class TestSqliteStorePagination:
+    @pytest.fixture
+    def filled(self, store):
+        store.insert_many("items", {
+            str(i): {"id": str(i), "n": i % 4 if i != 5 else None, "kind": "ab"[i % 2]}
+            for i in range(10)
+        })
+        return store
+
+    def _walk(self, store, **kwargs):
+        ids, cursor = [], None
+        while True:
+            page = store.page("items", 3, cursor=cursor, **kwargs)
+            ids.extend(r["id"] for r in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                return ids
+
+    def test_insertion_order_pages(self, filled):
+        assert self._walk(filled) == [str(i) for i in range(10)]
+
+    def test_insertion_order_cursor_survives_deletes(self, filled):
+        first = filled.page("items", 3)
+        filled.delete("items", "0")
+        filled.delete("items", "2")
+        second = filled.page("items", 3, cursor=first.next_cursor)
+        assert [r["id"] for r in second.items] == ["3", "4", "5"]
+        filled.delete("items", "5")
+        third = filled.page("items", 3, cursor=second.next_cursor, fields=["n"])
+        assert third.items == [{"n": 2}, {"n": 3}, {"n": 0}]
+
+    @pytest.mark.parametrize("sort,filters", [
+        (SortSpec("n"), None),
+        (SortSpec("n", descending=True), None),
+        (SortSpec("n", ranks={3: 0, 2: 1, 1: 2, 0: 3}), {"kind": "b"}),
+        (SortSpec("n", descending=True), {"kind": "a"}),
+    ])
+    def test_matches_json_store(self, filled, data_dir, sort, filters):
+        reference = JsonStore(data_dir=os.path.join(data_dir, "json"))
+        reference.insert_many("items", {r["id"]: r for r in filled.get_all("items")})
+        expected = [r["id"] for r in reference.page("items", None, sort=sort, filters=filters).items]
+        assert self._walk(filled, sort=sort, filters=filters) == expected
+
+    def test_fields_are_extracted_in_sql(self, filled, monkeypatch):
+        filled.update("items", "1", {"id": "1", "n": 1, "kind": "b", "tags": ["x"], "done": True})
+        monkeypatch.setattr(filled.codec, "decode", lambda raw: pytest.fail("decoded a record"))
+        fields = ["id", "n", "done", "missing"]
+        page_sort = SortSpec("n", descending=True)
+        page = filled.page("items", 3, sort=page_sort, fields=fields)
+        assert page.items == [{"id": "5", "n": None}, {"id": "7", "n": 3}, {"id": "3", "n": 3}]
+        page = filled.page("items", 3, cursor=page.next_cursor, sort=page_sort, fields=fields)
+        assert page.items == [
+            {"id": "6", "n": 2}, {"id": "2", "n": 2}, {"id": "9", "n": 1}
+        ]
+        items = filled.query("items", [eq("kind", "b")], fields=["id", "n", "done"])
+        assert items[0] == {"id": "1", "n": 1, "done": True}
+        assert items[2] == {"id": "5", "n": None}
+        assert "tags" not in items[0]
+
+    def test_projected_nested_fields_are_decoded(self, filled):
+        filled.update("items", "1", {"id": "1", "tags": ["x", {"y": 1}], "done": False})
+        page = filled.page("items", 1, filters={"id": "1"}, fields=["tags", "done"])
+        assert page.items == [
+            {"tags": ["x", {"y": 1}], "done": False}
+        ]
+
+    def test_iterate_in_batches(self, filled):
+        assert [r["id"] for r in filled.iterate("items", batch_size=3)] == [str(i) for i in range(10)]
+        assert [r["id"] for r in filled.iterate("items", {"kind": "a"}, batch_size=2)] == [
+            "0", "2", "4", "6", "8"
+        ]
+
+
+class TestSqliteStoreQuery:
+    @pytest.fixture
+    def both(self, store, data_dir):
+        reference = JsonStore(data_dir=os.path.join(data_dir, "json"))
+        reference.ensure_index("items", "due", kind="sorted")
+        store.ensure_index("items", "due", kind="sorted")
+        records = {
+            str(i): {"id": str(i), "kind": "abc"[i % 3] if i % 5 else None,
+                     "due": f"2026-01-{i + 1:02d}" if i % 4 else None, "tags": ["t"] if i % 2 else []}
+            for i in range(20)
+        }
+        records["n"] = {"id": "n", "kind": "a", "due": 7, "tags": []}
+        for s in (store, reference):
+            s.insert_many("items", records)
+        return store, reference
+
+    @pytest.mark.parametrize("where", [
+        [gte("due", "2026-01-05"), lt("due", "2026-01-12")],
+        [in_("kind", ["a", None])],
+        [in_("kind", [])],
+        [prefix("due", "2026-01-1")],
+        [exists("due", False)],
+        [exists("kind"), gt("due", "2026-01-10")],
+        [gt("due", 3)],
+        [eq("tags", ["t"]), lt("due", "2026-01-10")],
+    ])
+    def test_matches_json_store(self, both, where):
+        store, reference = both
+        expected = sorted(r["id"] for r in reference.query("items", where))
+        assert sorted(r["id"] for r in store.query("items", where)) == expected
+        assert sorted(r["id"] for r in store.iterate("items", where=where)) == expected
+
+    def test_sorted_limited_query_uses_index(self, both):
+        store, reference = both
+        where = [lt("due", "2026-01-15")]
+        sort = SortSpec("due", descending=True)
+        assert store.query("items", where, sort=sort, limit=4) == reference.query(
+            "items", where, sort=sort, limit=4
+        )
+        assert any("items__due" in step for step in store.explain("items", where=where)["plan"])
@@ -1,11 +1,23 @@
 """Tests for the JSON storage backend."""
 
+import asyncio
+import json
+import multiprocessing
+import os
 import shutil
 import tempfile
+import threading
 
 import pytest
 
+from task_manager.storage.async_store import AsyncStore
+from task_manager.storage.codec import HAVE_ORJSON, get_codec
 from task_manager.storage.json_store import JsonStore
+from task_manager.storage.pagination import SortSpec, encode_cursor
+from task_manager.storage.query import Predicate, eq, exists, gt, gte, in_, lt, lte, prefix
+from task_manager.storage.slowlog import SLOW_LOG_FILE, SlowLog, read_entries, slow_report
+from task_manager.storage.snapshot import LazyRecords
+from task_manager.storage.versions import VersionConflictError
 
 
 @pytest.fixture
@@ -28,6 +40,14 @@ class TestJsonStore:
         with pytest.raises(ValueError, match="already exists"):
             store.insert("items", "1", {"id": "1"})
 
+    def test_get_many(self, store):
+        for id in ("a", "b", "c"):
+            store.insert("items", id, {"id": id})
+        found = store.get_many("items", ["c", "missing", "a", "c"])
+        assert list(found) == ["c", "a"]
+        assert found["a"] == {"id": "a", "_rev": 1}
+        assert store.get_many("items", []) == {}
+
     def test_get_nonexistent(self, store):
         assert store.get("items", "999") is None
 
@@ -71,3 +91,810 @@ class TestJsonStore:
         store._collections.clear()
         result = store.get("items", "1")
         assert result["name"] == "persisted"
+
+
+@pytest.fixture
+def log_dir():
+    tmp_dir = tempfile.mkdtemp()
+    yield tmp_dir
+    shutil.rmtree(tmp_dir)
+
+
+class TestJsonStoreLogMode:
+    def test_invalid_mode_raises(self, log_dir):
+        with pytest.raises(ValueError, match="Unknown storage mode"):
+            JsonStore(data_dir=log_dir, mode="bogus")
+
+    def test_mutations_append_to_log(self, log_dir):
+        store = JsonStore(data_dir=log_dir, mode="log")
+        store.insert("items", "1", {"id": "1", "name": "a"})
+        store.update("items", "1", {"id": "1", "name": "b"})
+        store.delete("items", "1")
+        store.close()
+        with open(os.path.join(log_dir, "items.log")) as f:
+            ops = [json.loads(line)["op"] for line in f]
+        assert ops == ["put", "put", "del"]
+        assert not os.path.exists(os.path.join(log_dir, "items.json"))
+
+    def test_log_replayed_on_load(self, log_dir):
+        store = JsonStore(data_dir=log_dir, mode="log")
+        store.insert("items", "1", {"id": "1", "name": "a"})
+        store.insert("items", "2", {"id": "2", "name": "b"})
+        store.update("items", "1", {"id": "1", "name": "changed"})
+        store.delete("items", "2")
+        store.close()
+
+        reopened = JsonStore(data_dir=log_dir, mode="log")
+        assert reopened.get("items", "1")["name"] == "changed"
+        assert reopened.get("items", "2") is None
+
+    def test_torn_tail_is_ignored(self, log_dir):
+        store = JsonStore(data_dir=log_dir, mode="log")
+        store.insert("items", "1", {"id": "1"})
+        store.close()
+        with open(os.path.join(log_dir, "items.log"), "a") as f:
+            f.write('{"op":"put","id":"2","da')
+
+        reopened = JsonStore(data_dir=log_dir, mode="log")
+        assert reopened.get("items", "1") == {"id": "1", "_rev": 1}
+        assert reopened.get("items", "2") is None
+        reopened.insert("items", "3", {"id": "3"})
+        reopened.close()
+        assert JsonStore(data_dir=log_dir, mode="log").get("items", "3") == {"id": "3", "_rev": 1}
+
+    def test_compact_writes_snapshot_and_clears_log(self, log_dir):
+        store = JsonStore(data_dir=log_dir, mode="log")
+        store.insert("items", "1", {"id": "1"})
+        store.insert("items", "2", {"id": "2"})
+        store.compact("items")
+        store.close()
+        with open(os.path.join(log_dir, "items.json")) as f:
+            assert set(json.load(f)) == {"1", "2"}
+        assert not os.path.exists(os.path.join(log_dir, "items.log"))
+        assert len(JsonStore(data_dir=log_dir, mode="log").get_all("items")) == 2
+
+    def test_background_compaction_after_threshold(self, log_dir):
+        store = JsonStore(data_dir=log_dir, mode="log", compact_threshold=5)
+        for i in range(12):
+            store.insert("items", str(i), {"id": str(i)})
+        store.close()
+        assert os.path.exists(os.path.join(log_dir, "items.json"))
+        assert len(JsonStore(data_dir=log_dir, mode="log").get_all("items")) == 12
+
+    def test_snapshot_mode_folds_leftover_log(self, log_dir):
+        store = JsonStore(data_dir=log_dir, mode="log")
+        store.insert("items", "1", {"id": "1"})
+        store.close()
+
+        snapshot_store = JsonStore(data_dir=log_dir)
+        assert snapshot_store.get("items", "1") == {"id": "1", "_rev": 1}
+        assert not os.path.exists(os.path.join(log_dir, "items.log"))
+        snapshot_store._collections.clear()
+        assert snapshot_store.get("items", "1") == {"id": "1", "_rev": 1}
+
+
+class TestJsonStoreIndexes:
+    @pytest.fixture
+    def indexed(self, store):
+        store.ensure_index("items", "type")
+        store.ensure_index("items", "color")
+        store.insert("items", "1", {"id": "1", "type": "a", "color": "red", "size": 1})
+        store.insert("items", "2", {"id": "2", "type": "b", "color": "red", "size": 2})
+        store.insert("items", "3", {"id": "3", "type": "a", "color": "blue", "size": 1})
+        return store
+
+    def test_find_uses_declared_index(self, indexed):
+        assert [r["id"] for r in indexed.find("items", type="a")] == ["1", "3"]
+        assert ("hash", "type") in indexed._indexes["items"]
+
+    def test_find_intersects_postings(self, indexed):
+        assert [r["id"] for r in indexed.find("items", type="a", color="red")] == ["1"]
+        assert indexed.find("items", type="b", color="blue") == []
+
+    def test_match_examines_only_the_intersection(self, indexed):
+        indexed.insert("items", "4", {"id": "4", "type": "a", "color": "green", "size": 3})
+        with indexed._reading("items") as records:
+            matched = indexed._match_ids("items", records, {"type": "a", "color": "red"})
+            assert matched == (["1"], "hash", 1)
+            matched = indexed._match_ids("items", records, {"type": "a", "color": "red", "size": 2})
+            assert matched == ([], "hash", 1)
+
+    def test_find_mixes_indexed_and_unindexed_filters(self, indexed):
+        assert [r["id"] for r in indexed.find("items", color="red", size=2)] == ["2"]
+
+    def test_indexes_follow_update_and_delete(self, indexed):
+        indexed.find("items", type="a")
+        indexed.update("items", "1", {"id": "1", "type": "b", "color": "red", "size": 1})
+        indexed.delete("items", "3")
+        indexed.insert("items", "4", {"id": "4", "type": "a", "color": "red"})
+        assert [r["id"] for r in indexed.find("items", type="a")] == ["4"]
+        assert [r["id"] for r in indexed.find("items", type="b")] == ["2", "1"]
+
+    def test_none_matches_missing_field(self, indexed):
+        indexed.insert("items", "5", {"id": "5", "color": "red"})
+        assert [r["id"] for r in indexed.find("items", type=None)] == ["5"]
+
+    def test_index_declared_after_load(self, store):
+        store.insert("items", "1", {"id": "1", "tag": "x"})
+        store.find("items", tag="x")
+        store.ensure_index("items", "tag")
+        assert store._indexes["items"][("hash", "tag")].lookup("x") == {"1": None}
+
+    def test_indexes_rebuilt_after_reload(self, indexed):
+        indexed.find("items", type="a")
+        indexed._collections.clear()
+        assert [r["id"] for r in indexed.find("items", type="a", color="blue")] == ["3"]
+
+
+class TestCodec:
+    @pytest.mark.parametrize("name", ["json", "orjson"])
+    def test_round_trip(self, name):
+        if name == "orjson" and not HAVE_ORJSON:
+            pytest.skip("orjson is not installed")
+        codec = get_codec(name)
+        value = {"name": "Zoë", "n": [1, 2.5, None, True], 3: "x"}
+        assert codec.encode(value) == '{"name":"Zoë","n":[1,2.5,null,true],"3":"x"}'.encode()
+        assert codec.decode(codec.encode(value)) == {"name": "Zoë", "n": [1, 2.5, None, True], "3": "x"}
+        assert codec.decode(codec.encode({"a": 1}, pretty=True)) == {"a": 1}
+        assert b"\n  " in codec.encode({"a": 1}, pretty=True)
+
+    def test_unknown_or_missing_codec(self):
+        assert get_codec("auto").name == ("orjson" if HAVE_ORJSON else "json")
+        with pytest.raises(ValueError):
+            get_codec("yaml")
+
+    def test_snapshots_are_compact_unless_pretty(self, log_dir):
+        JsonStore(data_dir=log_dir).insert("items", "1", {"id": "1"})
+        with open(os.path.join(log_dir, "items.json")) as f:
+            assert f.read() == '{"1":{"id":"1","_rev":1}}'
+        pretty = JsonStore(data_dir=log_dir, pretty=True)
+        pretty.insert("items", "2", {"id": "2"})
+        with open(os.path.join(log_dir, "items.json")) as f:
+            assert f.read().startswith('{\n  "1": {')
+        assert [r["id"] for r in JsonStore(data_dir=log_dir, codec="json").get_all("items")] == ["1", "2"]
+
+
+class TestLazySnapshot:
+    def _fill(self, data_dir, count=50, **kwargs):
+        store = JsonStore(data_dir=data_dir, **kwargs)
+        store.insert_many("items", {str(i): {"id": str(i), "n": i} for i in range(count)})
+        store.close()
+
+    def test_point_lookup_decodes_one_record(self, log_dir):
+        self._fill(log_dir)
+        with open(os.path.join(log_dir, "items.json")) as f:
+            assert len(json.load(f)) == 50
+        store = JsonStore(data_dir=log_dir)
+        assert store.get("items", "42") == {"id": "42", "n": 42, "_rev": 1}
+        assert store.get("items", "missing") is None
+        records = store._collections["items"]
+        assert isinstance(records, LazyRecords)
+        assert not records.materialized
+        assert list(records._values) == ["42"]
+        assert [r["n"] for r in store.get_all("items")] == list(range(50))
+        assert records.materialized
+
+    def test_unfiltered_page_decodes_only_that_page(self, log_dir):
+        self._fill(log_dir)
+        store = JsonStore(data_dir=log_dir)
+        store.delete("items", "0")
+        store.insert("items", "new", {"id": "new", "n": -1})
+        page = store.page("items", 3, fields=["n"])
+        assert page.items == [{"n": 1}, {"n": 2}, {"n": 3}]
+        records = store._collections["items"]
+        assert not records.materialized
+        assert sorted(records._values) == ["1", "2", "3", "new"]
+        last = store.page("items", 3, cursor=encode_cursor([47, "48"]))
+        assert [r["id"] for r in last.items] == ["49", "new"]
+
+    def test_mutations_keep_dict_order(self, log_dir):
+        self._fill(log_dir, count=5)
+        store = JsonStore(data_dir=log_dir, commit_window=60)
+        expected = {str(i): i for i in range(5)}
+        store.delete("items", "1")
+        del expected["1"]
+        store.insert("items", "1", {"id": "1", "n": 10})
+        expected["1"] = 10
+        store.update("items", "3", {"id": "3", "n": 30})
+        expected["3"] = 30
+        store.insert("items", "9", {"id": "9", "n": 9})
+        store.delete("items", "9")
+        assert len(store._collections["items"]) == 5
+        store.close()
+        for reader in (store, JsonStore(data_dir=log_dir)):
+            assert {r["id"]: r["n"] for r in reader.get_all("items")} == expected
+            assert [r["id"] for r in reader.get_all("items")] == list(expected)
+
+    def test_stale_or_missing_index_falls_back(self, log_dir):
+        self._fill(log_dir, count=3)
+        path = os.path.join(log_dir, "items.json")
+        with open(path, "w") as f:
+            json.dump({"7": {"id": "7"}}, f, indent=2)
+        store = JsonStore(data_dir=log_dir)
+        assert store.get_all("items") == [{"id": "7"}]
+        assert not isinstance(store._collections["items"], LazyRecords)
+        # The next write brings the index back.
+        store.insert("items", "8", {"id": "8"})
+        reader = JsonStore(data_dir=log_dir)
+        assert reader.get("items", "8") == {"id": "8", "_rev": 1}
+        assert isinstance(reader._collections["items"], LazyRecords)
+
+        JsonStore(data_dir=log_dir, pretty=True).insert("items", "9", {"id": "9"})
+        assert not os.path.exists(os.path.join(log_dir, "items.idx"))
+        assert len(JsonStore(data_dir=log_dir).get_all("items")) == 3
+
+    def test_log_mode_and_compaction(self, log_dir):
+        self._fill(log_dir, count=10)
+        store = JsonStore(data_dir=log_dir, mode="log")
+        store.update("items", "2", {"id": "2", "n": 20})
+        store.delete("items", "5")
+        store.compact("items")
+        assert not store._collections["items"].materialized
+        reloaded = JsonStore(data_dir=log_dir, mode="log")
+        assert reloaded.get("items", "2")["n"] == 20
+        assert reloaded.get("items", "5") is None
+        assert len(reloaded.get_all("items")) == 9
+        store.close()
+
+
+class TestJsonStoreDurability:
+    def test_failed_save_keeps_previous_file(self, store, monkeypatch):
+        store.insert("items", "1", {"id": "1"})
+
+        def explode(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(store.codec, "encode", explode)
+        with pytest.raises(OSError):
+            store.insert("items", "2", {"id": "2"})
+        monkeypatch.undo()
+
+        with open(os.path.join(store.data_dir, "items.json")) as f:
+            assert json.load(f) == {"1": {"id": "1", "_rev": 1}}
+        assert not [name for name in os.listdir(store.data_dir) if name.endswith(".tmp")]
+
+    def test_snapshots_keep_file_mode(self, store):
+        store.insert("items", "1", {"id": "1"})
+        path = store._file_path("items")
+        umask = os.umask(0)
+        os.umask(umask)
+        assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+        os.chmod(path, 0o640)
+        store.insert("items", "2", {"id": "2"})
+        assert os.stat(path).st_mode & 0o777 == 0o640
+        umask = os.umask(0o077)  # the current umask applies, not one read at import
+        try:
+            store.insert("other", "1", {"id": "1"})
+        finally:
+            os.umask(umask)
+        assert os.stat(store._file_path("other")).st_mode & 0o777 == 0o600
+
+    def test_fsync_policy(self, log_dir, monkeypatch):
+        calls = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(os, "fsync", lambda fd: calls.append(fd) or real_fsync(fd))
+        JsonStore(data_dir=log_dir).insert("items", "1", {"id": "1"})
+        assert calls == []
+        JsonStore(data_dir=log_dir, fsync=True).insert("items", "2", {"id": "2"})
+        assert calls
+        calls.clear()
+        JsonStore(data_dir=log_dir, mode="log", fsync=True).insert("logged", "1", {"id": "1"})
+        assert calls
+
+    def test_group_commit_flushes_on_batch_size(self, log_dir):
+        store = JsonStore(data_dir=log_dir, commit_window=60, commit_batch=3)
+        path = os.path.join(log_dir, "items.json")
+        store.insert("items", "1", {"id": "1"})
+        store.insert("items", "2", {"id": "2"})
+        assert not os.path.exists(path)
+        store.insert("items", "3", {"id": "3"})
+        with open(path) as f:
+            assert len(json.load(f)) == 3
+        store.close()
+
+    def test_group_commit_flushes_after_window(self, log_dir):
+        store = JsonStore(data_dir=log_dir, commit_window=0.2)
+        store.insert("items", "1", {"id": "1"})
+        timer = store._timer
+        store.insert("other", "1", {"id": "1"})
+        assert not os.path.exists(os.path.join(log_dir, "items.json"))
+        timer.join()
+        assert os.path.exists(os.path.join(log_dir, "items.json"))
+        assert os.path.exists(os.path.join(log_dir, "other.json"))
+        store.close()
+
+    def test_close_flushes_pending_commits(self, log_dir):
+        store = JsonStore(data_dir=log_dir, commit_window=60)
+        store.insert("items", "1", {"id": "1"})
+        store.close()
+        assert JsonStore(data_dir=log_dir).get("items", "1") == {"id": "1", "_rev": 1}
+
+
+def _insert_range(data_dir, mode, prefix, count):
+    store = JsonStore(data_dir=data_dir, mode=mode)
+    for i in range(count):
+        store.insert("items", f"{prefix}-{i}", {"id": f"{prefix}-{i}", "owner": prefix})
+    store.close()
+
+
+class TestJsonStoreConcurrency:
+    def test_concurrent_threads_do_not_lose_writes(self, store):
+        store.ensure_index("items", "owner")
+
+        def worker(n):
+            for i in range(25):
+                store.insert("items", f"{n}-{i}", {"id": f"{n}-{i}", "owner": n})
+                store.find("items", owner=n)
+                store.get_all("items")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(store.get_all("items")) == 200
+        store._collections.clear()
+        assert len(store.get_all("items")) == 200
+
+    @pytest.mark.parametrize("mode", ["snapshot", "log"])
+    def test_second_instance_sees_changes(self, log_dir, mode):
+        first = JsonStore(data_dir=log_dir, mode=mode)
+        second = JsonStore(data_dir=log_dir, mode=mode)
+        first.insert("items", "1", {"id": "1"})
+        assert second.get("items", "1") == {"id": "1", "_rev": 1}
+        second.update("items", "1", {"id": "1", "v": 2})
+        second.insert("items", "2", {"id": "2"})
+        assert first.get("items", "1") == {"id": "1", "v": 2, "_rev": 2}
+        assert len(first.find("items")) == 2
+        first.close()
+        second.close()
+
+    def test_unchanged_collection_is_not_reloaded(self, store):
+        store.insert("items", "1", {"id": "1"})
+        records = store._collections["items"]
+        store.get("items", "1")
+        assert store._collections["items"] is records
+
+    @pytest.mark.parametrize("mode", ["snapshot", "log"])
+    def test_multiple_processes_do_not_lose_writes(self, log_dir, mode):
+        ctx = multiprocessing.get_context("fork")
+        procs = [
+            ctx.Process(target=_insert_range, args=(log_dir, mode, f"p{n}", 30))
+            for n in range(3)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+        assert len(JsonStore(data_dir=log_dir, mode=mode).get_all("items")) == 90
+
+    def test_compaction_with_second_writer(self, log_dir):
+        first = JsonStore(data_dir=log_dir, mode="log")
+        second = JsonStore(data_dir=log_dir, mode="log")
+        first.insert("items", "1", {"id": "1"})
+        second.insert("items", "2", {"id": "2"})
+        first.compact("items")
+        second.insert("items", "3", {"id": "3"})
+        first.close()
+        second.close()
+        reopened = JsonStore(data_dir=log_dir, mode="log")
+        assert sorted(r["id"] for r in reopened.get_all("items")) == ["1", "2", "3"]
+
+
+def _increment(data_dir, count):
+    store = JsonStore(data_dir=data_dir)
+    for _ in range(count):
+        store.update_with("counts", {"n": lambda r: {"n": (r or {"n": 0})["n"] + 1}})
+    store.close()
+
+
+class TestJsonStoreUpdateWith:
+    def test_inserts_updates_and_deletes(self, store):
+        store.insert_many("items", {"a": {"id": "a", "n": 1}, "b": {"id": "b"}})
+        result = store.update_with("items", {
+            "a": lambda r: {**r, "n": r["n"] + 1},
+            "b": lambda r: None,
+            "c": lambda r: {"id": "c", "was": r},
+        })
+        assert result["b"] is None
+        assert store.get("items", "a") == {"id": "a", "n": 2, "_rev": 2}
+        assert store.get("items", "b") is None
+        assert store.get("items", "c") == {"id": "c", "was": None, "_rev": 1}
+
+    def test_nothing_is_written_when_a_change_fails(self, store):
+        store.insert("items", "a", {"id": "a", "tags": ["x"]})
+
+        def fail(record):
+            raise ValueError("no")
+
+        def mutate(record):
+            record["tags"].append("y")
+            return record
+
+        with pytest.raises(ValueError):
+            store.update_with("items", {"a": mutate, "b": fail})
+        assert store.get("items", "a") == {"id": "a", "tags": ["x"], "_rev": 1}
+
+    def test_processes_do_not_lose_updates(self, log_dir):
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=_increment, args=(log_dir, 30)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+        assert JsonStore(data_dir=log_dir).get("counts", "n")["n"] == 120
+
+
+class TestJsonStoreVersions:
+    def test_record_revisions(self, store):
+        store.insert("items", "1", {"id": "1"})
+        store.insert_many("items", {"2": {"id": "2"}})
+        assert store.revision("items", "1") == store.revision("items", "2") == 1
+        store.update("items", "1", {"id": "1", "v": 1}, expected_rev=1)
+        assert store.get("items", "1") == {"id": "1", "v": 1, "_rev": 2}
+        with pytest.raises(VersionConflictError, match="revision 2, expected 1"):
+            store.update("items", "1", {"id": "1", "v": 2}, expected_rev=1)
+        with pytest.raises(VersionConflictError):
+            store.update_many("items", {"1": {"id": "1"}, "2": {"id": "2"}},
+                              expected_revs={"1": 2, "2": 5})
+        assert store.get("items", "1")["v"] == 1
+        assert store.revision("items", "missing") is None
+        with pytest.raises(VersionConflictError):
+            store.delete("items", "1", expected_rev=1)
+        assert store.delete("items", "1", expected_rev=2) is True
+        assert store.delete("items", "1", expected_rev=2) is False
+
+    def test_collection_version_changes_on_every_write(self, store):
+        seen = [store.version("items").tag]
+        store.insert("items", "1", {"id": "1"})
+        seen.append(store.version("items").tag)
+        assert store.version("items").tag == seen[-1]
+        store.update("items", "1", {"id": "1", "v": 1})
+        seen.append(store.version("items").tag)
+        store.delete("items", "1")
+        seen.append(store.version("items").tag)
+        assert len(set(seen)) == 4
+        assert store.delete("items", "1") is False
+        assert store.version("items").tag == seen[-1]
+
+    def test_other_process_writes_change_the_version(self, log_dir):
+        first = JsonStore(data_dir=log_dir)
+        second = JsonStore(data_dir=log_dir)
+        first.insert("items", "1", {"id": "1"})
+        before = second.version("items")
+        first.update("items", "1", {"id": "1", "v": 1})
+        after = second.version("items")
+        assert after.tag != before.tag and after.modified >= before.modified
+        assert second.revision("items", "1") == 2
+
+
+class TestJsonStoreBatch:
+    @pytest.mark.parametrize("mode", ["snapshot", "log"])
+    def test_batch_operations_persist(self, log_dir, mode):
+        store = JsonStore(data_dir=log_dir, mode=mode)
+        store.ensure_index("items", "kind")
+        store.insert_many("items", {str(i): {"id": str(i), "kind": "a"} for i in range(5)})
+        store.update_many("items", {"1": {"id": "1", "kind": "b"}, "2": {"id": "2", "kind": "b"}})
+        assert store.delete_many("items", ["3", "4", "missing"]) == 2
+        store.close()
+
+        reopened = JsonStore(data_dir=log_dir, mode=mode)
+        reopened.ensure_index("items", "kind")
+        assert [r["id"] for r in reopened.find("items", kind="a")] == ["0"]
+        assert [r["id"] for r in reopened.find("items", kind="b")] == ["1", "2"]
+
+    def test_batch_insert_writes_once(self, store, monkeypatch):
+        saves = []
+        real_save = store._save
+        monkeypatch.setattr(store, "_save", lambda c: saves.append(c) or real_save(c))
+        store.insert_many("items", {str(i): {"id": str(i)} for i in range(50)})
+        assert saves == ["items"]
+
+    def test_insert_many_rejects_existing_ids(self, store):
+        store.insert("items", "1", {"id": "1"})
+        with pytest.raises(ValueError, match="already exist"):
+            store.insert_many("items", {"2": {"id": "2"}, "1": {"id": "1"}})
+        assert store.get("items", "2") is None
+
+    def test_update_many_rejects_missing_ids(self, store):
+        store.insert("items", "1", {"id": "1", "v": 1})
+        with pytest.raises(ValueError, match="not found"):
+            store.update_many("items", {"1": {"id": "1", "v": 2}, "2": {"id": "2"}})
+        assert store.get("items", "1")["v"] == 1
+
+
+class TestJsonStorePagination:
+    @pytest.fixture
+    def filled(self, store):
+        store.insert_many("items", {
+            str(i): {"id": str(i), "n": i % 4 if i != 5 else None, "kind": "ab"[i % 2]}
+            for i in range(10)
+        })
+        return store
+
+    def _walk(self, store, **kwargs):
+        pages, cursor = [], None
+        while True:
+            page = store.page("items", 3, cursor=cursor, **kwargs)
+            pages.append([r["id"] for r in page.items])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_insertion_order_pages(self, filled):
+        assert self._walk(filled) == [["0", "1", "2"], ["3", "4", "5"], ["6", "7", "8"], ["9"]]
+
+    def test_sorted_pages(self, filled):
+        pages = self._walk(filled, sort=SortSpec("n"))
+        assert sum(pages, []) == ["0", "4", "8", "1", "9", "2", "6", "3", "7", "5"]
+
+    def test_descending_pages(self, filled):
+        pages = self._walk(filled, sort=SortSpec("n", descending=True))
+        assert sum(pages, []) == ["5", "7", "3", "6", "2", "9", "1", "8", "4", "0"]
+
+    def test_ranked_sort_with_filters(self, filled):
+        ranks = {3: 0, 2: 1, 1: 2, 0: 3}
+        pages = self._walk(filled, sort=SortSpec("n", ranks=ranks), filters={"kind": "b"})
+        assert sum(pages, []) == ["3", "7", "1", "9", "5"]
+
+    def test_cursor_survives_concurrent_insert(self, filled):
+        first = filled.page("items", 4, sort=SortSpec("n"))
+        filled.insert("items", "new", {"id": "new", "n": 0})
+        second = filled.page("items", 4, cursor=first.next_cursor, sort=SortSpec("n"))
+        assert [r["id"] for r in second.items] == ["9", "2", "6", "3"]
+
+    def test_insertion_order_cursor_survives_deletes(self, filled):
+        first = filled.page("items", 3)
+        filled.delete("items", "0")
+        filled.delete("items", "2")
+        second = filled.page("items", 3, cursor=first.next_cursor)
+        assert [r["id"] for r in second.items] == ["3", "4", "5"]
+        # Another process deletes the page's last record; this one reloads.
+        JsonStore(data_dir=filled.data_dir).delete("items", "5")
+        third = filled.page("items", 3, cursor=second.next_cursor)
+        assert [r["id"] for r in third.items] == ["6", "7", "8"]
+
+    def test_insertion_order_with_an_index(self, filled):
+        filled.ensure_index("items", "kind")
+        filled.update("items", "1", {"id": "1", "n": 1, "kind": "a"})
+        assert sum(self._walk(filled, filters={"kind": "a"}), []) == ["0", "1", "2", "4", "6", "8"]
+
+    @pytest.mark.parametrize("descending", [False, True])
+    @pytest.mark.parametrize("filters", [None, {"kind": "b"}, {"status": "open"}])
+    def test_sorted_index_serves_pages(self, store, descending, filters):
+        reference = JsonStore(data_dir=os.path.join(store.data_dir, "reference"))
+        store.ensure_index("items", "due", kind="sorted", partition_by="status")
+        items = {
+            str(i): {
+                "id": str(i),
+                "due": None if i % 7 == 0 else f"2026-01-{i % 5 + 1:02d}",
+                "kind": "ab"[i % 2],
+                "status": ("open", "done")[i % 3 == 0],
+            }
+            for i in range(30)
+        }
+        store.insert_many("items", {id: dict(r) for id, r in items.items()})
+        reference.insert_many("items", {id: dict(r) for id, r in items.items()})
+        store.delete("items", "4")
+        reference.delete("items", "4")
+        sort = SortSpec("due", descending=descending)
+        expected = reference.page("items", None, sort=sort, filters=filters).items
+        pages = self._walk(store, sort=sort, filters=filters)
+        assert sum(pages, []) == [r["id"] for r in expected]
+        assert store.page("items", 3, sort=sort, filters=filters) == (
+            reference.page("items", 3, sort=sort, filters=filters)
+        )
+
+    def test_sorted_index_walk_stops_at_the_page(self, store):
+        store.ensure_index("items", "due", kind="sorted")
+        store.insert_many("items", {
+            str(i): {"id": str(i), "due": f"2026-{i % 12 + 1:02d}-01"} for i in range(1000)
+        })
+        page, access, examined = store._page(
+            "items", store._collections["items"], 10, None, SortSpec("due"), {}, ()
+        )
+        assert access == "sorted" and examined == 11
+        assert [r["due"] for r in page.items] == ["2026-01-01"] * 10
+
+    def test_unlimited_page(self, filled):
+        page = filled.page("items", None, sort=SortSpec("n"))
+        assert len(page.items) == 10 and page.next_cursor is None
+
+    def test_invalid_cursor(self, filled):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            filled.page("items", 3, cursor="%%%")
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            filled.page("items", 3, cursor=encode_cursor(5), sort=SortSpec("n"))
+
+    def test_iterate_in_batches(self, filled):
+        assert [r["id"] for r in filled.iterate("items", batch_size=3)] == [str(i) for i in range(10)]
+        assert [r["id"] for r in filled.iterate("items", {"kind": "b"})] == ["1", "3", "5", "7", "9"]
+
+    def test_iterate_skips_records_deleted_midway(self, filled):
+        it = filled.iterate("items", batch_size=2)
+        assert next(it)["id"] == "0"
+        filled.delete("items", "3")
+        assert [r["id"] for r in it] == ["1", "2", "4", "5", "6", "7", "8", "9"]
+
+
+class TestJsonStoreQuery:
+    @pytest.fixture
+    def dated(self, store):
+        store.ensure_index("items", "kind")
+        store.ensure_index("items", "due", kind="sorted")
+        store.insert_many("items", {
+            str(i): {"id": str(i), "kind": "abc"[i % 3], "due": f"2026-01-{i + 1:02d}",
+                     "name": f"item-{i}" if i % 2 else f"thing-{i}"}
+            for i in range(20)
+        })
+        store.insert("items", "nodue", {"id": "nodue", "kind": "a", "due": None, "name": "x"})
+        store.insert("items", "numeric", {"id": "numeric", "kind": "a", "due": 5, "name": "y"})
+        return store
+
+    def _ids(self, records):
+        return sorted(r["id"] for r in records)
+
+    def test_fields(self, dated):
+        where = [eq("kind", "a"), lt("due", "2026-01-05")]
+        found = dated.query("items", where, fields=["id", "due", "missing"])
+        assert found == [{"id": "0", "due": "2026-01-01"}, {"id": "3", "due": "2026-01-04"}]
+        assert dated.get("items", "0")["name"] == "thing-0"
+
+    def test_predicates(self):
+        record = {"due": "2026-01-05", "name": "item", "tags": ["x"]}
+        assert lt("due", "2026-02-01").matches(record)
+        assert not gt("due", 3).matches(record)
+        assert not lt("missing", "z").matches(record)
+        assert in_("tags", [["x"], ["y"]]).matches(record)
+        assert prefix("name", "it").matches(record) and not prefix("due", "x").matches(record)
+        assert exists("due").matches(record) and exists("missing", False).matches(record)
+        with pytest.raises(ValueError, match="Unknown operator"):
+            Predicate("due", "between", 1)
+
+    def test_range_uses_sorted_index(self, dated):
+        where = [gte("due", "2026-01-05"), lt("due", "2026-01-08")]
+        assert self._ids(dated.query("items", where)) == ["4", "5", "6"]
+        assert dated.explain("items", where=where) == {
+            "access": "sorted", "field": "due", "estimated": 3
+        }
+        assert self._ids(dated.query("items", [lte("due", "2026-01-02")])) == ["0", "1"]
+        assert self._ids(dated.query("items", [gt("due", "2026-01-19")])) == ["19"]
+
+    def test_planner_picks_cheapest_path(self, dated):
+        where = [in_("kind", ["b", "c"]), lt("due", "2026-01-04")]
+        assert self._ids(dated.query("items", where)) == ["1", "2"]
+        assert dated.explain("items", where=where)["access"] == "sorted"
+        where = [eq("kind", "b"), gt("due", "2026-01-01")]
+        assert dated.explain("items", where=where) == {"access": "hash", "field": "kind", "estimated": 7}
+        assert dated.explain("items", where=[prefix("name", "item")])["access"] == "scan"
+
+    def test_prefix_exists_and_type_mismatches(self, dated):
+        assert len(dated.query("items", [prefix("name", "item-")])) == 10
+        assert self._ids(dated.query("items", [exists("due", False)])) == ["nodue"]
+        assert self._ids(dated.query("items", [gt("due", 4)])) == ["numeric"]
+        assert "numeric" not in self._ids(dated.query("items", [lt("due", "2027")]))
+
+    def test_sort_limit_and_index_maintenance(self, dated):
+        sort = SortSpec("due", descending=True)
+        top = dated.query("items", [eq("kind", "a"), prefix("due", "2026-")], sort=sort, limit=3)
+        assert [r["id"] for r in top] == ["18", "15", "12"]
+        dated.update("items", "18", {"id": "18", "kind": "a", "due": "2025-12-31", "name": "z"})
+        dated.delete("items", "15")
+        assert self._ids(dated.query("items", [lt("due", "2026-01-02")])) == ["0", "18"]
+        assert self._ids(dated.query("items", [gte("due", "2026-01-15"), lte("due", "2026-01-17")])) == [
+            "14", "16"
+        ]
+
+    def test_partitioned_sorted_index(self, dated):
+        dated.ensure_index("items", "due", kind="sorted", partition_by="kind")
+        where = [eq("kind", "b"), lt("due", "2026-01-10")]
+        assert self._ids(dated.query("items", where)) == ["1", "4", "7"]
+        assert dated.explain("items", where=where) == {
+            "access": "sorted", "field": "due", "estimated": 3
+        }
+        where = [in_("kind", ["a", "c"]), gte("due", "2026-01-17")]
+        assert self._ids(dated.query("items", where)) == ["17", "18"]
+        # Moving a record to another partition moves its index entry.
+        dated.update("items", "1", {"id": "1", "kind": "c", "due": "2026-01-02", "name": "z"})
+        assert self._ids(dated.query("items", [eq("kind", "b"), lt("due", "2026-01-10")])) == ["4", "7"]
+        assert self._ids(dated.query("items", [eq("kind", "c"), lt("due", "2026-01-04")])) == ["1", "2"]
+        with pytest.raises(ValueError, match="partitioned"):
+            dated.ensure_index("items", "kind", partition_by="due")
+
+
+class TestSlowLog:
+    def test_records_slow_reads_and_writes(self, store):
+        slow = JsonStore(data_dir=store.data_dir, slow_ms=0)
+        slow.ensure_index("items", "kind")
+        slow.insert_many("items", {
+            str(i): {"id": str(i), "kind": "ab"[i % 2], "n": i} for i in range(10)
+        })
+        slow.find("items", kind="a")
+        slow.page("items", 2, sort=SortSpec("n"), where=[gte("n", 3), lt("n", 8)])
+        entries = list(read_entries(os.path.join(store.data_dir, SLOW_LOG_FILE)))
+        by_op = {e["op"]: e for e in entries}
+        assert by_op["save"]["bytes"] == os.path.getsize(slow._file_path("items"))
+        assert by_op["find"]["filters"] == ["kind eq"]
+        assert by_op["find"]["access"] == "hash"
+        assert (by_op["find"]["scanned"], by_op["find"]["returned"]) == (5, 5)
+        assert by_op["page"]["filters"] == ["n gte", "n lt"]
+        assert by_op["page"]["sort"] == "n"
+        assert (by_op["page"]["scanned"], by_op["page"]["returned"]) == (10, 2)
+
+    def test_fast_operations_are_not_logged(self, store):
+        fast = JsonStore(data_dir=store.data_dir, slow_ms=60_000)
+        fast.insert("items", "1", {"id": "1"})
+        fast.find("items", id="1")
+        assert not os.path.exists(fast.slow_log.path)
+
+    def test_rotation(self, store):
+        log = SlowLog(os.path.join(store.data_dir, "slow.log"), 0, max_bytes=400, backups=2)
+        for i in range(20):
+            log.record("items", "find", i / 1000, filters=["n eq"])
+        assert os.path.getsize(log.path) <= 400
+        assert os.path.exists(log.path + ".2") and not os.path.exists(log.path + ".3")
+        with open(log.path, "a") as f:
+            f.write('{"truncated\n')
+        ms = [e["ms"] for e in read_entries(log.path, backups=2)]
+        assert ms == sorted(ms) and ms[-1] == 19
+
+    def test_report_ranks_shapes_and_suggests_indexes(self):
+        def entry(op, filters, ms, access="scan", scanned=1000, returned=10, **extra):
+            return {"collection": "tasks", "op": op, "ms": ms, "filters": filters,
+                    "access": access, "scanned": scanned, "returned": returned, **extra}
+
+        entries = [
+            entry("find", ["assigned_to eq"], 150),
+            entry("find", ["assigned_to eq"], 250),
+            entry("page", ["due_date lt", "status eq"], 300, access="hash", scanned=900),
+            entry("find", ["id eq"], 120, access="hash", scanned=1, returned=1),
+            entry("save", [], 500, access=None, scanned=1000, returned=None, bytes=2048),
+        ]
+        report = slow_report(entries, {"tasks": [("hash", "status")]})
+        assert [(r["op"], r["filters"]) for r in report["shapes"]] == [
+            ("find", ["assigned_to eq"]),
+            ("page", ["due_date lt", "status eq"]),
+            ("find", ["id eq"]),
+        ]
+        assert report["shapes"][0]["count"] == 2 and report["shapes"][0]["total_ms"] == 400
+        assert report["writes"] == [{
+            "collection": "tasks", "op": "save", "count": 1, "total_ms": 500,
+            "p95_ms": 500, "max_ms": 500, "mean_bytes": 2048,
+        }]
+        assert [(i["kind"], i["field"], i["total_ms"]) for i in report["indexes"]] == [
+            ("hash", "assigned_to", 400), ("sorted", "due_date", 300),
+        ]
+
+
+class TestAsyncStore:
+    def test_mirrors_the_store(self, store):
+        async def run():
+            aio = AsyncStore(store)
+            await aio.insert("items", "1", {"id": "1", "n": 1})
+            await aio.update("items", "1", {"id": "1", "n": 2}, expected_rev=1)
+            with pytest.raises(VersionConflictError):
+                await aio.update("items", "1", {"id": "1", "n": 3}, expected_rev=1)
+            assert (await aio.get("items", "1"))["n"] == 2
+            assert await aio.revision("items", "1") == 2
+            assert await aio.query("items", [eq("n", 2)]) == [store.get("items", "1")]
+            assert await aio.delete("items", "1")
+            aio.close()
+
+        asyncio.run(run())
+
+    def test_reads_do_not_queue_behind_a_slow_write(self, store):
+        async def run():
+            aio = AsyncStore(store, read_workers=2)
+            await aio.insert("items", "1", {"id": "1"})
+            release = threading.Event()
+            slow = asyncio.ensure_future(aio.write(release.wait, 5))
+            reads = await asyncio.gather(*(aio.get("items", "1") for _ in range(20)))
+            assert all(r["id"] == "1" for r in reads)
+            assert not slow.done()
+            release.set()
+            assert await slow
+            aio.close()
+
+        asyncio.run(run())